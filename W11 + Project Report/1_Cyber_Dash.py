@@ -1,12 +1,11 @@
 import streamlit as st
 import plotly.express as px
-import pandas as pd
 from datetime import datetime
-from app.data.db import connect_database
-from services. import security_incident_manager
+from app.data.db import get_pool
+from services.security_incident_manager import SecurityIncidentManager
 
 
-incident_manager = SecurityIncidentManager(db_connector=connect_database)
+incident_manager = SecurityIncidentManager(pool=get_pool())
 
 
 st.set_page_config(page_title="Cyber Incidents Dashboard", page_icon="🛡️", layout="wide")
@@ -89,9 +88,9 @@ st.divider()
 
 # ==================== VISUALIZATIONS ====================
 try:
-    # 💥 CHANGE 2: Get incidents as a list of objects, then convert to DataFrame
-    incidents_list = incident_manager.get_all_incidents()
-    df = pd.DataFrame([incident.__dict__ for incident in incidents_list])
+    # 💥 CHANGE 2: Get incidents as a column-backed collection, then a typed DataFrame
+    incidents = incident_manager.get_all_incidents()
+    df = incidents.to_dataframe(typed=True)
 
     # Original dashboard code assumed 'df' was available here:
     if len(df) > 0:
@@ -103,7 +102,9 @@ try:
 
         with col1:
             st.subheader("📈 Incidents by Severity")
+            # Categorical counts include filtered-out values as zeros
             severity_counts = filtered_df["severity"].value_counts()
+            severity_counts = severity_counts[severity_counts > 0]
             fig1 = px.bar(
                 x=severity_counts.index,
                 y=severity_counts.values,
@@ -121,6 +122,7 @@ try:
         with col2:
             st.subheader("📊 Status Distribution")
             status_counts = filtered_df["status"].value_counts()
+            status_counts = status_counts[status_counts > 0]
             fig2 = px.pie(
                 values=status_counts.values, names=status_counts.index, hole=0.4
             )
@@ -245,6 +247,73 @@ try:
                                 st.error("❌ Delete failed")
                         except Exception as e:
                             st.error(f"❌ Error: {e}")
+
+            # ==================== BULK ACTIONS ====================
+            st.divider()
+            st.subheader("📦 Bulk Actions")
+
+            bulk_df = filtered_df.head(500)
+            bulk_labels = {
+                f"#{incident_id}: {incident_type} - {severity} ({status})": incident_id
+                for incident_id, incident_type, severity, status in zip(
+                    bulk_df["id"],
+                    bulk_df["incident_type"],
+                    bulk_df["severity"],
+                    bulk_df["status"],
+                )
+            }
+            selected_labels = st.multiselect(
+                f"Select incidents (first {len(bulk_df):,} matching the filters)",
+                list(bulk_labels),
+            )
+            selected_ids = [int(bulk_labels[label]) for label in selected_labels]
+
+            col1, col2 = st.columns(2)
+
+            with col1:
+                bulk_status = st.selectbox(
+                    "Set status to",
+                    ["Open", "In Progress", "Resolved", "Closed"],
+                    key="bulk_status",
+                )
+                if st.button(
+                    f"💾 Update {len(selected_ids)} selected",
+                    disabled=not selected_ids,
+                ):
+                    try:
+                        results = incident_manager.bulk_update_status(
+                            selected_ids, bulk_status
+                        )
+                        missing = [
+                            incident_id
+                            for incident_id, updated in results.items()
+                            if not updated
+                        ]
+                        updated_count = len(results) - len(missing)
+                        st.success(f"✅ {updated_count} incidents set to {bulk_status}")
+                        if missing:
+                            st.warning(f"⚠️ Already deleted: {missing}")
+                        else:
+                            st.rerun()
+                    except Exception as e:
+                        st.error(f"❌ Bulk update failed: {e}")
+
+            with col2:
+                confirm_bulk_delete = st.checkbox(
+                    f"Yes, delete {len(selected_ids)} incidents"
+                )
+                if st.button(
+                    "🗑️ Delete selected",
+                    type="primary",
+                    disabled=not (selected_ids and confirm_bulk_delete),
+                ):
+                    try:
+                        results = incident_manager.bulk_delete(selected_ids)
+                        deleted = sum(results.values())
+                        st.success(f"✅ {deleted} incidents deleted")
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"❌ Bulk delete failed: {e}")
         else:
             st.info("No incidents to manage")
     else:
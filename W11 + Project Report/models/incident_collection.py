@@ -0,0 +1,75 @@
+import pandas as pd
+from app.data.frames import compact_frame
+from models.security_incident import SecurityIncident
+
+# Column order of IncidentCollection, matching SecurityIncident's attributes.
+INCIDENT_FIELDS = SecurityIncident.__slots__
+FETCH_CHUNK = 10_000
+
+
+class IncidentCollection:
+    """
+    Security incidents stored column by column instead of one object per row.
+
+    Rows are only turned into SecurityIncident objects when they are indexed
+    or iterated, and to_dataframe() hands the column lists straight to pandas,
+    so loading a large table never builds a million objects or dicts.
+    """
+
+    def __init__(self, columns=None):
+        """Initializes the collection from a {field: list} mapping."""
+        columns = columns or {}
+        self._columns = {
+            field: list(columns.get(field, [])) for field in INCIDENT_FIELDS
+        }
+        lengths = {len(values) for values in self._columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("Incident columns must all be the same length")
+
+    @classmethod
+    def from_cursor(cls, cursor, chunk_size=FETCH_CHUNK):
+        """
+        Builds a collection from an executed cursor whose SELECT lists
+        INCIDENT_FIELDS in order. Rows are transposed a chunk at a time.
+        """
+        collection = cls()
+        columns = [collection._columns[field] for field in INCIDENT_FIELDS]
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            for values, column in zip(columns, zip(*rows)):
+                values.extend(column)
+        return collection
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """Builds a collection from a DataFrame with (at least) INCIDENT_FIELDS."""
+        return cls({field: df[field].tolist() for field in INCIDENT_FIELDS})
+
+    def to_dataframe(self, typed=False):
+        """
+        Returns the incidents as a DataFrame. With typed=True severity, status
+        and incident_type are categorical (see app.data.frames).
+        """
+        df = pd.DataFrame(self._columns, columns=list(INCIDENT_FIELDS))
+        if typed:
+            df = compact_frame(df, "cyber_incidents")
+        return df
+
+    def column(self, field):
+        """Returns the list of values for one field (not a copy)."""
+        return self._columns[field]
+
+    def __len__(self):
+        return len(self._columns["id"])
+
+    def __getitem__(self, index):
+        """Materializes one row as a SecurityIncident. Changes to it are not
+        written back to the collection."""
+        values = [self._columns[field][index] for field in INCIDENT_FIELDS]
+        return SecurityIncident(*values)
+
+    def __iter__(self):
+        for values in zip(*(self._columns[field] for field in INCIDENT_FIELDS)):
+            yield SecurityIncident(*values)
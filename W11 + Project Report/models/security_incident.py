@@ -3,6 +3,10 @@ class SecurityIncident:
     Represents a Security Incident entity in the system.
     """
 
+    # No per-instance __dict__: a slotted incident is about a third the size,
+    # which matters when a dashboard holds a million of them.
+    __slots__ = ("id", "incident_type", "severity", "status", "description")
+
     def __init__(self, incident_id, incident_type, severity, status, description):
         """Initializes the SecurityIncident object."""
         self.id = incident_id
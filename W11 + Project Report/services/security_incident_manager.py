@@ -1,6 +1,19 @@
-import pandas as pd
-from app.data.db import connect_database
-from models.security_incident import SecurityIncident
+from app.data.cache import bump_generation
+from app.data.db import get_pool, retry_on_busy
+from app.data.statistics import read_incident_statistics
+from models.incident_collection import INCIDENT_FIELDS, IncidentCollection
+
+# Columns bulk_insert expects in each row, in order.
+INSERT_COLUMNS = (
+    "date_reported",
+    "incident_type",
+    "severity",
+    "status",
+    "description",
+    "reported_by",
+)
+# Ids per "WHERE id IN (...)" lookup, well under SQLite's variable limit.
+ID_LOOKUP_CHUNK = 500
 
 
 class SecurityIncidentManager:
@@ -8,98 +21,165 @@ class SecurityIncidentManager:
     Manages database operations and business logic related to Security Incidents.
     """
 
-    def __init__(self, db_connector):
-        """Initializes the manager with a database connector/function."""
-        self.connect_db = db_connector
+    def __init__(self, pool=None):
+        """Initializes the manager with a connection pool (the shared one by default)."""
+        self.pool = pool if pool is not None else get_pool()
 
     def get_all_incidents(self):
-        """Fetches all incidents and returns a list of SecurityIncident objects."""
-        conn = self.connect_db()
-        try:
-            query = "SELECT id, incident_type, severity, status, description FROM cyber_incidents"
-            df = pd.read_sql_query(query, conn)
-
-            incidents = []
-            for index, row in df.iterrows():
-                incident = SecurityIncident(
-                    incident_id=row["id"],
-                    incident_type=row["incident_type"],
-                    severity=row["severity"],
-                    status=row["status"],
-                    description=row["description"],
-                )
-                incidents.append(incident)
-            return incidents
-        except Exception as e:
-            print(f"Error fetching all incidents: {e}")
-            return []
-        finally:
-            conn.close()
+        """
+        Fetches all incidents as an IncidentCollection. Iterating it yields
+        SecurityIncident objects; to_dataframe() skips them entirely.
+        """
+        with self.pool.connection() as conn:
+            try:
+                query = f"SELECT {', '.join(INCIDENT_FIELDS)} FROM cyber_incidents"
+                return IncidentCollection.from_cursor(conn.execute(query))
+            except Exception as e:
+                print(f"Error fetching all incidents: {e}")
+                return IncidentCollection()
 
     def get_incident_statistics(self):
         """
         Calculates and returns key metrics used by the dashboard.
         """
-        conn = self.connect_db()
-        try:
-            total_df = pd.read_sql_query(
-                "SELECT COUNT(id) AS total FROM cyber_incidents", conn
-            )
-            open_df = pd.read_sql_query(
-                "SELECT COUNT(id) AS open_incidents FROM cyber_incidents WHERE status='Open'",
-                conn,
-            )
-            severity_df = pd.read_sql_query(
-                "SELECT severity, COUNT(*) as count FROM cyber_incidents GROUP BY severity",
-                conn,
-            )
-            status_df = pd.read_sql_query(
-                "SELECT status, COUNT(*) as count FROM cyber_incidents GROUP BY status",
-                conn,
-            )
-
-            stats = {
-                "total": int(total_df.iloc[0, 0]) if not total_df.empty else 0,
-                "open_incidents": int(open_df.iloc[0, 0]) if not open_df.empty else 0,
-                "by_severity": severity_df.to_dict("records"),
-                "by_status": status_df.to_dict("records"),
-            }
-            return stats
-        except Exception as e:
-            print(f"Error calculating incident statistics: {e}")
-            return {"total": 0, "open_incidents": 0, "by_severity": [], "by_status": []}
-        finally:
-            conn.close()
+        with self.pool.connection() as conn:
+            try:
+                return read_incident_statistics(conn)
+            except Exception as e:
+                print(f"Error calculating incident statistics: {e}")
+                return {"total": 0, "open_incidents": 0, "by_severity": [], "by_status": []}
 
     def update_incident_status(self, incident_id, new_status):
         """
         Updates the status of a specific security incident.
         (Refactored from standalone function to class method)
         """
-        conn = self.connect_db()
-        try:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "UPDATE cyber_incidents SET status = ? WHERE id = ?",
                 (new_status, incident_id),
             )
             conn.commit()
+            bump_generation("cyber_incidents")
             rows_changed = cursor.rowcount
             return rows_changed
-        finally:
-            conn.close()
 
     def delete_incident(self, incident_id):
         """
         Deletes a specific security incident.
         (Refactored from standalone function to class method)
         """
-        conn = self.connect_db()
-        try:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM cyber_incidents WHERE id = ?", (incident_id,))
             conn.commit()
+            bump_generation("cyber_incidents")
             rows_changed = cursor.rowcount
             return rows_changed
-        finally:
-            conn.close()
+
+    def insert_incident(
+        self,
+        date_reported,
+        incident_type,
+        severity,
+        status,
+        description,
+        reported_by=None,
+    ):
+        """Inserts one incident and returns its new id."""
+        row = (date_reported, incident_type, severity, status, description, reported_by)
+        return self.bulk_insert([row])[0]
+
+    def _existing_ids(self, conn, incident_ids):
+        existing = set()
+        for start in range(0, len(incident_ids), ID_LOOKUP_CHUNK):
+            chunk = incident_ids[start : start + ID_LOOKUP_CHUNK]
+            placeholders = ", ".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT id FROM cyber_incidents WHERE id IN ({placeholders})", chunk
+            ).fetchall()
+            existing.update(row[0] for row in rows)
+        return existing
+
+    def _in_transaction(self, work):
+        """
+        Runs work(conn) inside one IMMEDIATE transaction on one pooled
+        connection, so a bulk call costs a single commit however many rows
+        it touches, and either all of it lands or none of it does.
+        """
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(conn)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        bump_generation("cyber_incidents")
+        return result
+
+    @retry_on_busy
+    def bulk_update_status(self, incident_ids, new_status):
+        """
+        Sets the status of many incidents in one transaction.
+        Returns {incident_id: True if it existed and was updated}.
+        """
+        incident_ids = [int(incident_id) for incident_id in incident_ids]
+
+        def work(conn):
+            existing = self._existing_ids(conn, incident_ids)
+            conn.executemany(
+                "UPDATE cyber_incidents SET status = ? WHERE id = ?",
+                [(new_status, incident_id) for incident_id in existing],
+            )
+            return {
+                incident_id: incident_id in existing for incident_id in incident_ids
+            }
+
+        return self._in_transaction(work)
+
+    @retry_on_busy
+    def bulk_delete(self, incident_ids):
+        """
+        Deletes many incidents in one transaction.
+        Returns {incident_id: True if it existed and was deleted}.
+        """
+        incident_ids = [int(incident_id) for incident_id in incident_ids]
+
+        def work(conn):
+            existing = self._existing_ids(conn, incident_ids)
+            conn.executemany(
+                "DELETE FROM cyber_incidents WHERE id = ?",
+                [(incident_id,) for incident_id in existing],
+            )
+            return {
+                incident_id: incident_id in existing for incident_id in incident_ids
+            }
+
+        return self._in_transaction(work)
+
+    @retry_on_busy
+    def bulk_insert(self, rows):
+        """
+        Inserts many incidents in one transaction. Each row is a tuple in
+        INSERT_COLUMNS order (reported_by may be left off).
+        Returns the new ids, in the same order as rows.
+        """
+        rows = [tuple(row) + (None,) * (len(INSERT_COLUMNS) - len(row)) for row in rows]
+        if not rows:
+            return []
+
+        def work(conn):
+            placeholders = ", ".join("?" * len(INSERT_COLUMNS))
+            conn.executemany(
+                f"INSERT INTO cyber_incidents ({', '.join(INSERT_COLUMNS)}) "
+                f"VALUES ({placeholders})",
+                rows,
+            )
+            # The write lock is held since BEGIN IMMEDIATE and ids are never
+            # given explicitly, so the new rows got consecutive ids.
+            last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            return list(range(last_id - len(rows) + 1, last_id + 1))
+
+        return self._in_transaction(work)
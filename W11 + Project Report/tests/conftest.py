@@ -0,0 +1,32 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The W11 models and services, and the app.data layer they build on, are
+# imported the way the final project's pages import them
+W11_ROOT = Path(__file__).resolve().parent.parent
+PROJECT_ROOT = W11_ROOT.parent / "W9 Lab + Workshop" / "final_project_cw2"
+sys.path[:0] = [str(W11_ROOT), str(PROJECT_ROOT)]
+
+from app.data.db import ConnectionPool, connect_database  # noqa: E402
+from app.data.schema import create_all_tables  # noqa: E402
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """A fully migrated scratch database; DATA/ is created under tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "test.db"
+    conn = connect_database(path, performance=False)
+    create_all_tables(conn)
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def pool(db_path):
+    # WAL and busy_timeout, so concurrent writers queue instead of failing
+    pool = ConnectionPool(db_path, size=4, performance=True)
+    yield pool
+    pool.close_all()
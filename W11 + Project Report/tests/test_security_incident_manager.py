@@ -0,0 +1,123 @@
+import sqlite3
+import threading
+
+import pytest
+
+from services.security_incident_manager import SecurityIncidentManager
+
+
+@pytest.fixture
+def manager(pool):
+    return SecurityIncidentManager(pool=pool)
+
+
+def incident_row(description, status="Open"):
+    return ("2024-01-01", "Phishing", "High", status, description, "analyst")
+
+
+def stored(pool):
+    with pool.connection() as conn:
+        return conn.execute(
+            "SELECT id, status, description FROM cyber_incidents ORDER BY id"
+        ).fetchall()
+
+
+def add_trigger(pool, sql):
+    with pool.connection() as conn:
+        conn.execute(sql)
+        conn.commit()
+
+
+def test_bulk_update_status_reports_each_id(manager, pool):
+    first, second = manager.bulk_insert([incident_row("a"), incident_row("b")])
+    result = manager.bulk_update_status([second, 999, str(first)], "Resolved")
+
+    assert result == {second: True, 999: False, first: True}
+    assert stored(pool) == [(first, "Resolved", "a"), (second, "Resolved", "b")]
+
+
+def test_bulk_delete_reports_each_id(manager, pool):
+    first, second, third = manager.bulk_insert(
+        [incident_row("a"), incident_row("b"), incident_row("c")]
+    )
+    result = manager.bulk_delete([first, 999, third, third])
+
+    assert result == {first: True, 999: False, third: True}
+    assert stored(pool) == [(second, "Open", "b")]
+    assert manager.bulk_delete([]) == {}
+
+
+def test_bulk_update_rolls_back_when_a_row_fails(manager, pool):
+    ids = manager.bulk_insert([incident_row(str(i)) for i in range(3)])
+    # Fails on the last row, after the others were updated in the transaction
+    add_trigger(
+        pool,
+        f"""
+        CREATE TRIGGER fail_update BEFORE UPDATE ON cyber_incidents
+        WHEN OLD.id = {max(ids)} BEGIN SELECT RAISE(ABORT, 'update refused'); END
+        """,
+    )
+    before = stored(pool)
+    with pytest.raises(sqlite3.IntegrityError, match="update refused"):
+        manager.bulk_update_status(ids, "Closed")
+    assert stored(pool) == before
+
+
+def test_bulk_delete_rolls_back_when_a_row_fails(manager, pool):
+    ids = manager.bulk_insert([incident_row(str(i)) for i in range(3)])
+    add_trigger(
+        pool,
+        f"""
+        CREATE TRIGGER fail_delete BEFORE DELETE ON cyber_incidents
+        WHEN OLD.id = {max(ids)} BEGIN SELECT RAISE(ABORT, 'delete refused'); END
+        """,
+    )
+    before = stored(pool)
+    with pytest.raises(sqlite3.IntegrityError, match="delete refused"):
+        manager.bulk_delete(ids)
+    assert stored(pool) == before
+
+
+def test_bulk_insert_rolls_back_when_a_row_fails(manager, pool):
+    manager.bulk_insert([incident_row("kept")])
+    before = stored(pool)
+    rows = [incident_row("new"), (None, None, None, None, "missing type")]
+    with pytest.raises(sqlite3.IntegrityError):
+        manager.bulk_insert(rows)
+    assert stored(pool) == before
+
+
+def test_bulk_insert_returns_the_ids_it_created(manager, pool):
+    first = manager.bulk_insert([incident_row("a"), incident_row("b")])
+    # Deleted ids are never reused, so the next block starts past the gap
+    manager.bulk_delete(first)
+    second = manager.bulk_insert(
+        [incident_row("c"), ("2024-01-02", "Malware", "Low", "Open", "d")]
+    )
+
+    assert second == [first[-1] + 1, first[-1] + 2]
+    assert [(row[0], row[2]) for row in stored(pool)] == list(zip(second, "cd"))
+    assert manager.bulk_insert([]) == []
+
+
+def test_concurrent_bulk_inserts_get_their_own_consecutive_ids(manager, pool):
+    writers, rows_per_writer = 4, 50
+    returned = {}
+
+    def insert(writer):
+        rows = [incident_row(f"{writer}-{i}") for i in range(rows_per_writer)]
+        returned[writer] = manager.bulk_insert(rows)
+
+    threads = [threading.Thread(target=insert, args=(w,)) for w in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    descriptions = {row[0]: row[2] for row in stored(pool)}
+    assert len(descriptions) == writers * rows_per_writer
+    for writer, ids in returned.items():
+        assert ids == list(range(ids[0], ids[0] + rows_per_writer))
+        assert [descriptions[i] for i in ids] == [
+            f"{writer}-{i}" for i in range(rows_per_writer)
+        ]
@@ -1,13 +1,47 @@
 import bcrypt
+import math
 import os
+import time
+
+from breach_filter import is_breached
+from user_store import UserStore
 
 USER_DATA_FILE = "user.txt"
 
+# How long one hash should take; the bcrypt cost is picked to match this machine
+TARGET_HASH_MS = 250
+MIN_ROUNDS = 10
+MAX_ROUNDS = 16
+
+bcrypt_rounds = None
+rehash_counts = {'upgraded': 0, 'downgraded': 0}
+
+# Indexed view of user.txt, loaded on first use
+store = UserStore(USER_DATA_FILE)
+
+def calibrate_rounds(target_ms=TARGET_HASH_MS):
+    # Time one cheap hash and extrapolate: each extra round doubles the work
+    started = time.perf_counter()
+    bcrypt.hashpw(b'calibration', bcrypt.gensalt(rounds=8))
+    probe = time.perf_counter() - started
+    estimate = 8 + math.log2(target_ms / 1000 / probe)
+    return max(MIN_ROUNDS, min(MAX_ROUNDS, round(estimate)))
+
+def get_rounds():
+    global bcrypt_rounds
+    if bcrypt_rounds is None:
+        bcrypt_rounds = calibrate_rounds()
+    return bcrypt_rounds
+
+def hash_rounds(hashed_password):
+    # "$2b$12$..." -> 12
+    return int(hashed_password.split('$')[2])
+
 def hash_password(plain_text_password):
     # Encode to bytes
     password_bytes = plain_text_password.encode('utf-8')
-    # Generate salt
-    salt = bcrypt.gensalt()
+    # Generate salt at the calibrated cost
+    salt = bcrypt.gensalt(rounds=get_rounds())
     # Hash password
     hashed = bcrypt.hashpw(password_bytes, salt)
     # Decode back to string for storage
@@ -21,44 +55,42 @@ def verify_password(plain_text_password, hashed_password):
     return bcrypt.checkpw(password_bytes, hashed_bytes)
 
 def user_exists(username):
-    if not os.path.exists(USER_DATA_FILE):
-        return False
-    with open(USER_DATA_FILE, 'r') as f:
-        for line in f:
-            stored_username, _ = line.strip().split(',')
-            if stored_username == username:
-                return True
-    return False
+    return store.exists(username)
 
 def register_user(username, password, role='user'):
     if user_exists(username):
         print(f"Error: Username '{username}' already exists.")
         return False
     hashed = hash_password(password)
-    with open(USER_DATA_FILE, 'a') as f:
-        f.write(f"{username},{hashed},{role}\n")
+    store.add(username, hashed, role)
     print(f"Success: User '{username}' registered with role '{role}'!")
     return True
 
+def rehash_if_needed(username, password, stored_hash):
+    # Re-make hashes stored at an old cost now that we know the password
+    old_rounds = hash_rounds(stored_hash)
+    if old_rounds == get_rounds():
+        return
+    store.update_hash(username, hash_password(password))
+    key = 'upgraded' if old_rounds < get_rounds() else 'downgraded'
+    rehash_counts[key] += 1
+    print(f"Note: password hash {key} from cost {old_rounds} to {get_rounds()}.")
+
 def login_user(username, password):
     if not os.path.exists(USER_DATA_FILE):
         print("Error: No users registered yet.")
         return False
-    with open(USER_DATA_FILE, 'r') as f:
-        for line in f:
-            parts = line.strip().split(',')
-            stored_username = parts[0]
-            stored_hash = parts[1]
-            role = parts[2] if len(parts) > 2 else "user"
-            if stored_username == username:
-                if verify_password(password, stored_hash):
-                    print(f"Success: Welcome, {username}! Your role is '{role}'.")
-                    return True
-                else:
-                    print("Error: Invalid password.")
-                    return False
-    print("Error: Username not found.")
-    return False
+    record = store.get(username)
+    if record is None:
+        print("Error: Username not found.")
+        return False
+    stored_hash, role = record
+    if not verify_password(password, stored_hash):
+        print("Error: Invalid password.")
+        return False
+    print(f"Success: Welcome, {username}! Your role is '{role}'.")
+    rehash_if_needed(username, password, stored_hash)
+    return True
 
 import re
 
@@ -72,6 +104,9 @@ def check_password_strength(password):
 
     if any(p in password.lower() for p in common_patterns):
         return "Weak"
+    # Anything seen in a breach corpus is weak however complex it looks
+    if is_breached(password):
+        return "Weak"
     if length >= 12 and has_upper and has_lower and has_digit and has_special:
         return "Strong"
     if length >= 8 and (has_upper or has_lower) and has_digit:
@@ -102,6 +137,7 @@ def display_menu():
 
 def main():
     print("\nWelcome to the Week 7 Authentication System!")
+    print(f"Password hashing: bcrypt cost {get_rounds()} (target ~{TARGET_HASH_MS} ms)")
     while True:
         display_menu()
         choice = input("\nPlease select an option (1-3): ").strip()
@@ -122,6 +158,9 @@ def main():
             if password != password_confirm:
                 print("Error: Passwords do not match.")
                 continue
+            if is_breached(password):
+                print("Error: This password appears in known data breaches. Please choose another.")
+                continue
             strength = check_password_strength(password)
             print(f"Password strength: {strength}")
             
@@ -142,6 +181,8 @@ def main():
             password = input("Enter your password: ").strip()
             login_user(username, password)
         elif choice == '3':
+            print(f"Hashes re-made this session: {rehash_counts['upgraded']} upgraded, "
+                  f"{rehash_counts['downgraded']} downgraded")
             print("\nThank you for using the authentication system.")
             break
         else:
@@ -0,0 +1,197 @@
+import argparse
+import hashlib
+import math
+import mmap
+import os
+import random
+import struct
+import tempfile
+import time
+
+# On-disk Bloom filter of breached passwords.
+#
+# Build it once from a breach corpus (one password per line):
+#     python breach_filter.py build rockyou.txt
+# auth.py then checks passwords against breached_passwords.bloom. The file is
+# mmap'd on the first lookup, so start-up never reads it, and a lookup
+# touches only k bytes of it. A Bloom filter can say "breached" for a
+# password that is not (at the chosen false-positive rate) but never misses
+# one that is.
+
+DEFAULT_FILTER_PATH = "breached_passwords.bloom"
+DEFAULT_FALSE_POSITIVE_RATE = 0.001
+
+MAGIC = b"BLOOM1"
+HEADER = struct.Struct("<6sxxQQI4x")  # magic, bits, entries, hashes
+HEADER_SIZE = HEADER.size
+
+
+def _positions(password_bytes, bits, hashes):
+    # Double hashing (Kirsch-Mitzenmacher): k positions from one digest
+    digest = hashlib.blake2b(password_bytes, digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], 'little')
+    h2 = int.from_bytes(digest[8:], 'little') | 1
+    return [(h1 + i * h2) % bits for i in range(hashes)]
+
+
+def filter_size(entries, false_positive_rate):
+    # Optimal (bits, hashes) for n entries at false-positive rate p
+    entries = max(entries, 1)
+    bits = math.ceil(-entries * math.log(false_positive_rate) / math.log(2) ** 2)
+    bits = (bits + 7) // 8 * 8
+    hashes = max(1, round(bits / entries * math.log(2)))
+    return bits, hashes
+
+
+def _read_passwords(wordlist_path):
+    # Raw bytes, so corpora that aren't valid UTF-8 still load
+    with open(wordlist_path, 'rb') as f:
+        for line in f:
+            password = line.rstrip(b'\r\n')
+            if password:
+                yield password
+
+
+def build_filter(wordlist_path, output_path=DEFAULT_FILTER_PATH,
+                 false_positive_rate=DEFAULT_FALSE_POSITIVE_RATE):
+    # Two passes over the corpus: count, then set bits. Memory is the bit
+    # array only (about 1.8 bytes per entry at 0.1%).
+    entries = sum(1 for _ in _read_passwords(wordlist_path))
+    bits, hashes = filter_size(entries, false_positive_rate)
+    array = bytearray(bits // 8)
+    for password in _read_passwords(wordlist_path):
+        for position in _positions(password, bits, hashes):
+            array[position >> 3] |= 1 << (position & 7)
+
+    # Write next to the target and swap in, so readers never see half a file
+    directory = os.path.dirname(os.path.abspath(output_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.bloom-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, bits, entries, hashes))
+            f.write(array)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return entries, bits, hashes
+
+
+class BreachFilter:
+    # Lazily mmap'd view of a filter file built by build_filter()
+
+    def __init__(self, path=DEFAULT_FILTER_PATH):
+        self.path = path
+        self._map = None
+        self.bits = self.entries = self.hashes = 0
+
+    def _open(self):
+        with open(self.path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.bits, self.entries, self.hashes = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            self._map.close()
+            self._map = None
+            raise ValueError(f"{self.path} is not a breach filter")
+
+    def available(self):
+        return self._map is not None or os.path.exists(self.path)
+
+    def __contains__(self, password):
+        if self._map is None:
+            self._open()
+        data = self._map
+        for position in _positions(password.encode('utf-8'), self.bits, self.hashes):
+            if not data[HEADER_SIZE + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return True
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+
+_default_filter = BreachFilter()
+
+
+def is_breached(password, breach_filter=None):
+    # False when no filter has been built, so auth.py works without one
+    breach_filter = breach_filter or _default_filter
+    if not breach_filter.available():
+        return False
+    return password in breach_filter
+
+
+def run_benchmark(entries=1_000_000, lookups=100_000):
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        wordlist = os.path.join(tmp, 'wordlist.txt')
+        with open(wordlist, 'w') as f:
+            for i in range(entries):
+                f.write(f"breached{i}\n")
+        output = os.path.join(tmp, 'test.bloom')
+
+        started = time.perf_counter()
+        _, bits, hashes = build_filter(wordlist, output)
+        build_seconds = time.perf_counter() - started
+        print(f"\nBreach filter benchmark: {entries:,} passwords")
+        print("-" * 70)
+        rate = entries / build_seconds
+        size_mb = (bits // 8 + HEADER_SIZE) / 1e6
+        print(f"{'build':<30} {build_seconds:>10.2f} s ({rate:,.0f} entries/s)")
+        print(f"{'file size':<30} {size_mb:>10.2f} MB ({hashes} hashes)")
+
+        breach_filter = BreachFilter(output)
+        started = time.perf_counter()
+        _ = 'first lookup maps the file' in breach_filter
+        first_us = (time.perf_counter() - started) * 1e6
+        print(f"{'first lookup (mmap)':<30} {first_us:>10.1f} us")
+
+        hits = [f"breached{rng.randrange(entries)}" for _ in range(lookups)]
+        misses = [f"fresh{rng.randrange(10 ** 9)}!" for _ in range(lookups)]
+        started = time.perf_counter()
+        missed = sum(p not in breach_filter for p in hits)
+        hit_us = (time.perf_counter() - started) / lookups * 1e6
+        started = time.perf_counter()
+        false_positives = sum(p in breach_filter for p in misses)
+        miss_us = (time.perf_counter() - started) / lookups * 1e6
+        breach_filter.close()
+
+        print(f"{'lookup, breached':<30} {hit_us:>10.2f} us (missed {missed})")
+        print(f"{'lookup, not breached':<30} {miss_us:>10.2f} us")
+        print(f"{'false-positive rate':<30} {false_positives / lookups:>10.4%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Breached-password Bloom filter")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help="build a filter from a wordlist")
+    build.add_argument('wordlist')
+    build.add_argument('output', nargs='?', default=DEFAULT_FILTER_PATH)
+    build.add_argument('--fp-rate', type=float, default=DEFAULT_FALSE_POSITIVE_RATE)
+
+    check = subparsers.add_parser('check', help="look a password up")
+    check.add_argument('password')
+    check.add_argument('--filter', default=DEFAULT_FILTER_PATH)
+
+    bench = subparsers.add_parser('bench', help="build and query a synthetic filter")
+    bench.add_argument('--entries', type=int, default=1_000_000)
+
+    args = parser.parse_args()
+    if args.command == 'build':
+        started = time.perf_counter()
+        entries, bits, hashes = build_filter(args.wordlist, args.output, args.fp_rate)
+        print(f"Built {args.output}: {entries:,} passwords, {bits // 8 / 1e6:.1f} MB, "
+              f"{hashes} hashes in {time.perf_counter() - started:.1f}s")
+    elif args.command == 'check':
+        breached = is_breached(args.password, BreachFilter(args.filter))
+        print("Breached" if breached else "Not found in breach corpus")
+    else:
+        run_benchmark(args.entries)
+
+
+if __name__ == '__main__':
+    main()
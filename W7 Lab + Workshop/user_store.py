@@ -0,0 +1,197 @@
+import os
+import random
+import sys
+import tempfile
+import time
+
+# user.txt is an append-only log of "username,hash,role" lines. The last line
+# for a username wins, so updating a hash is just another append; compact()
+# rewrites the file with one line per user.
+
+BCRYPT_HASH_LENGTH = 60
+# Compact automatically once this many superseded lines pile up and they
+# outnumber the live ones.
+MIN_STALE_FOR_COMPACTION = 1000
+
+
+def parse_line(line):
+    # Returns (username, hash, role) or None for blank/torn lines
+    parts = line.strip().split(',')
+    if len(parts) < 2 or not parts[0]:
+        return None
+    username, hashed = parts[0], parts[1]
+    # A crash mid-append can leave a truncated hash behind; never trust one
+    if len(hashed) != BCRYPT_HASH_LENGTH or not hashed.startswith('$2'):
+        return None
+    role = parts[2] if len(parts) > 2 and parts[2] else 'user'
+    return username, hashed, role
+
+
+class UserStore:
+    # O(1) lookups over user.txt via a dict loaded once and kept in sync
+    # with appends, including appends made by other processes.
+
+    def __init__(self, path):
+        self.path = path
+        self._index = None
+        self._offset = 0      # bytes read, always at a line boundary
+        self._file_id = None  # (device, inode); changes when the file is replaced
+        self._lines = 0       # records in the file, live or superseded
+
+    def _reset(self):
+        self._index = {}
+        self._offset = 0
+        self._lines = 0
+
+    def _refresh(self):
+        # Read whatever was appended since last time; reload after a compaction
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._reset()
+            self._file_id = None
+            return
+        file_id = (stat.st_dev, stat.st_ino)
+        replaced = file_id != self._file_id or stat.st_size < self._offset
+        if self._index is None or replaced:
+            self._reset()
+            self._file_id = file_id
+        if stat.st_size == self._offset:
+            return
+
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read()
+        # Leave an unterminated last line for the next refresh
+        end = data.rfind(b'\n') + 1
+        for raw in data[:end].splitlines():
+            record = parse_line(raw.decode('utf-8', errors='replace'))
+            if record:
+                self._index[record[0]] = record[1:]
+                self._lines += 1
+        self._offset += end
+
+    def _append(self, username, hashed, role):
+        self._refresh()
+        with open(self.path, 'ab') as f:
+            # Start on a fresh line if a previous writer died mid-line
+            prefix = b'\n' if f.tell() > self._offset else b''
+            f.write(prefix + f"{username},{hashed},{role}\n".encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+        self._refresh()
+
+    def get(self, username):
+        # (hash, role) or None
+        self._refresh()
+        return self._index.get(username)
+
+    def exists(self, username):
+        return self.get(username) is not None
+
+    def __len__(self):
+        self._refresh()
+        return len(self._index)
+
+    def add(self, username, hashed, role='user'):
+        if self.exists(username):
+            return False
+        self._append(username, hashed, role)
+        return True
+
+    def update_hash(self, username, new_hash):
+        record = self.get(username)
+        if record is None:
+            return False
+        self._append(username, new_hash, record[1])
+        stale = self._lines - len(self._index)
+        if stale >= MIN_STALE_FOR_COMPACTION and stale > len(self._index):
+            self.compact()
+        return True
+
+    def compact(self):
+        # Write one line per user to a temp file next to user.txt, fsync it,
+        # then atomically swap it in. A crash at any point leaves either the
+        # old file or the new one, never a mix.
+        self._refresh()
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.user_store-')
+        try:
+            if os.path.exists(self.path):
+                os.chmod(tmp_path, os.stat(self.path).st_mode & 0o777)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                for username, (hashed, role) in self._index.items():
+                    f.write(f"{username},{hashed},{role}\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if hasattr(os, 'O_DIRECTORY'):
+            dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        # Force a reload from the compacted file
+        self._index = None
+        self._refresh()
+
+
+# ---------------------------------------------------------------------------
+# Benchmark: python user_store.py [users]
+
+
+def _linear_lookup(path, username):
+    # What auth.py did before the store: scan the file on every call
+    with open(path, 'r') as f:
+        for line in f:
+            if line.split(',', 1)[0] == username:
+                return True
+    return False
+
+
+def _timed(label, func, count=1):
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    per_call = elapsed / count * 1e6
+    print(f"{label:<40} {elapsed * 1000:>10.1f} ms total {per_call:>12.2f} us/op")
+    return result
+
+
+def run_benchmark(users=1_000_000, lookups=100_000, scans=20):
+    # bcrypt-shaped dummy hash; hashing a million real passwords would take days
+    fake_hash = '$2b$12$' + 'x' * (BCRYPT_HASH_LENGTH - 7)
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'user.txt')
+        with open(path, 'w') as f:
+            for i in range(users):
+                f.write(f"user{i},{fake_hash},user\n")
+        size_mb = os.path.getsize(path) / 1e6
+        print(f"\nUser store benchmark: {users:,} users, {size_mb:.0f} MB user.txt")
+        print("-" * 80)
+
+        store = UserStore(path)
+        _timed("load index (first lookup)", lambda: store.exists('user0'))
+
+        names = [f"user{rng.randrange(users * 2)}" for _ in range(lookups)]
+        _timed(f"indexed lookups x{lookups:,}",
+               lambda: sum(store.exists(n) for n in names), lookups)
+        _timed(f"linear scans x{scans} (old auth.py)",
+               lambda: sum(_linear_lookup(path, n) for n in names[:scans]), scans)
+
+        new_names = [f"new{i}" for i in range(1000)]
+        _timed("register x1,000 (append + fsync)",
+               lambda: [store.add(n, fake_hash) for n in new_names], 1000)
+        _timed("rehash x1,000 (append + fsync)",
+               lambda: [store.update_hash(n, fake_hash) for n in new_names], 1000)
+        _timed("compact", store.compact)
+        print(f"{'users after compaction':<40} {len(store):>10,}")
+
+
+if __name__ == '__main__':
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
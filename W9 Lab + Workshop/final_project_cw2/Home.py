@@ -1,4 +1,7 @@
 import streamlit as st
+from app.data.cache import cache_stats
+from app.data.users import get_hash_cost_counts
+from app.services.hashing_service import hashing_stats
 from app.services.user_service import register_user, login_user
 
 st.set_page_config(
@@ -32,6 +35,42 @@ if st.session_state.logged_in:
         if st.button("⚙️ IT Operations", use_container_width=True, type="primary"):
             st.switch_page("pages/3_IT_Operations.py")
 
+    if st.session_state.role == "admin":
+        with st.expander("🔐 Password hashing"):
+            stats = hashing_stats()
+            col1, col2, col3 = st.columns(3)
+            col1.metric(
+                "bcrypt cost",
+                stats["rounds"],
+                help=f"Calibrated for ~{stats['target_ms']:.0f} ms per hash",
+            )
+            col2.metric("Hash latency p95", f"{stats['latency_p95_ms']:.0f} ms")
+            col3.metric(
+                "Rehashed on login",
+                f"{stats['rehashed_up']} ↑ / {stats['rehashed_down']} ↓",
+            )
+            st.caption("Stored hashes by cost factor")
+            st.dataframe(get_hash_cost_counts(), hide_index=True)
+
+        with st.expander("🗄️ Query cache"):
+            stats = cache_stats()
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Hit rate", f"{stats['hit_rate']:.0%}")
+            col2.metric("Entries", f"{stats['entries']:,}")
+            col3.metric("Memory", f"{stats['bytes'] / 1e6:.1f} MB")
+            st.caption(
+                f"{stats['hits']:,} hits, {stats['misses']:,} misses, "
+                f"{stats['evictions']:,} evictions, "
+                f"{stats['invalidations']:,} invalidations"
+            )
+            shared = stats["shared"]
+            if shared is not None:
+                st.caption(
+                    f"Shared ({shared['format']}): {shared['entries']:,} entries, "
+                    f"{shared['bytes'] / 1e6:.1f} MB, {shared['hits']:,} hits, "
+                    f"{shared['misses']:,} misses, {shared['evictions']:,} evictions"
+                )
+
     st.divider()
     if st.button("🚪 Logout", type="secondary"):
         st.session_state.logged_in = False
@@ -67,7 +106,9 @@ with tab_login:
             if not login_username or not login_password:
                 st.error("⚠️ Please fill in all fields")
             else:
-                success, message, role = login_user(login_username, login_password)
+                # bcrypt runs on the shared hashing service's bounded pool
+                with st.spinner("Checking credentials..."):
+                    success, message, role = login_user(login_username, login_password)
 
                 if success:
                     st.session_state.logged_in = True
@@ -118,7 +159,10 @@ with tab_register:
 
             else:
                 # Register user in database
-                success, message = register_user(new_username, new_password, role)
+                with st.spinner("Creating account..."):
+                    success, message, _ = register_user(
+                        new_username, new_password, role
+                    )
 
                 if success:
                     st.success(f"✅ {message}")
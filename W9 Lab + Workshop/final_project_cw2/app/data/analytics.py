@@ -0,0 +1,251 @@
+"""
+Time-to-resolve analytics for IT tickets.
+
+resolution_histogram counts resolved tickets per (column, value, bucket of
+minutes to resolve), where minutes is resolved_date - created_date rounded
+to the minute, and keeps each bucket's total minutes. Triggers on
+it_tickets keep it exact, so a ticket's resolution time is computed once,
+when it is resolved (or its dates or groups change), and never again.
+Tickets without a resolved_date, with an unparseable date or resolved
+before they were created are left out.
+
+Buckets are log-linear, as in an HDR histogram: durations under
+2**SIGNIFICANT_BITS minutes (about four hours) each get their own bucket,
+and longer ones share buckets 1/2**(SIGNIFICANT_BITS - 1) of their
+magnitude wide. The histogram therefore stays at a few thousand rows
+however many tickets there are. Means are exact; percentiles are read from
+the buckets with numpy and are within 0.8% of np.percentile over the raw
+durations (exact when each bucket holds a single duration, as with
+whole-day durations under six months). Every ticket counts once under each
+column, so the overall figures come from merging the first column's
+histograms.
+"""
+
+import numpy as np
+import pandas as pd
+
+from app.data.counters import NULL_VALUE, NULL_VALUE_SQL
+
+RESOLUTION_COLUMNS = ["priority", "category", "assigned_to"]
+# Output column -> quantile.
+PERCENTILES = {"median_hours": 0.50, "p90_hours": 0.90, "p99_hours": 0.99}
+SUMMARY_COLUMNS = ["dimension", "value", "tickets", "mean_hours", *PERCENTILES]
+# Dimension label for the overall row of the summary.
+OVERALL = "overall"
+# Bucket precision, and the bit length past which buckets stop widening
+# (2**26 minutes is over a century).
+SIGNIFICANT_BITS = 8
+MAX_BITS = 26
+
+
+def resolution_minutes_sql(row_alias=None):
+    """SQL for a ticket's minutes to resolve (NULL if not resolvable)."""
+    prefix = f"{row_alias}." if row_alias else ""
+    return (
+        f"CAST(ROUND((julianday({prefix}resolved_date) "
+        f"- julianday({prefix}created_date)) * 1440) AS INTEGER)"
+    )
+
+
+def bucket_sql(minutes):
+    """SQL for the histogram bucket (its lower bound) of an integer duration."""
+    cases = [f"WHEN {minutes} < {1 << SIGNIFICANT_BITS} THEN {minutes}"]
+    for bits in range(SIGNIFICANT_BITS + 1, MAX_BITS + 1):
+        step = 1 << (bits - SIGNIFICANT_BITS)
+        cases.append(f"WHEN {minutes} < {1 << bits} THEN {minutes} / {step} * {step}")
+    step = 1 << (MAX_BITS - SIGNIFICANT_BITS)
+    return f"CASE {' '.join(cases)} ELSE {minutes} / {step} * {step} END"
+
+
+def create_resolution_histogram_table(conn):
+    """Create the resolution_histogram table."""
+    cursor = conn.cursor()
+    create_table_sql = """
+    CREATE TABLE IF NOT EXISTS resolution_histogram (
+            dimension TEXT NOT NULL,
+            value TEXT NOT NULL,
+            bucket INTEGER NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            minutes INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (dimension, value, bucket)
+    ) WITHOUT ROWID;
+    """
+    cursor.execute(create_table_sql)
+
+
+def _row_bumps(row_alias, sign):
+    """Histogram updates for adding (sign=+1) or removing (sign=-1) one ticket."""
+    # The subquery computes the duration once for the whole CASE ladder
+    return "".join(
+        f"""
+        INSERT INTO resolution_histogram (dimension, value, bucket, count, minutes)
+        SELECT '{column}', IFNULL({row_alias}.{column}, {NULL_VALUE_SQL}),
+               {bucket_sql("m")}, {sign}, {sign} * m
+        FROM (SELECT {resolution_minutes_sql(row_alias)} AS m)
+        WHERE m >= 0
+        ON CONFLICT (dimension, value, bucket) DO UPDATE
+        SET count = count + excluded.count, minutes = minutes + excluded.minutes;
+        """
+        for column in RESOLUTION_COLUMNS
+    )
+
+
+def resolution_trigger_statements():
+    """CREATE TRIGGER statements that keep resolution_histogram exact."""
+    prefix = "trg_it_tickets_resolution"
+    watched = ", ".join(["created_date", "resolved_date"] + RESOLUTION_COLUMNS)
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {prefix}_insert
+        AFTER INSERT ON it_tickets
+        WHEN NEW.resolved_date IS NOT NULL
+        BEGIN {_row_bumps("NEW", 1)} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {prefix}_delete
+        AFTER DELETE ON it_tickets
+        WHEN OLD.resolved_date IS NOT NULL
+        BEGIN {_row_bumps("OLD", -1)} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {prefix}_update
+        AFTER UPDATE OF {watched} ON it_tickets
+        BEGIN {_row_bumps("OLD", -1)}{_row_bumps("NEW", 1)} END
+        """,
+    ]
+
+
+def create_resolution_triggers(conn):
+    for statement in resolution_trigger_statements():
+        conn.execute(statement)
+
+
+def compute_resolution_histogram(conn):
+    """Recount the histogram from it_tickets, as a DataFrame."""
+    columns = ", ".join(RESOLUTION_COLUMNS)
+    groups = " UNION ALL ".join(
+        f"""
+        SELECT '{column}' AS dimension, IFNULL({column}, {NULL_VALUE_SQL}) AS value,
+               bucket, COUNT(*) AS count, SUM(m) AS minutes
+        FROM bucketed
+        GROUP BY 2, 3
+        """
+        for column in RESOLUTION_COLUMNS
+    )
+    # Materialised so each duration is parsed once, not once per CASE
+    # branch and grouped column
+    sql = f"""
+        WITH durations AS MATERIALIZED (
+            SELECT {columns}, {resolution_minutes_sql()} AS m
+            FROM it_tickets
+            WHERE resolved_date IS NOT NULL
+        ),
+        bucketed AS MATERIALIZED (
+            SELECT {columns}, m, {bucket_sql("m")} AS bucket
+            FROM durations
+            WHERE m >= 0
+        )
+        {groups}
+    """
+    return pd.read_sql_query(sql, conn)
+
+
+def rebuild_resolution_histogram(conn):
+    """Recompute resolution_histogram from scratch. The caller commits."""
+    conn.execute("DELETE FROM resolution_histogram")
+    conn.executemany(
+        """
+        INSERT INTO resolution_histogram (dimension, value, bucket, count, minutes)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        compute_resolution_histogram(conn).itertuples(index=False),
+    )
+
+
+def has_resolution_histogram(conn):
+    """True once migration 8 has created resolution_histogram."""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' "
+        "AND name = 'resolution_histogram'"
+    ).fetchone()
+    return row is not None
+
+
+def read_resolution_histogram(conn):
+    return pd.read_sql_query(
+        """
+        SELECT dimension, value, bucket, count, minutes FROM resolution_histogram
+        WHERE count != 0
+        """,
+        conn,
+    )
+
+
+def histogram_percentiles(values, counts, quantiles):
+    """
+    np.percentile(raw, 100 * quantiles) where raw repeats each values[i]
+    counts[i] times, without materialising raw. values must be sorted.
+    """
+    cumulative = np.cumsum(counts)
+    positions = np.asarray(quantiles) * (cumulative[-1] - 1)
+    lower = np.floor(positions)
+    # The value at 0-based rank r is the first bucket whose cumulative
+    # count passes r
+    low = values[np.searchsorted(cumulative, lower, side="right")]
+    high = values[np.searchsorted(cumulative, np.ceil(positions), side="right")]
+    return low + (high - low) * (positions - lower)
+
+
+def summarize_resolution_histogram(histogram):
+    """
+    One row per dimension value plus an overall row: tickets, mean_hours,
+    median_hours, p90_hours and p99_hours. Values stored as NULL_VALUE come
+    back as None.
+    """
+    overall = (
+        histogram[histogram["dimension"] == RESOLUTION_COLUMNS[0]]
+        .groupby("bucket", as_index=False)[["count", "minutes"]]
+        .sum()
+        .assign(dimension=OVERALL, value=None)
+    )
+    histogram = pd.concat([overall, histogram], ignore_index=True)
+
+    rows = []
+    quantiles = list(PERCENTILES.values())
+    groups = histogram.sort_values("bucket").groupby(
+        ["dimension", "value"], sort=False, dropna=False
+    )
+    for (dimension, value), group in groups:
+        counts = group["count"].to_numpy()
+        minutes = group["minutes"].to_numpy(dtype=np.float64)
+        tickets = int(counts.sum())
+        if tickets <= 0:
+            continue
+        # Each bucket stands for its own mean duration
+        means = minutes[counts > 0] / counts[counts > 0]
+        percentiles = histogram_percentiles(means, counts[counts > 0], quantiles)
+        hours = np.concatenate([[minutes.sum() / tickets], percentiles]) / 60
+        value = None if value == NULL_VALUE else value
+        rows.append([dimension, value, tickets, *hours])
+
+    summary = pd.DataFrame(rows, columns=SUMMARY_COLUMNS)
+    # Overall first, then each column's values busiest first (ties by name)
+    order = {name: index for index, name in enumerate([OVERALL] + RESOLUTION_COLUMNS)}
+    summary["_order"] = summary["dimension"].map(order)
+    summary = summary.sort_values(
+        ["_order", "tickets", "value"], ascending=[True, False, True]
+    )
+    summary = summary.drop(columns="_order").reset_index(drop=True)
+    # Sorting turns the None values into NaN; turn them back
+    summary["value"] = summary["value"].astype(object)
+    summary.loc[summary["value"].isna(), "value"] = None
+    return summary
+
+
+def read_resolution_times(conn):
+    """Resolution-time summary, from the histogram when it exists."""
+    if has_resolution_histogram(conn):
+        histogram = read_resolution_histogram(conn)
+    else:
+        histogram = compute_resolution_histogram(conn)
+    return summarize_resolution_histogram(histogram)
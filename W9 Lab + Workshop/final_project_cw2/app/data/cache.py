@@ -0,0 +1,471 @@
+"""
+Result cache for the data layer.
+
+Every table has a generation counter, kept in table_generations and bumped
+by triggers on every insert, update and delete from any process.
+Functions decorated with @cached(table, ...) key their results by
+database, function, arguments and the current generation of each table
+they read, so a write makes all older results for that table unreachable
+at once and reads stay exactly consistent with writes. The database is
+identified by its resolved path and a random epoch stored alongside the
+generations, because generations start over whenever a database is
+recreated. @invalidates(table) also bumps
+a per-process counter, which covers databases created before the
+generations migration.
+
+Results live in two tiers: a size-bounded in-process LRU, and optionally a
+SharedCache directory that every Streamlit worker on the host reads from
+(set PLATFORM_SHARED_CACHE_DIR). DataFrames are stored there as Arrow IPC
+files when pyarrow is installed, and everything else is pickled. Reading
+an Arrow entry still copies it into a new DataFrame, so a shared hit saves
+the query, not the deserialisation. Unpickling can run arbitrary code, so
+pickled entries are only used when the directory is private to the
+current user. Shared entries are evicted by total size and age.
+
+DataFrames come back as shallow copies (callers may add columns, but must
+not modify values in place); dicts come back as deep copies.
+"""
+
+import copy
+import hashlib
+import os
+import pickle
+import secrets
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+import pandas as pd
+
+from app.data.db import get_pool
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_SHARED_MAX_BYTES = 1024 * 1024 * 1024
+DEFAULT_SHARED_MAX_AGE = 3600.0
+SHARED_CACHE_DIR = os.environ.get("PLATFORM_SHARED_CACHE_DIR")
+
+# Tables whose writes bump table_generations (see migration 5).
+GENERATION_TABLES = ["cyber_incidents", "it_tickets", "datasets_metadata", "users"]
+# table_generations row holding the database's random epoch (migration 12).
+DATABASE_EPOCH = "_epoch"
+
+
+def _freeze(value):
+    """Hashable stand-in for list/dict arguments such as filter selections."""
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = sorted(value, key=repr) if isinstance(value, (set, frozenset)) else value
+        return (type(value).__name__, tuple(_freeze(item) for item in items))
+    if isinstance(value, dict):
+        return ("dict", tuple(sorted((k, _freeze(v)) for k, v in value.items())))
+    return value
+
+
+def result_size(value):
+    """Approximate bytes held by a cached result."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(result_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            result_size(k) + result_size(v) for k, v in value.items()
+        )
+    return sys.getsizeof(value)
+
+
+def copy_result(value):
+    if isinstance(value, pd.DataFrame):
+        return value.copy(deep=False)
+    if isinstance(value, tuple):
+        return tuple(copy_result(item) for item in value)
+    if isinstance(value, (list, dict)):
+        return copy.deepcopy(value)
+    return value
+
+
+def create_table_generations_table(conn):
+    """Create the table of per-table write generations."""
+    cursor = conn.cursor()
+    create_table_sql = """
+    CREATE TABLE IF NOT EXISTS table_generations (
+            table_name TEXT PRIMARY KEY,
+            generation INTEGER NOT NULL DEFAULT 0
+    );
+    """
+    cursor.execute(create_table_sql)
+
+
+def generation_trigger_statements(table_name):
+    """Triggers bumping table_generations on every write to table_name."""
+    bump = f"""
+        INSERT INTO table_generations (table_name, generation)
+        VALUES ('{table_name}', 1)
+        ON CONFLICT (table_name) DO UPDATE SET generation = generation + 1;
+    """
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table_name}_generation_{event.lower()}
+        AFTER {event} ON {table_name}
+        BEGIN {bump} END
+        """
+        for event in ("INSERT", "UPDATE", "DELETE")
+    ]
+
+
+def create_generation_triggers(conn):
+    for table_name in GENERATION_TABLES:
+        for statement in generation_trigger_statements(table_name):
+            conn.execute(statement)
+
+
+def bump_table_generation(conn, table_name):
+    """The generation triggers' bump, for writes made while they were dropped."""
+    conn.execute(
+        """
+        INSERT INTO table_generations (table_name, generation) VALUES (?, 1)
+        ON CONFLICT (table_name) DO UPDATE SET generation = generation + 1
+        """,
+        (table_name,),
+    )
+
+
+def seed_database_epoch(conn):
+    """Store a random epoch telling this database apart from any other."""
+    conn.execute(
+        "INSERT OR IGNORE INTO table_generations (table_name, generation) "
+        "VALUES (?, ?)",
+        (DATABASE_EPOCH, secrets.randbits(63)),
+    )
+
+
+def read_generations():
+    """
+    Return (database, {table: generation}) for the pooled database.
+
+    database is (resolved path, epoch); the epoch is None before migration
+    12 and the generations are None before migration 5.
+    """
+    pool = get_pool()
+    with pool.connection() as conn:
+        try:
+            generations = dict(
+                conn.execute("SELECT table_name, generation FROM table_generations")
+            )
+        except sqlite3.OperationalError:
+            generations = None
+    epoch = generations.pop(DATABASE_EPOCH, None) if generations is not None else None
+    return (str(pool.db_path.resolve()), epoch), generations
+
+
+class QueryCache:
+    """LRU of query results bounded by entry count and total bytes."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._generations = {}
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def generation(self, table_name):
+        with self._lock:
+            return self._generations.get(table_name, 0)
+
+    def bump(self, table_name):
+        with self._lock:
+            self._generations[table_name] = self._generations.get(table_name, 0) + 1
+            self._stats["invalidations"] += 1
+
+    def get(self, key):
+        """Return (True, value) on a hit, (False, None) on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return True, entry[0]
+
+    def put(self, key, value):
+        size = result_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Hit/miss/eviction counters plus current size and generations."""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["entries"] = len(self._entries)
+            snapshot["bytes"] = self._bytes
+            snapshot["generations"] = dict(self._generations)
+        lookups = snapshot["hits"] + snapshot["misses"]
+        snapshot["hit_rate"] = snapshot["hits"] / lookups if lookups else 0.0
+        return snapshot
+
+
+def is_private_directory(directory):
+    """True if only the current user can write to directory."""
+    if not hasattr(os, "getuid"):
+        # No POSIX owners or mode bits to check (Windows)
+        return True
+    stat = os.stat(directory)
+    return stat.st_uid == os.getuid() and not stat.st_mode & 0o022
+
+
+class SharedCache:
+    """
+    Query results on disk, shared by every process using the same directory.
+
+    Each entry is one file named after a hash of its key, written to a temp
+    file and renamed into place, so readers never see partial entries. A
+    read refreshes the file's mtime, making eviction least-recently-used
+    across processes. The directory is created 0700; if it already exists
+    and other users can write to it, only Arrow entries are shared.
+    """
+
+    def __init__(
+        self,
+        directory,
+        max_bytes=DEFAULT_SHARED_MAX_BYTES,
+        max_age=DEFAULT_SHARED_MAX_AGE,
+    ):
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        self.allow_pickle = is_private_directory(self.directory)
+        if not self.allow_pickle:
+            print(
+                f"Warning: {self.directory} is writable by other users; "
+                "pickled results will not be shared."
+            )
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    def _paths(self, key):
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, digest)
+        return base + ".arrow", base + ".pkl"
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, key):
+        """Return (True, value) on a hit, (False, None) on a miss."""
+        for path in self._paths(key):
+            try:
+                if path.endswith(".arrow"):
+                    if pa is None:
+                        continue
+                    with pa.memory_map(path) as source:
+                        value = pa.ipc.open_file(source).read_all().to_pandas()
+                else:
+                    if not self.allow_pickle:
+                        continue
+                    with open(path, "rb") as f:
+                        value = pickle.load(f)
+            except FileNotFoundError:
+                continue
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+            self._count("hits")
+            return True, value
+        self._count("misses")
+        return False, None
+
+    def put(self, key, value):
+        arrow_path, pickle_path = self._paths(key)
+        use_arrow = pa is not None and isinstance(value, pd.DataFrame)
+        if not use_arrow and not self.allow_pickle:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                if use_arrow:
+                    table = pa.Table.from_pandas(value)
+                    with pa.ipc.new_file(f, table.schema) as writer:
+                        writer.write_table(table)
+                    path = arrow_path
+                else:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    path = pickle_path
+            os.replace(tmp_path, path)
+        except Exception as e:
+            # Unserialisable results simply aren't shared
+            print(f"Error writing shared cache entry: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._count("writes")
+        self.sweep()
+
+    def sweep(self):
+        """Delete entries older than max_age, then the least recently used
+        until the directory is under max_bytes."""
+        now = time.time()
+        entries, total = [], 0
+        for entry in os.scandir(self.directory):
+            if not entry.is_file():
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            # Orphaned temp files from crashed writers count as old entries
+            if now - stat.st_mtime > self.max_age:
+                self._remove(entry.path)
+                continue
+            if entry.name.startswith(".tmp-"):
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        self._count("evictions")
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+        sizes = [
+            entry.stat().st_size
+            for entry in os.scandir(self.directory)
+            if entry.is_file() and not entry.name.startswith(".tmp-")
+        ]
+        snapshot["entries"] = len(sizes)
+        snapshot["bytes"] = sum(sizes)
+        snapshot["format"] = "arrow" if pa is not None else "pickle"
+        snapshot["pickle"] = self.allow_pickle
+        return snapshot
+
+
+_cache = QueryCache()
+_shared = SharedCache(SHARED_CACHE_DIR) if SHARED_CACHE_DIR else None
+
+
+def get_cache():
+    return _cache
+
+
+def configure_cache(**options):
+    """Replace the in-process cache (e.g. to change its bounds)."""
+    global _cache
+    _cache = QueryCache(**options)
+    return _cache
+
+
+def configure_shared_cache(directory=None, **options):
+    """Point the shared tier at `directory`, or turn it off with None."""
+    global _shared
+    _shared = SharedCache(directory, **options) if directory else None
+    return _shared
+
+
+def cache_stats():
+    stats = _cache.stats()
+    stats["shared"] = _shared.stats() if _shared is not None else None
+    return stats
+
+
+def bump_generation(*table_names):
+    """Invalidate cached results for tables written outside @invalidates."""
+    for table_name in table_names:
+        _cache.bump(table_name)
+
+
+def cached(*table_names):
+    """Cache a read function's results, keyed by the generations of table_names."""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            cache, shared = _cache, _shared
+            database, db_generations = read_generations()
+            if db_generations is not None:
+                db_generations = tuple(db_generations.get(n, 0) for n in table_names)
+            # Only the epoch and database generations mean the same thing in
+            # every process, so they alone key the shared tier.
+            if database[1] is None or db_generations is None:
+                shared = None
+            shared_key = (
+                database,
+                func.__module__,
+                func.__qualname__,
+                _freeze(args),
+                _freeze(kwargs),
+                db_generations,
+            )
+            key = shared_key + (tuple(cache.generation(n) for n in table_names),)
+
+            hit, value = cache.get(key)
+            if not hit and shared is not None:
+                hit, value = shared.get(shared_key)
+                if hit:
+                    cache.put(key, value)
+            if not hit:
+                value = func(*args, **kwargs)
+                cache.put(key, value)
+                if shared is not None:
+                    shared.put(shared_key, value)
+            return copy_result(value)
+
+        return wrapper
+
+    return decorator
+
+
+def invalidates(*table_names):
+    """Bump the generations of table_names after the write function returns."""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            result = func(*args, **kwargs)
+            bump_generation(*table_names)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,231 @@
+"""
+Materialized KPI counters for the dashboard metric rows.
+
+kpi_counters holds one row per (table, dimension, value) with a row count,
+plus running sums for numeric columns. Triggers on the base tables keep it
+exact on every insert, update and delete, so reading the dashboard KPIs
+costs O(number of groups) however large the tables get.
+
+NULLs cannot be part of the primary key, so they are stored as the
+one-byte BLOB X'00' (NULL_VALUE). The base columns only ever hold text,
+and a BLOB never compares equal to text, so NULL and a real '' stay apart.
+Readers map NULL_VALUE back to None.
+"""
+
+TOTAL_DIMENSION = "__total__"
+SUM_DIMENSION = "__sum__"
+NULL_VALUE = b"\x00"
+NULL_VALUE_SQL = "X'00'"
+
+COUNTER_DIMENSIONS = {
+    "cyber_incidents": ["severity", "status"],
+    "it_tickets": ["priority", "status", "category"],
+    "datasets_metadata": ["category"],
+}
+
+COUNTER_SUMS = {
+    "datasets_metadata": ["record_count", "file_size_mb"],
+}
+
+
+def create_kpi_counters_table(conn):
+    """Create the kpi_counters table."""
+    cursor = conn.cursor()
+    create_table_sql = """
+    CREATE TABLE IF NOT EXISTS kpi_counters (
+            table_name TEXT NOT NULL,
+            dimension TEXT NOT NULL,
+            value TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            amount REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (table_name, dimension, value)
+    ) WITHOUT ROWID;
+    """
+    cursor.execute(create_table_sql)
+
+
+def _bump_sql(table_name, dimension, value_sql, count_sql, amount_sql="0"):
+    return f"""
+        INSERT INTO kpi_counters (table_name, dimension, value, count, amount)
+        VALUES ('{table_name}', '{dimension}', {value_sql}, {count_sql}, {amount_sql})
+        ON CONFLICT (table_name, dimension, value) DO UPDATE
+        SET count = count + excluded.count, amount = amount + excluded.amount;
+    """
+
+
+def _row_bumps(table_name, row_alias, sign):
+    """Counter updates for adding (sign=+1) or removing (sign=-1) one row."""
+    statements = [_bump_sql(table_name, TOTAL_DIMENSION, "''", str(sign))]
+    for column in COUNTER_DIMENSIONS[table_name]:
+        statements.append(
+            _bump_sql(
+                table_name,
+                column,
+                f"IFNULL({row_alias}.{column}, {NULL_VALUE_SQL})",
+                str(sign),
+            )
+        )
+    for column in COUNTER_SUMS.get(table_name, []):
+        statements.append(
+            _bump_sql(
+                table_name,
+                SUM_DIMENSION,
+                f"'{column}'",
+                "0",
+                f"{sign} * IFNULL({row_alias}.{column}, 0)",
+            )
+        )
+    return statements
+
+
+def counter_trigger_statements(table_name):
+    """CREATE TRIGGER statements that keep kpi_counters exact for a table."""
+    prefix = f"trg_{table_name}_counters"
+    watched = COUNTER_DIMENSIONS[table_name] + COUNTER_SUMS.get(table_name, [])
+    insert_body = "".join(_row_bumps(table_name, "NEW", 1))
+    delete_body = "".join(_row_bumps(table_name, "OLD", -1))
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {prefix}_insert
+        AFTER INSERT ON {table_name}
+        BEGIN {insert_body} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {prefix}_delete
+        AFTER DELETE ON {table_name}
+        BEGIN {delete_body} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {prefix}_update
+        AFTER UPDATE OF {", ".join(watched)} ON {table_name}
+        BEGIN {delete_body}{insert_body} END
+        """,
+    ]
+
+
+def create_counter_triggers(conn):
+    for table_name in COUNTER_DIMENSIONS:
+        for statement in counter_trigger_statements(table_name):
+            conn.execute(statement)
+
+
+def _expected_counters(conn, table_name):
+    """Recount a table from scratch: {(dimension, value): (count, amount)}."""
+    expected = {}
+    total = conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+    expected[(TOTAL_DIMENSION, "")] = (total, 0.0)
+
+    for column in COUNTER_DIMENSIONS[table_name]:
+        rows = conn.execute(
+            f"""
+            SELECT IFNULL({column}, {NULL_VALUE_SQL}), COUNT(*)
+            FROM {table_name}
+            GROUP BY 1
+            """
+        ).fetchall()
+        for value, count in rows:
+            expected[(column, value)] = (count, 0.0)
+
+    for column in COUNTER_SUMS.get(table_name, []):
+        amount = conn.execute(
+            f"SELECT IFNULL(SUM({column}), 0) FROM {table_name}"
+        ).fetchone()[0]
+        expected[(SUM_DIMENSION, column)] = (0, float(amount))
+
+    return expected
+
+
+def _stored_counters(conn, table_name):
+    rows = conn.execute(
+        """
+        SELECT dimension, value, count, amount
+        FROM kpi_counters
+        WHERE table_name = ?
+        """,
+        (table_name,),
+    ).fetchall()
+    return {
+        (dimension, value): (count, amount)
+        for dimension, value, count, amount in rows
+        # Groups that emptied out stay behind as zero rows; ignore them.
+        if count != 0 or amount != 0 or dimension == TOTAL_DIMENSION
+    }
+
+
+def rebuild_kpi_counters(conn, table_names=None):
+    """Recompute the counters for the given tables (default: all) from scratch."""
+    for table_name in table_names or COUNTER_DIMENSIONS:
+        conn.execute("DELETE FROM kpi_counters WHERE table_name = ?", (table_name,))
+        conn.executemany(
+            """
+            INSERT INTO kpi_counters (table_name, dimension, value, count, amount)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [
+                (table_name, dimension, value, count, amount)
+                for (dimension, value), (count, amount) in _expected_counters(
+                    conn, table_name
+                ).items()
+            ],
+        )
+
+
+def verify_kpi_counters(conn, repair=False, tolerance=1e-6):
+    """
+    Compare kpi_counters against a fresh recount of the base tables.
+
+    Returns a list of (table, dimension, value, stored, expected) tuples for
+    every counter that disagrees; an empty list means they are consistent.
+    With repair=True the mismatched tables are rebuilt and committed.
+    """
+    mismatches = []
+    for table_name in COUNTER_DIMENSIONS:
+        expected = _expected_counters(conn, table_name)
+        stored = _stored_counters(conn, table_name)
+        for key in sorted(set(expected) | set(stored), key=str):
+            want = expected.get(key, (0, 0.0))
+            have = stored.get(key, (0, 0.0))
+            if want[0] != have[0] or abs(want[1] - have[1]) > tolerance * max(
+                1.0, abs(want[1])
+            ):
+                mismatches.append((table_name, key[0], key[1], have, want))
+
+    if repair and mismatches:
+        rebuild_kpi_counters(conn, sorted({m[0] for m in mismatches}))
+        conn.commit()
+    return mismatches
+
+
+def has_kpi_counters(conn):
+    """True once migration 3 has created kpi_counters in this database."""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'kpi_counters'"
+    ).fetchone()
+    return row is not None
+
+
+def read_counters(conn, table_name):
+    """
+    Return (total, {dimension: {value: count}}, {column: sum}) for a table.
+
+    Values stored as NULL_VALUE come back as None, and zero counts are dropped.
+    """
+    rows = conn.execute(
+        """
+        SELECT dimension, value, count, amount
+        FROM kpi_counters
+        WHERE table_name = ?
+        """,
+        (table_name,),
+    ).fetchall()
+
+    counts = {column: {} for column in COUNTER_DIMENSIONS[table_name]}
+    total, sums = 0, {}
+    for dimension, value, count, amount in rows:
+        if dimension == TOTAL_DIMENSION:
+            total = count
+        elif dimension == SUM_DIMENSION:
+            sums[value] = amount
+        elif count > 0:
+            counts[dimension][None if value == NULL_VALUE else value] = count
+    return total, counts, sums
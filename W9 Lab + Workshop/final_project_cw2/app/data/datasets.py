@@ -1,101 +1,137 @@
 import pandas as pd
-from app.data.db import connect_database
+from app.data.cache import cached, invalidates
+from app.data.db import borrow_connection, build_where_clause, retry_on_busy
+from app.data.frames import read_table_frame
+from app.data.statistics import read_dataset_statistics
 
 
+@invalidates("datasets_metadata")
+@retry_on_busy
 def insert_dataset(
     dataset_name, category, source, last_updated, record_count, file_size_mb
 ):
-    conn = connect_database()
-    cursor = conn.cursor()
-
-    cursor.execute(
-        """
-        INSERT INTO datasets_metadata
-        (dataset_name, category, source, last_updated, record_count, file_size_mb)
-        VALUES (?, ?, ?, ?, ?, ?)
-        """,
-        (dataset_name, category, source, last_updated, record_count, file_size_mb),
-    )
-    conn.commit()
-    dataset_id = cursor.lastrowid
-    conn.close()
+    with borrow_connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute(
+            """
+            INSERT INTO datasets_metadata
+            (dataset_name, category, source, last_updated, record_count, file_size_mb)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (dataset_name, category, source, last_updated, record_count, file_size_mb),
+        )
+        conn.commit()
+        dataset_id = cursor.lastrowid
     return dataset_id
 
 
-def get_all_datasets():
-    conn = connect_database()
-    try:
-        df = pd.read_sql_query("SELECT * FROM datasets_metadata", conn)
-    finally:
-        conn.close()
-    return df
+@cached("datasets_metadata")
+def get_all_datasets(columns=None, typed=False):
+    """All datasets; see get_all_incidents for the options."""
+    with borrow_connection() as conn:
+        return read_table_frame(conn, "datasets_metadata", columns, typed)
 
 
-def update_dataset_record_count(id, new_count):
-    conn = connect_database()
-    cursor = conn.cursor()
-
-    cursor.execute(
-        """
-        UPDATE datasets_metadata
-        SET record_count = ?
-        WHERE id = ?
-        """,
-        (new_count, id),
+def _dataset_filters(categories=None, min_size=None):
+    return build_where_clause({"category": categories}, {"file_size_mb": min_size})
+
+
+@cached("datasets_metadata")
+def query_datasets(categories=None, min_size=None, limit=25, offset=0):
+    """One page of datasets matching the filters, in insertion order."""
+    where, params = _dataset_filters(categories, min_size)
+    with borrow_connection() as conn:
+        return pd.read_sql_query(
+            f"SELECT * FROM datasets_metadata{where} ORDER BY id LIMIT ? OFFSET ?",
+            conn,
+            params=params + [limit, offset],
+        )
+
+
+@cached("datasets_metadata")
+def count_datasets(categories=None, min_size=None):
+    """Number of datasets matching the filters."""
+    where, params = _dataset_filters(categories, min_size)
+    with borrow_connection() as conn:
+        return conn.execute(
+            f"SELECT COUNT(*) FROM datasets_metadata{where}", params
+        ).fetchone()[0]
+
+
+@cached("datasets_metadata")
+def aggregate_datasets_by(
+    column, categories=None, min_size=None, measure="COUNT(*)", limit=None
+):
+    """
+    Filtered aggregate grouped by `column`, largest first, as a DataFrame
+    with columns [column, "value"]. `measure` is COUNT(*) or SUM(file_size_mb).
+    """
+    if column not in ("category", "source"):
+        raise ValueError(f"Cannot group datasets by {column!r}")
+    if measure not in ("COUNT(*)", "SUM(file_size_mb)"):
+        raise ValueError(f"Unsupported dataset measure {measure!r}")
+    where, params = _dataset_filters(categories, min_size)
+    sql = (
+        f"SELECT {column}, {measure} AS value FROM datasets_metadata{where} "
+        f"GROUP BY {column} ORDER BY value DESC"
     )
-    conn.commit()
-    rows_updated = cursor.rowcount
-    conn.close()
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    with borrow_connection() as conn:
+        return pd.read_sql_query(sql, conn, params=params)
+
+
+@cached("datasets_metadata")
+def get_dataset_categories():
+    """Distinct dataset categories, read from the KPI counters."""
+    with borrow_connection() as conn:
+        by_category = read_dataset_statistics(conn)["by_category"]
+    return [item["category"] for item in by_category if item["category"] is not None]
+
+
+@invalidates("datasets_metadata")
+@retry_on_busy
+def update_dataset_record_count(id, new_count):
+    with borrow_connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute(
+            """
+            UPDATE datasets_metadata
+            SET record_count = ?
+            WHERE id = ?
+            """,
+            (new_count, id),
+        )
+        conn.commit()
+        rows_updated = cursor.rowcount
     return rows_updated
 
 
+@invalidates("datasets_metadata")
+@retry_on_busy
 def delete_dataset(id):
-    conn = connect_database()
-    cursor = conn.cursor()
+    with borrow_connection() as conn:
+        cursor = conn.cursor()
 
-    cursor.execute("DELETE FROM datasets_metadata WHERE id = ?", (id,))
-    conn.commit()
-    rows_deleted = cursor.rowcount
-    conn.close()
+        cursor.execute("DELETE FROM datasets_metadata WHERE id = ?", (id,))
+        conn.commit()
+        rows_deleted = cursor.rowcount
     return rows_deleted > 0
 
 
+@cached("datasets_metadata")
+def _dataset_statistics():
+    with borrow_connection() as conn:
+        return read_dataset_statistics(conn)
+
+
 def get_dataset_statistics():
     """Calculates and returns key metrics for the Datasets dashboard."""
-    conn = connect_database()
     try:
-        total_datasets_df = pd.read_sql_query(
-            "SELECT COUNT(id) FROM datasets_metadata", conn
-        )
-        total_datasets = (
-            total_datasets_df.iloc[0, 0] if not total_datasets_df.empty else 0
-        )
-
-        total_records_df = pd.read_sql_query(
-            "SELECT SUM(record_count) FROM datasets_metadata", conn
-        )
-        total_records = total_records_df.iloc[0, 0] if not total_records_df.empty else 0
-        total_records = int(total_records) if total_records is not None else 0
-
-        total_size_df = pd.read_sql_query(
-            "SELECT SUM(file_size_mb) FROM datasets_metadata", conn
-        )
-        total_size = total_size_df.iloc[0, 0] if not total_size_df.empty else 0
-        total_size_mb = round(float(total_size) if total_size is not None else 0.0, 1)
-
-        category_counts_df = pd.read_sql_query(
-            "SELECT category, COUNT(*) as count FROM datasets_metadata GROUP BY category",
-            conn,
-        )
-        by_category = category_counts_df.to_dict("records")
-
-        return {
-            "total": int(total_datasets),
-            "total_records": total_records,
-            "total_size_mb": total_size_mb,
-            "by_category": by_category,
-        }
-
+        return _dataset_statistics()
     except Exception as e:
         print(f"Error calculating dataset statistics: {e}")
         return {
@@ -104,5 +140,3 @@ def get_dataset_statistics():
             "total_size_mb": 0.0,
             "by_category": [],
         }
-    finally:
-        conn.close()
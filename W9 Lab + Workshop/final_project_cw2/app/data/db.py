@@ -1,31 +1,425 @@
+import base64
+import json
+import os
+import random
 import sqlite3
+import threading
+import time
 import pandas as pd
+from contextlib import contextmanager
+from functools import wraps
 from pathlib import Path
 
 DATA_DIR = Path("DATA")
 DB_PATH = DATA_DIR / "intelligence_platform.db"
 
+DEFAULT_POOL_SIZE = 5
+DEFAULT_POOL_TIMEOUT = 30.0
+# Idle connections older than this are pinged before being handed out again.
+HEALTH_CHECK_INTERVAL = 30.0
 
-def connect_database(db_path=DB_PATH):
+# Opt-in profile for concurrent use: WAL lets dashboards keep reading while
+# analysts write, and busy_timeout makes writers queue instead of failing.
+# Enable with configure_pool(performance=True) or PLATFORM_DB_PROFILE=performance.
+PERFORMANCE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,  # negative means KiB, so 64 MB
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,
+}
+PERFORMANCE_PROFILE = os.environ.get("PLATFORM_DB_PROFILE", "") == "performance"
+
+BUSY_RETRIES = 5
+BUSY_BASE_DELAY = 0.05
+
+
+def apply_performance_profile(conn, pragmas=PERFORMANCE_PRAGMAS):
+    """Apply the tuned PRAGMAs to an open connection."""
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+
+def connect_database(db_path=DB_PATH, performance=PERFORMANCE_PROFILE):
     DATA_DIR.mkdir(parents=True, exist_ok=True)
 
     conn = sqlite3.connect(str(db_path))
 
     conn.execute("PRAGMA foreign_keys = ON")
+    if performance:
+        apply_performance_profile(conn)
 
     return conn
 
 
-def load_csv_to_table(conn, csv_path, table_name):
-    path = Path(csv_path)
-    if not path.exists():
-        print(f"Warning: {csv_path} not found.")
-        return 0
+def is_busy_error(error):
+    """True for the 'database is locked/busy' errors worth retrying."""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+def retry_on_busy(func=None, *, retries=BUSY_RETRIES, base_delay=BUSY_BASE_DELAY):
+    """
+    Retry a write function when SQLite reports the database as busy.
+
+    Waits grow exponentially with a little jitter so competing writers do
+    not retry in lock-step. Usable as `@retry_on_busy` or with arguments.
+    """
+
+    def decorator(write_func):
+        @wraps(write_func)
+        def wrapper(*args, **kwargs):
+            for attempt in range(retries + 1):
+                try:
+                    return write_func(*args, **kwargs)
+                except sqlite3.OperationalError as e:
+                    if not is_busy_error(e) or attempt == retries:
+                        raise
+                    delay = base_delay * (2**attempt)
+                    time.sleep(delay + random.uniform(0, delay))
+
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of SQLite connections for one database file.
+
+    Connections are opened lazily up to `size` and handed out with the
+    `connection()` context manager. A thread that borrows again while it
+    already holds a connection gets the same one back, so nested data-layer
+    calls never deadlock on the pool or open a second connection.
+    """
+
+    def __init__(
+        self,
+        db_path=DB_PATH,
+        size=DEFAULT_POOL_SIZE,
+        timeout=DEFAULT_POOL_TIMEOUT,
+        health_check_interval=HEALTH_CHECK_INTERVAL,
+        performance=PERFORMANCE_PROFILE,
+    ):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1.")
+        self.db_path = Path(db_path)
+        self.size = size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.performance = performance
+
+        self._idle = []  # (connection, released_at) pairs, most recent last
+        self._open_count = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._stats = {
+            "opened": 0,
+            "closed": 0,
+            "borrowed": 0,
+            "reused": 0,
+            "waits": 0,
+            "wait_seconds": 0.0,
+            "health_failures": 0,
+        }
+
+    def _open_connection(self):
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Connections move between threads, but only ever one holder at a time.
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        conn.execute("PRAGMA foreign_keys = ON")
+        if self.performance:
+            apply_performance_profile(conn)
+        return conn
+
+    def _is_healthy(self, conn):
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._cond:
+            self._open_count -= 1
+            self._stats["closed"] += 1
+            self._cond.notify()
+
+    def _acquire(self):
+        deadline = time.monotonic() + self.timeout
+        waited = False
+        wait_started = None
+
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("Connection pool has been closed.")
+
+                while not self._idle and self._open_count >= self.size:
+                    if not waited:
+                        waited = True
+                        wait_started = time.monotonic()
+                        self._stats["waits"] += 1
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(
+                            f"Timed out after {self.timeout}s waiting for a "
+                            f"connection to {self.db_path}"
+                        )
+                    self._cond.wait(remaining)
+
+                if waited:
+                    now = time.monotonic()
+                    self._stats["wait_seconds"] += now - wait_started
+                    wait_started = now
+
+                if self._idle:
+                    conn, released_at = self._idle.pop()
+                else:
+                    conn, released_at = None, None
+                    self._open_count += 1
+                    self._stats["opened"] += 1
+
+            if conn is None:
+                try:
+                    return self._open_connection()
+                except Exception:
+                    with self._cond:
+                        self._open_count -= 1
+                        self._stats["opened"] -= 1
+                        self._cond.notify()
+                    raise
+
+            stale = time.monotonic() - released_at >= self.health_check_interval
+            if not stale or self._is_healthy(conn):
+                return conn
+
+            with self._cond:
+                self._stats["health_failures"] += 1
+            self._discard(conn)
+
+    def _release(self, conn):
+        try:
+            # Anything the caller left uncommitted is dropped, as close() would.
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+
+        with self._cond:
+            if self._closed:
+                self._open_count -= 1
+                self._stats["closed"] += 1
+                conn.close()
+                return
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a `with` block."""
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            with self._cond:
+                self._stats["borrowed"] += 1
+                self._stats["reused"] += 1
+            yield held
+            return
+
+        conn = self._acquire()
+        with self._cond:
+            self._stats["borrowed"] += 1
+        self._local.conn = conn
+        try:
+            yield conn
+        except BaseException:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                pass
+            raise
+        finally:
+            self._local.conn = None
+            self._release(conn)
+
+    def stats(self):
+        """Snapshot of the pool counters plus current open/idle sizes."""
+        with self._cond:
+            snapshot = dict(self._stats)
+            snapshot["open"] = self._open_count
+            snapshot["idle"] = len(self._idle)
+            snapshot["size"] = self.size
+        return snapshot
+
+    def close_all(self):
+        """Close every idle connection and refuse further borrows."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open_count -= len(idle)
+            self._stats["closed"] += len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            conn.close()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path=DB_PATH):
+    """Return the shared pool for `db_path`, creating it on first use."""
+    key = str(Path(db_path))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(db_path)
+            _pools[key] = pool
+        return pool
+
+
+def configure_pool(db_path=DB_PATH, **options):
+    """Replace the shared pool for `db_path` with one built from `options`."""
+    key = str(Path(db_path))
+    with _pools_lock:
+        old = _pools.get(key)
+        pool = ConnectionPool(db_path, **options)
+        _pools[key] = pool
+    if old is not None:
+        old.close_all()
+    return pool
+
+
+def borrow_connection(db_path=DB_PATH):
+    """Shortcut for `get_pool(db_path).connection()`."""
+    return get_pool(db_path).connection()
+
+
+def pool_stats(db_path=DB_PATH):
+    return get_pool(db_path).stats()
+
+
+def build_where_clause(any_of=None, at_least=None, below=None):
+    """
+    Build a parameterised WHERE clause for the dashboard filters.
+
+    any_of maps column -> list of accepted values (an empty list matches
+    nothing, like Series.isin([])); at_least maps column -> minimum value;
+    below maps column -> exclusive upper bound. Columns set to None are not
+    filtered. Column names must come from code, never from user input.
+    Returns (sql, params); sql is "" with no filters.
+    """
+    conditions, params = [], []
+    for column, values in (any_of or {}).items():
+        if values is None:
+            continue
+        values = list(values)
+        if not values:
+            conditions.append("0")
+            continue
+        conditions.append(f"{column} IN ({', '.join('?' * len(values))})")
+        params.extend(values)
+    for column, minimum in (at_least or {}).items():
+        if minimum is None:
+            continue
+        conditions.append(f"{column} >= ?")
+        params.append(minimum)
+    for column, bound in (below or {}).items():
+        if bound is None:
+            continue
+        conditions.append(f"{column} < ?")
+        params.append(bound)
+
+    if not conditions:
+        return "", params
+    return " WHERE " + " AND ".join(conditions), params
+
+
+def encode_cursor(last_id):
+    """Opaque, URL-safe page cursor for keyset pagination."""
+    payload = json.dumps({"after": int(last_id)}).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """Return the last-seen id stored in a cursor (None for the first page)."""
+    if not cursor:
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return int(payload["after"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid page cursor: {cursor!r}") from e
+
+
+def fetch_keyset_page(conn, table_name, any_of, after_id, page_size, columns="*"):
+    """
+    Fetch one page of `table_name` ordered by id DESC, starting below after_id.
+
+    Single-value filters are served from their index in id order. Filters
+    with several values would make SQLite merge and sort every match, so
+    those walk the primary key instead and stop after page_size rows, which
+    keeps the cost per page flat however deep the cursor is.
+    Returns (DataFrame, next_cursor); next_cursor is None on the last page.
+    """
+    where, params = build_where_clause(any_of, below={"id": after_id})
+    multi_valued = any(
+        values is not None and len(values) > 1 for values in (any_of or {}).values()
+    )
+    hint = " NOT INDEXED" if multi_valued else ""
+    df = pd.read_sql_query(
+        f"SELECT {columns} FROM {table_name}{hint}{where} ORDER BY id DESC LIMIT ?",
+        conn,
+        params=params + [page_size + 1],
+    )
+
+    next_cursor = None
+    if len(df) > page_size:
+        df = df.iloc[:page_size]
+        next_cursor = encode_cursor(df["id"].iloc[-1])
+    return df, next_cursor
+
+
+# CSV exports use a few column names that differ from the table schema.
+CSV_COLUMN_ALIASES = {
+    "cyber_incidents": {"date": "date_reported"},
+    "datasets_metadata": {"last_update": "last_updated"},
+}
+
+DEFAULT_LOAD_BATCH_SIZE = 50_000
+
+
+def get_table_columns(conn, table_name):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table_name})")]
+
+
+def iter_csv_batches(csv_path, table_name, table_columns, batch_size):
+    """
+    Stream a CSV as (columns, rows) batches matching the table schema.
 
-    df = pd.read_csv(path)
-    df.to_sql(name=table_name, con=conn, if_exists="append", index=False)
-    print(f"Loaded {len(df)} rows into {table_name}")
-    return len(df)
+    Only batch_size rows are held in memory at a time. Aliased headers are
+    renamed, columns the table does not have are dropped, and missing values
+    become None.
+    """
+    aliases = CSV_COLUMN_ALIASES.get(table_name, {})
+    for chunk in pd.read_csv(csv_path, chunksize=batch_size):
+        chunk = chunk.rename(columns=aliases)
+        columns = [c for c in chunk.columns if c in table_columns]
+        chunk = chunk[columns].astype(object)
+        chunk = chunk.where(chunk.notna(), None)
+        yield columns, list(chunk.itertuples(index=False, name=None))
 
 
 def close_connection(conn):
@@ -0,0 +1,85 @@
+"""
+Typed, memory-compact DataFrames for whole-table reads.
+
+pd.read_sql_query gives every text column object (or string) dtype, so a
+million-row frame holds one Python string per cell even where a column only
+ever takes five values. With typed=True, read_table_frame converts:
+
+- enumerated columns (severity, status, priority, category, ...) to
+  categoricals, which store one small integer code per row;
+- date columns to datetime64 (unparseable values become NaT);
+- integer and float columns to the smallest dtype that holds them.
+
+Categoricals still support isin() and value_counts(), but value_counts()
+lists every category, including ones a filter removed, with a count of 0.
+Use .value_counts()[lambda counts: counts > 0] where that matters.
+
+Reads report nothing, as they run inside page loads; measuring the memory
+saved walks every string twice. benchmark.py memory reports it with
+frame_memory().
+"""
+
+import pandas as pd
+
+from app.data.db import get_table_columns
+
+# Per-table conversions applied in typed mode.
+CATEGORY_COLUMNS = {
+    "cyber_incidents": ["incident_type", "severity", "status", "reported_by"],
+    "it_tickets": ["priority", "status", "category", "assigned_to"],
+    "datasets_metadata": ["category", "source"],
+}
+DATE_COLUMNS = {
+    "cyber_incidents": ["date_reported"],
+    "it_tickets": ["created_date", "resolved_date"],
+    "datasets_metadata": ["last_updated"],
+}
+
+
+def frame_memory(df):
+    """Bytes held by a DataFrame, including the strings it points to."""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def compact_frame(df, table_name):
+    """Return df with categorical, datetime64 and downcast numeric columns."""
+    df = df.copy()
+    for column in CATEGORY_COLUMNS.get(table_name, []):
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    for column in DATE_COLUMNS.get(table_name, []):
+        if column in df.columns:
+            df[column] = pd.to_datetime(df[column], format="ISO8601", errors="coerce")
+    for column in df.select_dtypes(include="integer").columns:
+        df[column] = pd.to_numeric(df[column], downcast="integer")
+    for column in df.select_dtypes(include="floating").columns:
+        # Only when float32 holds every value exactly, so a size like
+        # 12.34 MB is never perturbed
+        downcast = pd.to_numeric(df[column], downcast="float")
+        if (downcast.astype("float64") == df[column]).sum() == df[column].count():
+            df[column] = downcast
+    return df
+
+
+def read_table_frame(conn, table_name, columns=None, typed=False, order_by=None):
+    """
+    Read a whole table as a DataFrame.
+
+    columns limits the SELECT to those columns (validated against the
+    table, so they are safe to interpolate). With typed=True the frame is
+    compacted with compact_frame().
+    """
+    if columns is None:
+        select = "*"
+    else:
+        known = get_table_columns(conn, table_name)
+        unknown = [column for column in columns if column not in known]
+        if unknown:
+            raise ValueError(f"Unknown {table_name} columns: {unknown}")
+        select = ", ".join(columns)
+
+    sql = f"SELECT {select} FROM {table_name}"
+    if order_by:
+        sql += f" ORDER BY {order_by}"
+    df = pd.read_sql_query(sql, conn)
+    return compact_frame(df, table_name) if typed else df
@@ -1,14 +1,39 @@
+import sqlite3
 import pandas as pd
-from app.data.db import connect_database
+from app.data.cache import cached, invalidates
+from app.data.db import (
+    borrow_connection,
+    build_where_clause,
+    decode_cursor,
+    fetch_keyset_page,
+    retry_on_busy,
+)
+from app.data.frames import read_table_frame
+from app.data.rollups import read_rollup, rollup_date_range
+from app.data.search import search_table
+from app.data.statistics import read_incident_statistics
 
 
 def insert_incident(
     date_reported, incident_type, severity, status, description, reported_by=None
 ):
     """Insert new incident."""
-    conn = connect_database()
-    cursor = conn.cursor()
     try:
+        return _insert_incident_row(
+            date_reported, incident_type, severity, status, description, reported_by
+        )
+    except Exception as e:
+        print(f"Error inserting incident: {e}")
+        return None
+
+
+@invalidates("cyber_incidents")
+@retry_on_busy
+def _insert_incident_row(
+    date_reported, incident_type, severity, status, description, reported_by
+):
+    with borrow_connection() as conn:
+        cursor = conn.cursor()
         cursor.execute(
             """
             INSERT INTO cyber_incidents 
@@ -20,26 +45,142 @@ def insert_incident(
         conn.commit()
         incident_id = cursor.lastrowid
         return incident_id
-    except Exception as e:
-        print(f"Error inserting incident: {e}")
-        return None
-    finally:
-        conn.close()
 
 
-def get_all_incidents():
-    """Get all incidents as DataFrame. Handles its own connection."""
-    conn = connect_database()
+@cached("cyber_incidents")
+def get_all_incidents(columns=None, typed=False):
+    """
+    Get all incidents as DataFrame. Borrows a pooled connection.
+
+    columns selects a subset of columns; typed=True returns the compact
+    categorical/datetime64 frame described in app.data.frames.
+    """
+    with borrow_connection() as conn:
+        return read_table_frame(
+            conn, "cyber_incidents", columns, typed, order_by="id DESC"
+        )
+
+
+def _incident_filters(severities=None, statuses=None):
+    return build_where_clause({"severity": severities, "status": statuses})
+
+
+@cached("cyber_incidents")
+def query_incidents(severities=None, statuses=None, limit=25, offset=0):
+    """One page of incidents matching the filters, newest first."""
+    where, params = _incident_filters(severities, statuses)
+    with borrow_connection() as conn:
+        return pd.read_sql_query(
+            f"SELECT * FROM cyber_incidents{where} ORDER BY id DESC LIMIT ? OFFSET ?",
+            conn,
+            params=params + [limit, offset],
+        )
+
+
+@cached("cyber_incidents")
+def search_incidents(text, severities=None, statuses=None, limit=25):
+    """
+    Incidents whose type or description match `text`, best match first,
+    with rank and a highlighted snippet column. Filters combine with AND.
+    """
+    where, params = _incident_filters(severities, statuses)
+    with borrow_connection() as conn:
+        return search_table(conn, "cyber_incidents", text, where, params, limit)
+
+
+@cached("cyber_incidents")
+def count_incidents(severities=None, statuses=None):
+    """Number of incidents matching the filters."""
+    where, params = _incident_filters(severities, statuses)
+    with borrow_connection() as conn:
+        return conn.execute(
+            f"SELECT COUNT(*) FROM cyber_incidents{where}", params
+        ).fetchone()[0]
+
+
+@cached("cyber_incidents")
+def count_incidents_by(column, severities=None, statuses=None, limit=None):
+    """Filtered counts grouped by `column`, largest first, as a DataFrame."""
+    if column not in ("severity", "status", "incident_type"):
+        raise ValueError(f"Cannot group incidents by {column!r}")
+    where, params = _incident_filters(severities, statuses)
+    sql = (
+        f"SELECT {column}, COUNT(*) AS count FROM cyber_incidents{where} "
+        f"GROUP BY {column} ORDER BY count DESC"
+    )
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    with borrow_connection() as conn:
+        return pd.read_sql_query(sql, conn, params=params)
+
+
+@cached("cyber_incidents")
+def _incident_trend(dimension, grain, start, end):
+    with borrow_connection() as conn:
+        return read_rollup(conn, "cyber_incidents", dimension, grain, start, end)
+
+
+def get_incident_trend(dimension=None, grain="week", start=None, end=None):
+    """
+    Incidents per day or week between start and end (inclusive), read
+    from the time_rollups table. dimension (incident_type or severity) splits
+    each bucket into one row per value; None gives the totals.
+    """
     try:
-        df = pd.read_sql_query("SELECT * FROM cyber_incidents ORDER BY id DESC", conn)
-        return df
-    finally:
-        conn.close()
+        return _incident_trend(dimension, grain, start, end)
+    except sqlite3.OperationalError as e:
+        print(f"Error reading incident trend: {e}")
+        return pd.DataFrame(columns=["bucket", "value", "count"])
+
+
+def get_incident_date_range():
+    """(first, last) incident date in the rollups, or (None, None)."""
+    with borrow_connection() as conn:
+        try:
+            return rollup_date_range(conn, "cyber_incidents")
+        except sqlite3.OperationalError:
+            return None, None
 
 
+@cached("cyber_incidents")
+def get_incidents_page(
+    cursor=None, page_size=25, severities=None, statuses=None, after_id=None
+):
+    """
+    Keyset page of incidents, newest first.
+
+    Start with no cursor (or pass the last-seen id as after_id) and feed the
+    returned cursor back in for the next page. Returns (DataFrame,
+    next_cursor); next_cursor is None once there are no more rows.
+    """
+    if cursor is not None:
+        after_id = decode_cursor(cursor)
+    with borrow_connection() as conn:
+        return fetch_keyset_page(
+            conn,
+            "cyber_incidents",
+            {"severity": severities, "status": statuses},
+            after_id,
+            page_size,
+        )
+
+
+def iter_incident_pages(page_size=1000, severities=None, statuses=None):
+    """Yield every matching incident page by page, newest first."""
+    cursor = None
+    while True:
+        df, cursor = get_incidents_page(cursor, page_size, severities, statuses)
+        if len(df) > 0:
+            yield df
+        if cursor is None:
+            return
+
+
+@invalidates("cyber_incidents")
+@retry_on_busy
 def update_incident_status(incident_id, new_status):
-    conn = connect_database()
-    try:
+    with borrow_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
             "UPDATE cyber_incidents SET status = ? WHERE id = ?",
@@ -48,20 +189,17 @@ def update_incident_status(incident_id, new_status):
         conn.commit()
         rows_changed = cursor.rowcount
         return rows_changed
-    finally:
-        conn.close()
 
 
+@invalidates("cyber_incidents")
+@retry_on_busy
 def delete_incident(incident_id):
-    conn = connect_database()
-    try:
+    with borrow_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("DELETE FROM cyber_incidents WHERE id = ?", (incident_id,))
         conn.commit()
         rows_changed = cursor.rowcount
         return rows_changed
-    finally:
-        conn.close()
 
 
 def get_incidents_by_type_count(conn):
@@ -90,59 +228,22 @@ def get_incidents_by_severity_count(conn):
     return pd.read_sql_query(cursor.statement, conn)
 
 
+@cached("cyber_incidents")
+def _incident_statistics():
+    with borrow_connection() as conn:
+        return read_incident_statistics(conn)
+
+
 def get_incident_statistics():
     """Calculates and returns key metrics for the Cyber Incidents dashboard."""
-    conn = connect_database()
     try:
-        total_incidents_df = pd.read_sql_query(
-            "SELECT COUNT(id) FROM cyber_incidents", conn
-        )
-        total_incidents = (
-            total_incidents_df.iloc[0, 0] if not total_incidents_df.empty else 0
-        )
-
-        open_incidents_df = pd.read_sql_query(
-            "SELECT COUNT(id) FROM cyber_incidents WHERE status='Open'", conn
-        )
-        open_incidents = (
-            open_incidents_df.iloc[0, 0] if not open_incidents_df.empty else 0
-        )
-
-        top_severity_df = pd.read_sql_query(
-            "SELECT severity, COUNT(*) as count FROM cyber_incidents GROUP BY severity ORDER BY count DESC LIMIT 1",
-            conn,
-        )
-        top_severity = (
-            top_severity_df["severity"].iloc[0] if not top_severity_df.empty else "N/A"
-        )
-
-        severity_counts_df = pd.read_sql_query(
-            "SELECT severity, COUNT(*) as count FROM cyber_incidents GROUP BY severity",
-            conn,
-        )
-        severity_counts = severity_counts_df.to_dict("records")
-
-        status_counts_df = pd.read_sql_query(
-            "SELECT status, COUNT(*) as count FROM cyber_incidents GROUP BY status",
-            conn,
-        )
-        status_counts = status_counts_df.to_dict("records")
-
-        return {
-            "total": int(total_incidents),
-            "open_incidents": int(open_incidents),
-            "top_severity": top_severity,
-            "by_severity": severity_counts,
-            "by_status": status_counts,
-        }
+        return _incident_statistics()
     except Exception as e:
         print(f"Error calculating incident statistics: {e}")
         return {
-            "total_incidents": 0,
+            "total": 0,
             "open_incidents": 0,
             "top_severity": "Error",
             "by_severity": [],
             "by_status": [],
         }
-    finally:
-        conn.close()
@@ -0,0 +1,230 @@
+"""
+Time-bucketed rollups for the dashboard trend charts.
+
+time_rollups holds one row per (table, grain, bucket, dimension, value) with
+a row count, where grain is 'day' or 'week' and bucket is the ISO date of
+the day or of the Monday starting the week. Like kpi_counters, triggers on
+the base tables keep it exact on every insert, update and delete, so a
+trend over any date range reads O(buckets x groups) rows however large
+the tables get.
+
+Every row counts once under each grouped column (NULL values are stored
+as counters.NULL_VALUE), so totals are the sum over the first
+column's values and need no rows of their own. Rows whose date does not
+parse are left out of the rollups.
+"""
+
+import pandas as pd
+
+from app.data.counters import NULL_VALUE_SQL
+
+# table -> (date column, grouped columns)
+ROLLUP_SPECS = {
+    "cyber_incidents": ("date_reported", ["incident_type", "severity"]),
+    "it_tickets": ("created_date", ["category", "priority"]),
+}
+
+# grain -> SQLite expression turning a date into its bucket
+GRAINS = {
+    "day": "date({})",
+    "week": "date({}, 'weekday 0', '-6 days')",
+}
+
+
+def create_time_rollups_table(conn):
+    """Create the time_rollups table."""
+    cursor = conn.cursor()
+    create_table_sql = """
+    CREATE TABLE IF NOT EXISTS time_rollups (
+            table_name TEXT NOT NULL,
+            grain TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            dimension TEXT NOT NULL,
+            value TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (table_name, grain, dimension, bucket, value)
+    ) WITHOUT ROWID;
+    """
+    cursor.execute(create_table_sql)
+
+
+def _row_bumps(table_name, row_alias, sign):
+    """Rollup updates for adding (sign=+1) or removing (sign=-1) one row."""
+    date_column, columns = ROLLUP_SPECS[table_name]
+    date_sql = f"{row_alias}.{date_column}"
+    groups = [
+        (column, f"IFNULL({row_alias}.{column}, {NULL_VALUE_SQL})")
+        for column in columns
+    ]
+    statements = []
+    for grain, bucket_sql in GRAINS.items():
+        bucket = bucket_sql.format(date_sql)
+        for dimension, value_sql in groups:
+            statements.append(
+                f"""
+                INSERT INTO time_rollups
+                    (table_name, grain, bucket, dimension, value, count)
+                SELECT '{table_name}', '{grain}', {bucket}, '{dimension}',
+                       {value_sql}, {sign}
+                WHERE {bucket} IS NOT NULL
+                ON CONFLICT (table_name, grain, dimension, bucket, value) DO UPDATE
+                SET count = count + excluded.count;
+                """
+            )
+    return statements
+
+
+def rollup_trigger_statements(table_name):
+    """CREATE TRIGGER statements that keep time_rollups exact for a table."""
+    prefix = f"trg_{table_name}_rollups"
+    date_column, columns = ROLLUP_SPECS[table_name]
+    insert_body = "".join(_row_bumps(table_name, "NEW", 1))
+    delete_body = "".join(_row_bumps(table_name, "OLD", -1))
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {prefix}_insert
+        AFTER INSERT ON {table_name}
+        BEGIN {insert_body} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {prefix}_delete
+        AFTER DELETE ON {table_name}
+        BEGIN {delete_body} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {prefix}_update
+        AFTER UPDATE OF {", ".join([date_column] + columns)} ON {table_name}
+        BEGIN {delete_body}{insert_body} END
+        """,
+    ]
+
+
+def create_rollup_triggers(conn):
+    for table_name in ROLLUP_SPECS:
+        for statement in rollup_trigger_statements(table_name):
+            conn.execute(statement)
+
+
+def _group_queries(table_name):
+    """(grain, dimension, SELECT bucket, value, count) recounting a table."""
+    date_column, columns = ROLLUP_SPECS[table_name]
+    groups = [(column, f"IFNULL({column}, {NULL_VALUE_SQL})") for column in columns]
+    for grain, bucket_sql in GRAINS.items():
+        bucket = bucket_sql.format(date_column)
+        for dimension, value_sql in groups:
+            yield grain, dimension, f"""
+                SELECT {bucket} AS bucket, {value_sql} AS value, COUNT(*) AS count
+                FROM {table_name}
+                WHERE {bucket} IS NOT NULL
+                GROUP BY 1, 2
+            """
+
+
+def rebuild_time_rollups(conn, table_names=None):
+    """Recompute the rollups for the given tables (default: all) from scratch."""
+    for table_name in table_names or ROLLUP_SPECS:
+        conn.execute("DELETE FROM time_rollups WHERE table_name = ?", (table_name,))
+        for grain, dimension, select_sql in _group_queries(table_name):
+            conn.execute(
+                f"""
+                INSERT INTO time_rollups
+                    (table_name, grain, bucket, dimension, value, count)
+                SELECT '{table_name}', '{grain}', bucket, '{dimension}', value, count
+                FROM ({select_sql})
+                """
+            )
+
+
+def verify_time_rollups(conn, repair=False):
+    """
+    Compare time_rollups against a fresh recount of the base tables.
+
+    Returns (table, grain, dimension, bucket, value, stored, expected) for
+    every bucket that disagrees. With repair=True the mismatched tables are
+    rebuilt and committed.
+    """
+    mismatches = []
+    for table_name in ROLLUP_SPECS:
+        for grain, dimension, select_sql in _group_queries(table_name):
+            expected = {
+                (bucket, value): count
+                for bucket, value, count in conn.execute(select_sql)
+            }
+            stored = {
+                (bucket, value): count
+                for bucket, value, count in conn.execute(
+                    """
+                    SELECT bucket, value, count FROM time_rollups
+                    WHERE table_name = ? AND grain = ? AND dimension = ?
+                      AND count != 0
+                    """,
+                    (table_name, grain, dimension),
+                )
+            }
+            for key in sorted(set(expected) | set(stored), key=str):
+                want, have = expected.get(key, 0), stored.get(key, 0)
+                if want != have:
+                    mismatches.append(
+                        (table_name, grain, dimension, *key, have, want)
+                    )
+
+    if repair and mismatches:
+        rebuild_time_rollups(conn, sorted({m[0] for m in mismatches}))
+        conn.commit()
+    return mismatches
+
+
+def read_rollup(conn, table_name, dimension=None, grain="day", start=None, end=None):
+    """
+    Counts per bucket between start and end, one row per value of
+    `dimension` in each bucket, or a single total when dimension is None.
+
+    start/end are inclusive ISO dates (or date objects) and may be None for
+    an open range. They are turned into buckets with the triggers' own
+    expression, so the weeks containing start and end are included whole.
+    Returns a DataFrame with bucket (datetime64), value and count columns,
+    ordered by bucket; value is None for the total.
+    """
+    columns = ROLLUP_SPECS[table_name][1]
+    if grain not in GRAINS:
+        raise ValueError(f"Unknown grain {grain!r}")
+    if dimension is not None and dimension not in columns:
+        raise ValueError(f"{table_name} is not rolled up by {dimension!r}")
+
+    if dimension is None:
+        select = "bucket, NULL AS value, SUM(count) AS count"
+        group_by = " GROUP BY bucket"
+        dimension = columns[0]
+    else:
+        select = f"bucket, NULLIF(value, {NULL_VALUE_SQL}) AS value, count"
+        group_by = ""
+    sql = f"""
+        SELECT {select} FROM time_rollups
+        WHERE table_name = ? AND grain = ? AND dimension = ? AND count != 0
+    """
+    params = [table_name, grain, dimension]
+    bucket_of_param = GRAINS[grain].format("?")
+    if start is not None:
+        sql += f" AND bucket >= {bucket_of_param}"
+        params.append(str(start))
+    if end is not None:
+        sql += f" AND bucket <= {bucket_of_param}"
+        params.append(str(end))
+    df = pd.read_sql_query(
+        sql + group_by + " ORDER BY bucket, value", conn, params=params
+    )
+    df["bucket"] = pd.to_datetime(df["bucket"])
+    # read_sql_query may return SQL NULLs as NaN
+    df["value"] = df["value"].astype(object).where(df["value"].notna(), None)
+    return df
+
+
+def rollup_date_range(conn, table_name):
+    """(first_day, last_day) with any rolled-up rows, or (None, None)."""
+    return conn.execute(
+        """
+        SELECT MIN(bucket), MAX(bucket) FROM time_rollups
+        WHERE table_name = ? AND grain = 'day' AND dimension = ? AND count != 0
+        """,
+        (table_name, ROLLUP_SPECS[table_name][1][0]),
+    ).fetchone()
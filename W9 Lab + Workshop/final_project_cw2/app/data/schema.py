@@ -1,3 +1,47 @@
+import re
+
+from app.data.analytics import (
+    create_resolution_histogram_table,
+    create_resolution_triggers,
+    rebuild_resolution_histogram,
+)
+from app.data.cache import (
+    bump_table_generation,
+    create_generation_triggers,
+    create_table_generations_table,
+    seed_database_epoch,
+)
+from app.data.counters import (
+    create_counter_triggers,
+    create_kpi_counters_table,
+    rebuild_kpi_counters,
+)
+from app.data.rollups import (
+    create_rollup_triggers,
+    create_time_rollups_table,
+    rebuild_time_rollups,
+)
+from app.data.search import (
+    create_search_tables,
+    create_search_triggers,
+    rebuild_search_indexes,
+)
+from app.data.sync import (
+    NATURAL_KEYS,
+    RESULT_COUNTS,
+    create_csv_row_hashes_table,
+    create_csv_sync_state_table,
+    has_synced,
+    sync_rows,
+)
+from app.data.tickets import (
+    create_sequences_table,
+    create_ticket_sequence_triggers,
+    seed_ticket_sequence,
+)
+from app.data.users import create_user_migration_staging_table
+
+
 def create_users_table(conn):
     """Create the users table if it doesn't exist."""
     create_table_sql = """
@@ -71,8 +115,333 @@ def create_it_tickets_table(conn):
 
 
 def create_all_tables(conn):
-    """Create all tables."""
+    """Create all tables and bring the schema up to the latest migration."""
     create_users_table(conn)
     create_cyber_incidents_table(conn)
     create_datasets_metadata_table(conn)
     create_it_tickets_table(conn)
+    apply_migrations(conn)
+
+
+# Triggers feeding kpi_counters, time_rollups and resolution_histogram.
+SUMMARY_TRIGGER_PATTERN = re.compile(
+    r"trg_\w+_(counters|rollups|resolution)_(insert|delete|update)"
+)
+
+
+def drop_summary_triggers(conn):
+    """Drop the summary-table triggers so they can be recreated."""
+    names = [
+        name
+        for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+        ).fetchall()
+        if SUMMARY_TRIGGER_PATTERN.fullmatch(name)
+    ]
+    for name in names:
+        conn.execute(f"DROP TRIGGER {name}")
+
+
+# ==================== MIGRATIONS ====================
+# Each migration is (version, description, steps). Steps are SQL strings or
+# callables taking the connection. Versions only ever get appended; an
+# applied migration is never edited, so existing databases upgrade in place.
+
+MIGRATIONS = [
+    (
+        1,
+        "Secondary indexes for dashboard filters and ticket_id lookups",
+        [
+            "CREATE INDEX IF NOT EXISTS idx_incidents_severity_status "
+            "ON cyber_incidents(severity, status)",
+            "CREATE INDEX IF NOT EXISTS idx_incidents_status "
+            "ON cyber_incidents(status)",
+            "CREATE INDEX IF NOT EXISTS idx_incidents_type "
+            "ON cyber_incidents(incident_type)",
+            "CREATE INDEX IF NOT EXISTS idx_tickets_ticket_id "
+            "ON it_tickets(ticket_id)",
+            "CREATE INDEX IF NOT EXISTS idx_tickets_priority_status "
+            "ON it_tickets(priority, status)",
+            "CREATE INDEX IF NOT EXISTS idx_tickets_status ON it_tickets(status)",
+            "CREATE INDEX IF NOT EXISTS idx_tickets_category ON it_tickets(category)",
+            "CREATE INDEX IF NOT EXISTS idx_datasets_category_size "
+            "ON datasets_metadata(category, file_size_mb)",
+        ],
+    ),
+    (
+        2,
+        "Covering indexes for the single-pass dashboard statistics",
+        [
+            "CREATE INDEX IF NOT EXISTS idx_tickets_priority_status_category "
+            "ON it_tickets(priority, status, category)",
+            "DROP INDEX IF EXISTS idx_tickets_priority_status",
+            "CREATE INDEX IF NOT EXISTS idx_datasets_category_size_records "
+            "ON datasets_metadata(category, file_size_mb, record_count)",
+            "DROP INDEX IF EXISTS idx_datasets_category_size",
+        ],
+    ),
+    (
+        3,
+        "Trigger-maintained kpi_counters for dashboard metrics",
+        [create_kpi_counters_table, create_counter_triggers, rebuild_kpi_counters],
+    ),
+    (
+        4,
+        "CSV sync high-water marks and row hashes",
+        [create_csv_sync_state_table, create_csv_row_hashes_table],
+    ),
+    (
+        5,
+        "Trigger-maintained table_generations for the shared result cache",
+        [create_table_generations_table, create_generation_triggers],
+    ),
+    (
+        6,
+        "FTS5 search indexes over incident and ticket text",
+        [create_search_tables, create_search_triggers, rebuild_search_indexes],
+    ),
+    (
+        7,
+        "Trigger-maintained per-day and per-week time_rollups",
+        [create_time_rollups_table, create_rollup_triggers, rebuild_time_rollups],
+    ),
+    (
+        8,
+        "Trigger-maintained resolution_histogram for ticket time-to-resolve",
+        [
+            create_resolution_histogram_table,
+            create_resolution_triggers,
+            rebuild_resolution_histogram,
+        ],
+    ),
+    (
+        9,
+        "Ticket ID sequence replacing the MAX(ticket_id) scan",
+        [create_sequences_table, create_ticket_sequence_triggers, seed_ticket_sequence],
+    ),
+    (
+        10,
+        "Store NULL group values as X'00' so they no longer merge with ''",
+        [
+            drop_summary_triggers,
+            create_counter_triggers,
+            create_rollup_triggers,
+            create_resolution_triggers,
+            rebuild_kpi_counters,
+            rebuild_time_rollups,
+            rebuild_resolution_histogram,
+        ],
+    ),
+    (
+        11,
+        "Staging table for resumable bulk user migrations",
+        [create_user_migration_staging_table],
+    ),
+    (
+        12,
+        "Random database epoch in table_generations for result cache keys",
+        [seed_database_epoch],
+    ),
+]
+
+
+def create_schema_migrations_table(conn):
+    """Create the table that records applied migration versions."""
+    cursor = conn.cursor()
+    create_table_sql = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    """
+    cursor.execute(create_table_sql)
+    conn.commit()
+
+
+def get_schema_version(conn):
+    """Return the highest applied migration version (0 for a fresh database)."""
+    create_schema_migrations_table(conn)
+    row = conn.execute("SELECT MAX(version) FROM schema_migrations").fetchone()
+    return row[0] or 0
+
+
+def apply_migrations(conn, target_version=None):
+    """
+    Apply every pending migration up to target_version (default: latest).
+
+    Each migration runs in its own transaction together with its version
+    row, so an interrupted upgrade leaves the database at the last fully
+    applied version. Returns the list of versions applied.
+    """
+    current = get_schema_version(conn)
+    applied = []
+
+    for version, description, steps in MIGRATIONS:
+        if version <= current:
+            continue
+        if target_version is not None and version > target_version:
+            break
+
+        conn.execute("BEGIN")
+        try:
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(
+                "INSERT INTO schema_migrations (version, description) VALUES (?, ?)",
+                (version, description),
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+
+    return applied
+
+
+# ==================== BULK LOADS ====================
+# A first CSV load into an empty table runs without the table's per-row
+# triggers and secondary indexes, then redoes their work once. Triggers are
+# named trg_<table>_<kind>_<event>; only kinds listed here are suspended,
+# so a trigger added later keeps firing until it gets a rebuild.
+
+ROW_TRIGGER_REBUILDS = {
+    "counters": lambda conn, table_name: rebuild_kpi_counters(conn, [table_name]),
+    "rollups": lambda conn, table_name: rebuild_time_rollups(conn, [table_name]),
+    "resolution": lambda conn, table_name: rebuild_resolution_histogram(conn),
+    "fts": lambda conn, table_name: rebuild_search_indexes(conn, [table_name]),
+    "sequence": lambda conn, table_name: seed_ticket_sequence(conn),
+    "generation": bump_table_generation,
+}
+
+
+def is_first_load(conn, table_name):
+    """True if table_name is empty and no CSV has ever been synced into it."""
+    if has_synced(conn, table_name):
+        return False
+    return conn.execute(f"SELECT 1 FROM {table_name} LIMIT 1").fetchone() is None
+
+
+def suspend_row_maintenance(conn, table_name):
+    """
+    Drop table_name's rebuildable triggers and every index not led by its
+    natural key, which sync_rows still looks rows up by. Returns what
+    resume_row_maintenance needs to put them back. The caller owns the
+    transaction.
+    """
+    key_column = NATURAL_KEYS[table_name]
+    trigger_name = re.compile(rf"trg_{table_name}_(\w+)_(insert|delete|update)")
+    kinds, statements = set(), []
+    # Indexes sort first, so they are rebuilt before the triggers' work is redone
+    for object_type, name, sql in conn.execute(
+        """
+        SELECT type, name, sql FROM sqlite_master
+        WHERE tbl_name = ? AND type IN ('index', 'trigger') AND sql IS NOT NULL
+        ORDER BY type, name
+        """,
+        (table_name,),
+    ).fetchall():
+        if object_type == "trigger":
+            match = trigger_name.fullmatch(name)
+            if match is None or match[1] not in ROW_TRIGGER_REBUILDS:
+                continue
+            kinds.add(match[1])
+        else:
+            first_column = conn.execute(f"PRAGMA index_info({name})").fetchone()
+            if first_column is not None and first_column[2] == key_column:
+                continue
+        conn.execute(f"DROP {object_type.upper()} {name}")
+        statements.append(sql)
+    return sorted(kinds), statements
+
+
+def resume_row_maintenance(conn, table_name, suspended):
+    """Recreate what suspend_row_maintenance dropped and redo its work once."""
+    kinds, statements = suspended
+    for sql in statements:
+        conn.execute(sql)
+    for kind in kinds:
+        ROW_TRIGGER_REBUILDS[kind](conn, table_name)
+
+
+def bulk_load_batches(conn, table_name, batches):
+    """
+    sync_batches for a first load: every batch goes through sync_rows in a
+    single transaction with the table's row maintenance suspended. An
+    interrupted load therefore leaves the table empty with its triggers
+    and indexes intact.
+    """
+    result = dict.fromkeys(RESULT_COUNTS, 0)
+    conn.execute("BEGIN")
+    try:
+        suspended = suspend_row_maintenance(conn, table_name)
+        for columns, rows in batches:
+            counts = sync_rows(conn, table_name, columns, rows)
+            for key, count in zip(RESULT_COUNTS, counts):
+                result[key] += count
+        resume_row_maintenance(conn, table_name, suspended)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return result
+
+
+# ==================== QUERY PLAN CHECKS ====================
+# Filters and groupings the dashboards rely on. None of these may fall back
+# to a full table scan; check_query_plans() reports any that do.
+
+DASHBOARD_QUERIES = [
+    ("SELECT COUNT(id) FROM cyber_incidents WHERE status = 'Open'", ()),
+    ("SELECT severity, COUNT(*) FROM cyber_incidents GROUP BY severity", ()),
+    ("SELECT status, COUNT(*) FROM cyber_incidents GROUP BY status", ()),
+    ("SELECT incident_type, COUNT(*) FROM cyber_incidents GROUP BY incident_type", ()),
+    ("SELECT COUNT(*) FROM cyber_incidents WHERE severity = ? AND status = ?", ("High", "Open")),
+    ("SELECT COUNT(id) FROM it_tickets WHERE status = 'Open'", ()),
+    ("SELECT priority, COUNT(*) FROM it_tickets GROUP BY priority", ()),
+    ("SELECT category, COUNT(*) FROM it_tickets GROUP BY category", ()),
+    ("SELECT status, COUNT(*) FROM it_tickets GROUP BY status", ()),
+    ("SELECT * FROM it_tickets WHERE priority = ? ORDER BY id DESC", ("High",)),
+    ("SELECT * FROM it_tickets WHERE status = ? ORDER BY id DESC", ("Open",)),
+    ("UPDATE it_tickets SET status = ? WHERE ticket_id = ?", ("Closed", "TKT-000001")),
+    ("DELETE FROM it_tickets WHERE ticket_id = ?", ("TKT-000001",)),
+    ("SELECT category, COUNT(*) FROM datasets_metadata GROUP BY category", ()),
+    (
+        "SELECT severity, status, COUNT(*) FROM cyber_incidents "
+        "GROUP BY severity, status",
+        (),
+    ),
+    (
+        "SELECT priority, status, category, COUNT(*) FROM it_tickets "
+        "GROUP BY priority, status, category",
+        (),
+    ),
+    (
+        "SELECT category, COUNT(*), SUM(record_count), SUM(file_size_mb) "
+        "FROM datasets_metadata GROUP BY category",
+        (),
+    ),
+]
+
+
+def explain_query_plan(conn, sql, params=()):
+    """Return the EXPLAIN QUERY PLAN detail lines for a statement."""
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    return [row[-1] for row in rows]
+
+
+def check_query_plans(conn, queries=DASHBOARD_QUERIES):
+    """
+    Return (sql, plan) pairs for every query whose plan contains a full
+    table scan. An empty list means every dashboard query uses an index.
+    """
+    full_scans = []
+    for sql, params in queries:
+        plan = explain_query_plan(conn, sql, params)
+        if any(d.startswith("SCAN") and "INDEX" not in d for d in plan):
+            full_scans.append((sql, plan))
+    return full_scans
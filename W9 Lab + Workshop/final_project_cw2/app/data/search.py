@@ -0,0 +1,273 @@
+"""
+Full-text search over incident and ticket text.
+
+Each searchable table gets an FTS5 index stored as an external-content
+table: the index holds only the token postings and reads the text itself
+back from the base table, so it adds no second copy of the descriptions.
+Triggers keep it exact on every insert, update and delete.
+
+A search walks the postings for the query terms newest-first (FTS5 keeps
+them in rowid order) and stops after RANK_WINDOW matches that pass the
+filters, so its cost does not grow with the table. FTS5's bm25() is not
+used: its IDF term reads every posting of every query word on each call,
+hundreds of milliseconds for a common word at 10M rows. The window is
+instead scored from highlight() hit counts with bm25's term-frequency
+and length normalisation. As every match contains every query word, IDF
+would barely reorder it. Results are the best matches among the newest
+RANK_WINDOW; add words or filters to reach further back.
+"""
+
+import heapq
+import re
+import sqlite3
+
+import pandas as pd
+
+# table -> (FTS table, indexed columns)
+SEARCH_INDEXES = {
+    "cyber_incidents": ("cyber_incidents_fts", ["incident_type", "description"]),
+    "it_tickets": ("it_tickets_fts", ["subject", "description"]),
+}
+
+SNIPPET_TOKENS = 12
+# Newest matching rows that are ranked; see the module docstring.
+RANK_WINDOW = 1000
+# bm25 term-frequency saturation and length normalisation.
+BM25_K1 = 1.2
+BM25_B = 0.75
+# highlight() markers around matched tokens; never present in stored text.
+MATCH_START = "\x01"
+MATCH_END = "\x02"
+# Words and numbers, each optionally ending in * for a prefix search. The
+# tokenizer splits "TKT-000123" the same way.
+TOKEN_PATTERN = re.compile(r"(\w+)(\*?)", re.UNICODE)
+
+
+def fts5_available(conn):
+    """True if this SQLite build was compiled with FTS5."""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+    except sqlite3.OperationalError:
+        return False
+    conn.execute("DROP TABLE temp.fts5_probe")
+    return True
+
+
+def create_search_tables(conn):
+    """Create the external-content FTS5 tables (skipped without FTS5)."""
+    if not fts5_available(conn):
+        print("SQLite has no FTS5; search falls back to LIKE scans")
+        return
+    for table_name, (fts_table, columns) in SEARCH_INDEXES.items():
+        conn.execute(
+            f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5(
+                {", ".join(columns)},
+                content='{table_name}',
+                content_rowid='id',
+                tokenize='porter unicode61'
+            )
+            """
+        )
+
+
+def search_trigger_statements(table_name):
+    """CREATE TRIGGER statements that keep a table's FTS index in sync."""
+    fts_table, columns = SEARCH_INDEXES[table_name]
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"NEW.{column}" for column in columns)
+    old_values = ", ".join(f"OLD.{column}" for column in columns)
+    insert_sql = (
+        f"INSERT INTO {fts_table} (rowid, {column_list}) "
+        f"VALUES (NEW.id, {new_values});"
+    )
+    # External-content tables delete with the special 'delete' command,
+    # which needs the old values to find the postings
+    delete_sql = (
+        f"INSERT INTO {fts_table} ({fts_table}, rowid, {column_list}) "
+        f"VALUES ('delete', OLD.id, {old_values});"
+    )
+    prefix = f"trg_{table_name}_fts"
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {prefix}_insert
+        AFTER INSERT ON {table_name}
+        BEGIN {insert_sql} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {prefix}_delete
+        AFTER DELETE ON {table_name}
+        BEGIN {delete_sql} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {prefix}_update
+        AFTER UPDATE OF {column_list} ON {table_name}
+        BEGIN {delete_sql} {insert_sql} END
+        """,
+    ]
+
+
+def search_index_exists(conn, table_name):
+    fts_table = SEARCH_INDEXES[table_name][0]
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts_table,)
+    ).fetchone()
+    return row is not None
+
+
+def create_search_triggers(conn):
+    for table_name in SEARCH_INDEXES:
+        if search_index_exists(conn, table_name):
+            for statement in search_trigger_statements(table_name):
+                conn.execute(statement)
+
+
+def rebuild_search_indexes(conn, table_names=None):
+    """Re-index every row of the given tables (default: all). The caller commits."""
+    for table_name in table_names or SEARCH_INDEXES:
+        fts_table = SEARCH_INDEXES[table_name][0]
+        if search_index_exists(conn, table_name):
+            conn.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')")
+
+
+def match_query(text):
+    """
+    Turn free text from a search box into a safe FTS5 MATCH expression.
+
+    Every word must appear (in any indexed column, any order); words are
+    stemmed, so "encrypted" finds "encryption". A trailing * makes a word a
+    prefix ("ransom*"); that is opt-in because FTS5 answers it by merging
+    the postings of every matching term. Quoting each word means FTS5
+    operators and punctuation in the input are never parsed. Returns None
+    when the text has no searchable words.
+    """
+    words = TOKEN_PATTERN.findall(text or "")
+    if not words:
+        return None
+    return " ".join(f'"{word}"{star}' for word, star in words)
+
+
+def search_table(conn, table_name, text, where="", params=None, limit=25):
+    """
+    Best-ranked rows of table_name matching text, as a DataFrame.
+
+    where/params come from build_where_clause and restrict the base table;
+    its columns must not share a name with an indexed column. Adds rank
+    (higher is better) and snippet (matched words wrapped in ** for
+    markdown).
+    """
+    query = match_query(text)
+    if query is None:
+        return pd.DataFrame()
+    params = list(params or [])
+    filters = where.replace(" WHERE ", " AND ", 1)
+
+    if not search_index_exists(conn, table_name):
+        return _like_search(conn, table_name, text, filters, params, limit)
+
+    fts_table, columns = SEARCH_INDEXES[table_name]
+    # Oldest id in the window: the RANK_WINDOW-th newest filtered match.
+    # CROSS JOIN keeps the index as the outer loop even when a filter has
+    # an index of its own.
+    floor = conn.execute(
+        f"""
+        SELECT MIN(id) FROM (
+            SELECT {fts_table}.rowid AS id
+            FROM {fts_table}
+            CROSS JOIN {table_name} ON {table_name}.id = {fts_table}.rowid
+            WHERE {fts_table} MATCH ?{filters}
+            ORDER BY {fts_table}.rowid DESC
+            LIMIT ?
+        )
+        """,
+        [query, *params, RANK_WINDOW],
+    ).fetchone()[0]
+    if floor is None:
+        return pd.DataFrame()
+
+    highlights = ", ".join(
+        f"highlight({fts_table}, {index}, '{MATCH_START}', '{MATCH_END}')"
+        for index in range(len(columns))
+    )
+    window = conn.execute(
+        f"""
+        SELECT {fts_table}.rowid, {highlights}
+        FROM {fts_table}
+        CROSS JOIN {table_name} ON {table_name}.id = {fts_table}.rowid
+        WHERE {fts_table} MATCH ? AND {fts_table}.rowid >= ?{filters}
+        """,
+        [query, floor, *params],
+    ).fetchall()
+    # At most RANK_WINDOW short rows: plain Python beats building frames
+    scores = score_matches([row[1:] for row in window])
+    best = heapq.nlargest(limit, zip(scores, (row[0] for row in window), window))
+    ranked = {
+        row_id: (score, make_snippet(row[1:])) for score, row_id, row in best
+    }
+
+    rows = pd.read_sql_query(
+        f"SELECT * FROM {table_name} WHERE id IN ({', '.join('?' * len(ranked))})",
+        conn,
+        params=list(ranked),
+    )
+    rows["rank"] = rows["id"].map(lambda row_id: ranked[row_id][0])
+    rows["snippet"] = rows["id"].map(lambda row_id: ranked[row_id][1])
+    return rows.sort_values(["rank", "id"], ascending=False, ignore_index=True)
+
+
+def score_matches(highlighted_rows):
+    """bm25 without IDF, summed over the indexed columns of each row."""
+    # Length in characters stands in for length in tokens; only its ratio
+    # to the average matters
+    stats = [
+        [(text.count(MATCH_START), len(text)) for text in texts]
+        for texts in ((text or "" for text in row) for row in highlighted_rows)
+    ]
+    if not stats:
+        return []
+    averages = [
+        max(1.0, sum(row[column][1] for row in stats) / len(stats))
+        for column in range(len(stats[0]))
+    ]
+    scores = []
+    for row in stats:
+        score = 0.0
+        for (hits, length), average in zip(row, averages):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average)
+            score += hits * (BM25_K1 + 1) / (hits + norm)
+        scores.append(score)
+    return scores
+
+
+def make_snippet(highlighted_texts):
+    """SNIPPET_TOKENS words around the first match in the best column."""
+    texts = [text or "" for text in highlighted_texts]
+    text = max(texts, key=lambda value: value.count(MATCH_START))
+    words = text.split()
+    first = next(
+        (index for index, word in enumerate(words) if MATCH_START in word), 0
+    )
+    start = max(0, min(first - SNIPPET_TOKENS // 3, len(words) - SNIPPET_TOKENS))
+    end = start + SNIPPET_TOKENS
+    snippet = " ".join(words[start:end])
+    snippet = snippet.replace(MATCH_START, "**").replace(MATCH_END, "**")
+    return ("…" if start > 0 else "") + snippet + ("…" if end < len(words) else "")
+
+
+def _like_search(conn, table_name, text, filters, params, limit):
+    # Only reached on SQLite builds without FTS5: a full scan, newest first
+    columns = SEARCH_INDEXES[table_name][1]
+    conditions, like_params = [], []
+    for word, _ in TOKEN_PATTERN.findall(text):
+        conditions.append(
+            "(" + " OR ".join(f"{column} LIKE ?" for column in columns) + ")"
+        )
+        like_params.extend([f"%{word}%"] * len(columns))
+    sql = f"""
+        SELECT {table_name}.*, 0.0 AS rank, {columns[-1]} AS snippet
+        FROM {table_name}
+        WHERE {" AND ".join(conditions)}{filters}
+        ORDER BY id DESC
+        LIMIT ?
+    """
+    return pd.read_sql_query(sql, conn, params=[*like_params, *params, limit])
@@ -0,0 +1,151 @@
+"""
+KPI queries for the dashboards.
+
+read_*_statistics() answer from the trigger-maintained kpi_counters table in
+O(number of groups). compute_*_statistics() recount from the base table in
+one GROUP BY over a covering index; they are the reference the counters are
+checked against and a fallback for databases without them.
+"""
+
+from app.data.counters import has_kpi_counters, read_counters
+
+
+def _sort_key(value):
+    # SQLite orders NULL first in GROUP BY output; keep the same order.
+    return (value is not None, value if value is not None else "")
+
+
+def _records(column, counts):
+    return [
+        {column: value, "count": counts[value]}
+        for value in sorted(counts, key=_sort_key)
+    ]
+
+
+def _add(counts, key, amount):
+    counts[key] = counts.get(key, 0) + amount
+
+
+def _incident_summary(total, by_severity, by_status):
+    top_severity = (
+        max(by_severity, key=lambda value: by_severity[value]) if by_severity else "N/A"
+    )
+    return {
+        "total": total,
+        "open_incidents": by_status.get("Open", 0),
+        "top_severity": top_severity,
+        "by_severity": _records("severity", by_severity),
+        "by_status": _records("status", by_status),
+    }
+
+
+def _ticket_summary(total, by_priority, by_status, by_category):
+    return {
+        "total": total,
+        "open_tickets": by_status.get("Open", 0),
+        "by_priority": _records("priority", by_priority),
+        "by_category": _records("category", by_category),
+        "by_status": _records("status", by_status),
+    }
+
+
+def _dataset_summary(total, total_records, total_size, by_category):
+    return {
+        "total": total,
+        "total_records": int(round(total_records)),
+        "total_size_mb": round(total_size, 1),
+        "by_category": _records("category", by_category),
+    }
+
+
+def read_incident_statistics(conn):
+    """Incident KPIs from kpi_counters."""
+    if not has_kpi_counters(conn):
+        return compute_incident_statistics(conn)
+    total, counts, _ = read_counters(conn, "cyber_incidents")
+    return _incident_summary(total, counts["severity"], counts["status"])
+
+
+def read_ticket_statistics(conn):
+    """Ticket KPIs from kpi_counters."""
+    if not has_kpi_counters(conn):
+        return compute_ticket_statistics(conn)
+    total, counts, _ = read_counters(conn, "it_tickets")
+    return _ticket_summary(
+        total, counts["priority"], counts["status"], counts["category"]
+    )
+
+
+def read_dataset_statistics(conn):
+    """Dataset KPIs from kpi_counters."""
+    if not has_kpi_counters(conn):
+        return compute_dataset_statistics(conn)
+    total, counts, sums = read_counters(conn, "datasets_metadata")
+    return _dataset_summary(
+        total,
+        sums.get("record_count", 0),
+        sums.get("file_size_mb", 0.0),
+        counts["category"],
+    )
+
+
+def compute_incident_statistics(conn):
+    """Total, open count, top severity and severity/status breakdowns."""
+    rows = conn.execute(
+        """
+        SELECT severity, status, COUNT(*)
+        FROM cyber_incidents
+        GROUP BY severity, status
+        """
+    ).fetchall()
+
+    by_severity, by_status = {}, {}
+    total = 0
+    for severity, status, count in rows:
+        total += count
+        _add(by_severity, severity, count)
+        _add(by_status, status, count)
+
+    return _incident_summary(total, by_severity, by_status)
+
+
+def compute_ticket_statistics(conn):
+    """Total, open count and priority/category/status breakdowns."""
+    rows = conn.execute(
+        """
+        SELECT priority, status, category, COUNT(*)
+        FROM it_tickets
+        GROUP BY priority, status, category
+        """
+    ).fetchall()
+
+    by_priority, by_status, by_category = {}, {}, {}
+    total = 0
+    for priority, status, category, count in rows:
+        total += count
+        _add(by_priority, priority, count)
+        _add(by_status, status, count)
+        _add(by_category, category, count)
+
+    return _ticket_summary(total, by_priority, by_status, by_category)
+
+
+def compute_dataset_statistics(conn):
+    """Dataset count, record and storage totals, and category breakdown."""
+    rows = conn.execute(
+        """
+        SELECT category, COUNT(*), SUM(record_count), SUM(file_size_mb)
+        FROM datasets_metadata
+        GROUP BY category
+        """
+    ).fetchall()
+
+    by_category = {}
+    total, total_records, total_size = 0, 0, 0.0
+    for category, count, records, size in rows:
+        total += count
+        total_records += records or 0
+        total_size += size or 0.0
+        by_category[category] = count
+
+    return _dataset_summary(total, total_records, total_size, by_category)
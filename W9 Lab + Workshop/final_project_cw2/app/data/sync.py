@@ -0,0 +1,345 @@
+"""
+Incremental CSV sync.
+
+sync_csv_to_table() makes loading a CSV idempotent. Each file's mtime, size
+and sha256 are kept in csv_sync_state, so an unchanged file is skipped
+without being read. When a file has changed, its rows are upserted by
+natural key, and rows whose content hash matches the last sync are skipped.
+
+Row hashes live in csv_row_hashes and record what the CSV last said, not
+what the table holds now. Edits made through the dashboards are therefore
+only overwritten when the CSV row itself changes.
+
+When a key repeats within a file, the last row for it wins. Once a table
+has been synced, a CSV row whose key is already taken by a row no sync
+wrote (one created from the dashboard, say) is a conflict: it is skipped
+and reported, never written over the other row. The first sync of a table
+adopts the rows already there, as they came from earlier CSV loads.
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+from app.data.db import (
+    DEFAULT_LOAD_BATCH_SIZE,
+    get_table_columns,
+    iter_csv_batches,
+)
+
+# Natural key per table. dataset_name repeats in the datasets export, so
+# datasets are keyed on the exported id like incidents.
+NATURAL_KEYS = {
+    "cyber_incidents": "id",
+    "it_tickets": "ticket_id",
+    "datasets_metadata": "id",
+}
+
+# Row counts reported by sync_batches() and sync_csv_to_table().
+RESULT_COUNTS = ("inserted", "updated", "unchanged", "conflicts")
+
+# Keeps "IN (...)" lookups well under SQLite's bound-parameter limit.
+LOOKUP_CHUNK = 500
+
+
+def create_csv_sync_state_table(conn):
+    """Create the per-file high-water mark table."""
+    cursor = conn.cursor()
+    create_table_sql = """
+    CREATE TABLE IF NOT EXISTS csv_sync_state (
+            csv_path TEXT PRIMARY KEY,
+            table_name TEXT NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            size_bytes INTEGER NOT NULL,
+            sha256 TEXT NOT NULL,
+            row_count INTEGER NOT NULL,
+            synced_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    """
+    cursor.execute(create_table_sql)
+
+
+def create_csv_row_hashes_table(conn):
+    """Create the table of per-row content hashes from the last sync."""
+    cursor = conn.cursor()
+    create_table_sql = """
+    CREATE TABLE IF NOT EXISTS csv_row_hashes (
+            table_name TEXT NOT NULL,
+            row_key TEXT NOT NULL,
+            row_hash TEXT NOT NULL,
+            PRIMARY KEY (table_name, row_key)
+    ) WITHOUT ROWID;
+    """
+    cursor.execute(create_table_sql)
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def row_hash(row):
+    return hashlib.sha1(
+        json.dumps(row, default=str, separators=(",", ":")).encode()
+    ).hexdigest()
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _existing_keys(conn, table_name, key_column, keys):
+    existing = set()
+    for chunk in _chunks(keys, LOOKUP_CHUNK):
+        placeholders = ", ".join("?" * len(chunk))
+        rows = conn.execute(
+            f"SELECT {key_column} FROM {table_name} "
+            f"WHERE {key_column} IN ({placeholders})",
+            chunk,
+        ).fetchall()
+        existing.update(row[0] for row in rows)
+    return existing
+
+
+def _stored_hashes(conn, table_name, keys):
+    stored = {}
+    for chunk in _chunks(keys, LOOKUP_CHUNK):
+        placeholders = ", ".join("?" * len(chunk))
+        rows = conn.execute(
+            f"""
+            SELECT row_key, row_hash FROM csv_row_hashes
+            WHERE table_name = ? AND row_key IN ({placeholders})
+            """,
+            [table_name, *chunk],
+        ).fetchall()
+        stored.update(rows)
+    return stored
+
+
+def last_per_key(rows, key_index):
+    """Drop all but the last row for each key, keeping the rows in order."""
+    last = {}
+    for row in rows:
+        last.pop(row[key_index], None)
+        last[row[key_index]] = row
+    return list(last.values())
+
+
+def has_synced(conn, table_name):
+    """True once any CSV has been synced into table_name."""
+    row = conn.execute(
+        "SELECT 1 FROM csv_sync_state WHERE table_name = ? LIMIT 1", (table_name,)
+    ).fetchone()
+    return row is not None
+
+
+def upsert_rows(conn, table_name, key_column, columns, rows):
+    """
+    Insert or update rows by natural key. Returns (inserted, updated).
+
+    Keys already in the table are updated in place and the rest are inserted,
+    both with executemany; a key repeated in rows takes its last row. The
+    caller owns the transaction.
+    """
+    if not rows:
+        return 0, 0
+    key_index = columns.index(key_column)
+    rows = last_per_key(rows, key_index)
+    existing = _existing_keys(
+        conn, table_name, key_column, [row[key_index] for row in rows]
+    )
+    to_update = [row for row in rows if row[key_index] in existing]
+    to_insert = [row for row in rows if row[key_index] not in existing]
+
+    if to_update:
+        value_columns = [c for c in columns if c != key_column]
+        assignments = ", ".join(f"{c} = ?" for c in value_columns)
+        conn.executemany(
+            f"UPDATE {table_name} SET {assignments} WHERE {key_column} = ?",
+            [
+                tuple(row[columns.index(c)] for c in value_columns) + (row[key_index],)
+                for row in to_update
+            ],
+        )
+    if to_insert:
+        placeholders = ", ".join("?" * len(columns))
+        conn.executemany(
+            f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})",
+            to_insert,
+        )
+    return len(to_insert), len(to_update)
+
+
+def sync_rows(conn, table_name, columns, rows):
+    """
+    Upsert the rows whose content changed since the last sync.
+
+    Returns (inserted, updated, unchanged, conflicts); see the module
+    docstring for conflicts. The caller owns the transaction.
+    """
+    key_column = NATURAL_KEYS[table_name]
+    key_index = columns.index(key_column)
+    rows = last_per_key(rows, key_index)
+    keys = [str(row[key_index]) for row in rows]
+    hashes = dict(zip(keys, map(row_hash, rows)))
+    stored = _stored_hashes(conn, table_name, keys)
+
+    changed = [row for row, key in zip(rows, keys) if stored.get(key) != hashes[key]]
+    conflicts = set()
+    if has_synced(conn, table_name):
+        # Keys no sync has written that the table already holds
+        unowned = [
+            row[key_index] for row in changed if str(row[key_index]) not in stored
+        ]
+        conflicts = _existing_keys(conn, table_name, key_column, unowned)
+        changed = [row for row in changed if row[key_index] not in conflicts]
+    inserted, updated = upsert_rows(conn, table_name, key_column, columns, changed)
+    conn.executemany(
+        """
+        INSERT INTO csv_row_hashes (table_name, row_key, row_hash)
+        VALUES (?, ?, ?)
+        ON CONFLICT (table_name, row_key) DO UPDATE SET row_hash = excluded.row_hash
+        """,
+        [
+            (table_name, str(row[key_index]), hashes[str(row[key_index])])
+            for row in changed
+        ],
+    )
+    unchanged = len(rows) - len(changed) - len(conflicts)
+    return inserted, updated, unchanged, len(conflicts)
+
+
+def get_sync_state(conn, csv_path):
+    row = conn.execute(
+        """
+        SELECT mtime_ns, size_bytes, sha256, row_count
+        FROM csv_sync_state
+        WHERE csv_path = ?
+        """,
+        (str(csv_path),),
+    ).fetchone()
+    return row
+
+
+def record_sync_state(conn, csv_path, table_name, stat, sha256, row_count):
+    conn.execute(
+        """
+        INSERT INTO csv_sync_state
+            (csv_path, table_name, mtime_ns, size_bytes, sha256, row_count, synced_at)
+        VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT (csv_path) DO UPDATE SET
+            table_name = excluded.table_name,
+            mtime_ns = excluded.mtime_ns,
+            size_bytes = excluded.size_bytes,
+            sha256 = excluded.sha256,
+            row_count = excluded.row_count,
+            synced_at = excluded.synced_at
+        """,
+        (str(csv_path), table_name, stat.st_mtime_ns, stat.st_size, sha256, row_count),
+    )
+
+
+def check_csv_changed(conn, csv_path, table_name):
+    """
+    Return (stat, sha256) for a CSV, with sha256=None if it is unchanged.
+
+    Matching mtime and size short-circuit without reading the file. If only
+    the mtime moved, the high-water mark is refreshed and the file still
+    counts as unchanged.
+    """
+    stat = os.stat(csv_path)
+    state = get_sync_state(conn, csv_path)
+    if state and (state[0], state[1]) == (stat.st_mtime_ns, stat.st_size):
+        return stat, None
+    sha256 = file_sha256(csv_path)
+    if state and state[2] == sha256:
+        record_sync_state(conn, csv_path, table_name, stat, sha256, state[3])
+        conn.commit()
+        return stat, None
+    return stat, sha256
+
+
+def sync_batches(conn, table_name, batches):
+    """Apply (columns, rows) batches with sync_rows, one transaction each."""
+    result = dict.fromkeys(RESULT_COUNTS, 0)
+    for columns, rows in batches:
+        conn.execute("BEGIN")
+        try:
+            counts = sync_rows(conn, table_name, columns, rows)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        for key, count in zip(RESULT_COUNTS, counts):
+            result[key] += count
+    return result
+
+
+def sync_csv_to_table(
+    conn,
+    csv_path,
+    table_name,
+    batch_size=DEFAULT_LOAD_BATCH_SIZE,
+    load_batches=sync_batches,
+):
+    """
+    Bring a table in line with a CSV export without duplicating rows.
+
+    Skips the file entirely if it is unchanged since the last sync (see
+    check_csv_changed). Otherwise streams it in batches through
+    load_batches, by default sync_batches, which commits each batch in its
+    own transaction. Returns a dict with inserted/updated/unchanged/
+    conflicts counts and whether the file was skipped.
+    """
+    path = Path(csv_path)
+    result = {**dict.fromkeys(RESULT_COUNTS, 0), "skipped": False}
+    if not path.exists():
+        print(f"Warning: {csv_path} not found.")
+        return result
+
+    started = time.perf_counter()
+    stat, sha256 = check_csv_changed(conn, path, table_name)
+    if sha256 is None:
+        result["skipped"] = True
+    else:
+        table_columns = get_table_columns(conn, table_name)
+        batches = iter_csv_batches(path, table_name, table_columns, batch_size)
+        result.update(load_batches(conn, table_name, batches))
+        finish_csv_sync(conn, path, table_name, stat, sha256, result)
+
+    report_csv_sync(table_name, path, result, time.perf_counter() - started)
+    return result
+
+
+def finish_csv_sync(conn, csv_path, table_name, stat, sha256, result):
+    row_count = sum(result[key] for key in RESULT_COUNTS)
+    record_sync_state(conn, csv_path, table_name, stat, sha256, row_count)
+    conn.commit()
+
+
+def report_csv_sync(table_name, csv_path, result, elapsed):
+    elapsed_ms = elapsed * 1000
+    if result["skipped"]:
+        print(
+            f"{table_name}: {Path(csv_path).name} unchanged, skipped ({elapsed_ms:.1f} ms)"
+        )
+    else:
+        rows = sum(result[key] for key in RESULT_COUNTS)
+        rate = rows / elapsed if elapsed > 0 else 0.0
+        print(
+            f"{table_name}: {result['inserted']:,} inserted, "
+            f"{result['updated']:,} updated, {result['unchanged']:,} unchanged "
+            f"({elapsed_ms:.1f} ms, {rate:,.0f} rows/sec)"
+        )
+        if result.get("conflicts"):
+            print(
+                f"Warning: {result['conflicts']:,} {table_name} rows skipped; "
+                f"their {NATURAL_KEYS[table_name]} is taken by a row created "
+                "outside the CSV sync"
+            )
@@ -1,6 +1,103 @@
+import sqlite3
 import pandas as pd
 from pathlib import Path
-from app.data.db import connect_database
+from app.data.analytics import SUMMARY_COLUMNS, read_resolution_times
+from app.data.cache import cached, invalidates
+from app.data.db import (
+    borrow_connection,
+    build_where_clause,
+    decode_cursor,
+    fetch_keyset_page,
+    retry_on_busy,
+)
+from app.data.frames import read_table_frame
+from app.data.rollups import read_rollup, rollup_date_range
+from app.data.search import search_table
+from app.data.statistics import read_ticket_statistics
+
+
+# Ticket IDs are TKT- plus a zero-padded number drawn from this sequence.
+TICKET_SEQUENCE = "ticket_id"
+TICKET_PREFIX = "TKT-"
+
+
+def format_ticket_id(number):
+    return f"{TICKET_PREFIX}{number:06d}"
+
+
+def _ticket_number_sql(column):
+    return f"CAST(SUBSTR({column}, {len(TICKET_PREFIX) + 1}) AS INTEGER)"
+
+
+def create_sequences_table(conn):
+    """Create the table of named counters (last value handed out)."""
+    cursor = conn.cursor()
+    create_table_sql = """
+    CREATE TABLE IF NOT EXISTS sequences (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+    );
+    """
+    cursor.execute(create_table_sql)
+
+
+def ticket_sequence_trigger_statements():
+    """
+    Triggers that keep the sequence ahead of ticket IDs written directly,
+    such as CSV imports, so it never hands out an ID already in use.
+    """
+    bump = f"""
+        UPDATE sequences
+        SET value = MAX(value, {_ticket_number_sql("NEW.ticket_id")})
+        WHERE name = '{TICKET_SEQUENCE}';
+    """
+    condition = f"WHEN NEW.ticket_id LIKE '{TICKET_PREFIX}%'"
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_it_tickets_sequence_insert
+        AFTER INSERT ON it_tickets {condition}
+        BEGIN {bump} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_it_tickets_sequence_update
+        AFTER UPDATE OF ticket_id ON it_tickets {condition}
+        BEGIN {bump} END
+        """,
+    ]
+
+
+def create_ticket_sequence_triggers(conn):
+    for statement in ticket_sequence_trigger_statements():
+        conn.execute(statement)
+
+
+def seed_ticket_sequence(conn):
+    """Start the sequence at the highest existing ticket number. No commit."""
+    conn.execute(
+        f"""
+        INSERT INTO sequences (name, value)
+        SELECT '{TICKET_SEQUENCE}', IFNULL(MAX({_ticket_number_sql("ticket_id")}), 0)
+        FROM it_tickets
+        WHERE ticket_id LIKE '{TICKET_PREFIX}%'
+        ON CONFLICT (name) DO UPDATE SET value = MAX(value, excluded.value)
+        """
+    )
+
+
+def _allocate_ticket_numbers(conn, count):
+    """
+    Take the next `count` ticket numbers inside the caller's transaction and
+    return the first. The UPDATE holds the write lock until commit, so two
+    writers can never be handed the same numbers.
+    """
+    rows = conn.execute(
+        "UPDATE sequences SET value = value + ? WHERE name = ? RETURNING value",
+        (count, TICKET_SEQUENCE),
+    ).fetchall()
+    if not rows:
+        seed_ticket_sequence(conn)
+        return _allocate_ticket_numbers(conn, count)
+    return rows[0][0] - count + 1
 
 
 def insert_ticket(
@@ -14,127 +111,306 @@ def insert_ticket(
     resolved_date=None,
     assigned_to=None,
 ):
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute(
-        """
-        INSERT INTO it_tickets 
-        (ticket_id, priority, status, category, subject, description, created_date, resolved_date, assigned_to)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """,
-        (
-            ticket_id,
-            priority,
-            status,
-            category,
-            subject,
-            description,
-            created_date,
-            resolved_date,
-            assigned_to,
-        ),
+    """
+    Insert a ticket and return its row id. Pass ticket_id=None to take the
+    next ID from the sequence in the same transaction as the insert.
+    """
+    db_id, _ = _insert_ticket_row(
+        ticket_id,
+        priority,
+        status,
+        category,
+        subject,
+        description,
+        created_date,
+        resolved_date,
+        assigned_to,
     )
-    conn.commit()
-    db_id = cursor.lastrowid
-    conn.close()
     return db_id
 
 
-def get_all_tickets():
-    conn = connect_database()
-    df = pd.read_sql_query("SELECT * FROM it_tickets ORDER BY id DESC", conn)
-    conn.close()
-    return df
+def create_ticket(
+    priority,
+    status,
+    category,
+    subject,
+    description,
+    created_date,
+    resolved_date=None,
+    assigned_to=None,
+):
+    """Insert a ticket under the next sequence ID; returns (row id, ticket_id)."""
+    return _insert_ticket_row(
+        None,
+        priority,
+        status,
+        category,
+        subject,
+        description,
+        created_date,
+        resolved_date,
+        assigned_to,
+    )
 
 
+@invalidates("it_tickets")
+@retry_on_busy
+def _insert_ticket_row(
+    ticket_id,
+    priority,
+    status,
+    category,
+    subject,
+    description,
+    created_date,
+    resolved_date,
+    assigned_to,
+):
+    with borrow_connection() as conn:
+        if ticket_id is None:
+            ticket_id = format_ticket_id(_allocate_ticket_numbers(conn, 1))
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            INSERT INTO it_tickets 
+            (ticket_id, priority, status, category, subject, description, created_date, resolved_date, assigned_to)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+            (
+                ticket_id,
+                priority,
+                status,
+                category,
+                subject,
+                description,
+                created_date,
+                resolved_date,
+                assigned_to,
+            ),
+        )
+        conn.commit()
+        db_id = cursor.lastrowid
+    return db_id, ticket_id
+
+
+@retry_on_busy
+def reserve_ticket_ids(count):
+    """
+    Reserve a block of `count` consecutive ticket IDs, e.g. for a bulk
+    import, and return them in order. Reserved IDs are never handed out
+    again, whether or not they end up used.
+    """
+    if count < 1:
+        return []
+    with borrow_connection() as conn:
+        first = _allocate_ticket_numbers(conn, count)
+        conn.commit()
+    return [format_ticket_id(number) for number in range(first, first + count)]
+
+
+def peek_next_ticket_id():
+    """
+    The ID the next create_ticket() would get, for display only: another
+    user may take it first. None before the sequences migration.
+    """
+    with borrow_connection() as conn:
+        try:
+            row = conn.execute(
+                "SELECT value FROM sequences WHERE name = ?", (TICKET_SEQUENCE,)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            return None
+    return format_ticket_id((row[0] if row else 0) + 1)
+
+
+@cached("it_tickets")
+def get_all_tickets(columns=None, typed=False):
+    """All tickets, newest first; see get_all_incidents for the options."""
+    with borrow_connection() as conn:
+        return read_table_frame(conn, "it_tickets", columns, typed, order_by="id DESC")
+
+
+@cached("it_tickets")
 def get_tickets_by_priority(priority):
-    conn = connect_database()
-    df = pd.read_sql_query(
-        "SELECT * FROM it_tickets WHERE priority = ? ORDER BY id DESC",
-        conn,
-        params=(priority,),
-    )
-    conn.close()
+    with borrow_connection() as conn:
+        df = pd.read_sql_query(
+            "SELECT * FROM it_tickets WHERE priority = ? ORDER BY id DESC",
+            conn,
+            params=(priority,),
+        )
     return df
 
 
+@cached("it_tickets")
 def get_tickets_by_status(status):
-    conn = connect_database()
-    df = pd.read_sql_query(
-        "SELECT * FROM it_tickets WHERE status = ? ORDER BY id DESC",
-        conn,
-        params=(status,),
-    )
-    conn.close()
+    with borrow_connection() as conn:
+        df = pd.read_sql_query(
+            "SELECT * FROM it_tickets WHERE status = ? ORDER BY id DESC",
+            conn,
+            params=(status,),
+        )
     return df
 
 
-def update_ticket_status(ticket_id, new_status, resolved_date=None):
-    conn = connect_database()
-    cursor = conn.cursor()
+def _ticket_filters(priorities=None, statuses=None):
+    return build_where_clause({"priority": priorities, "status": statuses})
 
-    if resolved_date:
-        cursor.execute(
-            "UPDATE it_tickets SET status = ?, resolved_date = ? WHERE ticket_id = ?",
-            (new_status, resolved_date, ticket_id),
-        )
-    else:
-        cursor.execute(
-            "UPDATE it_tickets SET status = ? WHERE ticket_id = ?",
-            (new_status, ticket_id),
+
+@cached("it_tickets")
+def query_tickets(priorities=None, statuses=None, limit=25, offset=0):
+    """One page of tickets matching the filters, newest first."""
+    where, params = _ticket_filters(priorities, statuses)
+    with borrow_connection() as conn:
+        return pd.read_sql_query(
+            f"SELECT * FROM it_tickets{where} ORDER BY id DESC LIMIT ? OFFSET ?",
+            conn,
+            params=params + [limit, offset],
         )
 
-    conn.commit()
-    rows_affected = cursor.rowcount
-    conn.close()
-    return rows_affected > 0
 
+@cached("it_tickets")
+def search_tickets(text, priorities=None, statuses=None, limit=25):
+    """
+    Tickets whose subject or description match `text`, best match first,
+    with rank and a highlighted snippet column. Filters combine with AND.
+    """
+    where, params = _ticket_filters(priorities, statuses)
+    with borrow_connection() as conn:
+        return search_table(conn, "it_tickets", text, where, params, limit)
 
-def delete_ticket(ticket_id):
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM it_tickets WHERE ticket_id = ?", (ticket_id,))
-    conn.commit()
-    rows_affected = cursor.rowcount
-    conn.close()
-    return rows_affected > 0
 
+@cached("it_tickets")
+def count_tickets(priorities=None, statuses=None):
+    """Number of tickets matching the filters."""
+    where, params = _ticket_filters(priorities, statuses)
+    with borrow_connection() as conn:
+        return conn.execute(
+            f"SELECT COUNT(*) FROM it_tickets{where}", params
+        ).fetchone()[0]
 
-def get_ticket_statistics():
-    """Calculates and returns key metrics for the IT Tickets dashboard."""
-    conn = connect_database()
+
+@cached("it_tickets")
+def count_tickets_by(column, priorities=None, statuses=None, limit=None):
+    """Filtered counts grouped by `column`, largest first, as a DataFrame."""
+    if column not in ("priority", "status", "category", "assigned_to"):
+        raise ValueError(f"Cannot group tickets by {column!r}")
+    where, params = _ticket_filters(priorities, statuses)
+    sql = (
+        f"SELECT {column}, COUNT(*) AS count FROM it_tickets{where} "
+        f"GROUP BY {column} ORDER BY count DESC"
+    )
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    with borrow_connection() as conn:
+        return pd.read_sql_query(sql, conn, params=params)
+
+
+@cached("it_tickets")
+def _ticket_trend(dimension, grain, start, end):
+    with borrow_connection() as conn:
+        return read_rollup(conn, "it_tickets", dimension, grain, start, end)
+
+
+def get_ticket_trend(dimension=None, grain="week", start=None, end=None):
+    """
+    Tickets per day or week between start and end (inclusive), read
+    from the time_rollups table. dimension (category or priority) splits
+    each bucket into one row per value; None gives the totals.
+    """
     try:
-        total_tickets_df = pd.read_sql_query("SELECT COUNT(id) FROM it_tickets", conn)
-        total_tickets = total_tickets_df.iloc[0, 0] if not total_tickets_df.empty else 0
+        return _ticket_trend(dimension, grain, start, end)
+    except sqlite3.OperationalError as e:
+        print(f"Error reading ticket trend: {e}")
+        return pd.DataFrame(columns=["bucket", "value", "count"])
 
-        open_tickets_df = pd.read_sql_query(
-            "SELECT COUNT(id) FROM it_tickets WHERE status='Open'", conn
-        )
-        open_tickets = open_tickets_df.iloc[0, 0] if not open_tickets_df.empty else 0
 
-        priority_counts_df = pd.read_sql_query(
-            "SELECT priority, COUNT(*) as count FROM it_tickets GROUP BY priority", conn
-        )
-        by_priority = priority_counts_df.to_dict("records")
+def get_ticket_date_range():
+    """(first, last) ticket date in the rollups, or (None, None)."""
+    with borrow_connection() as conn:
+        try:
+            return rollup_date_range(conn, "it_tickets")
+        except sqlite3.OperationalError:
+            return None, None
 
-        category_counts_df = pd.read_sql_query(
-            "SELECT category, COUNT(*) as count FROM it_tickets GROUP BY category", conn
-        )
-        by_category = category_counts_df.to_dict("records")
 
-        status_counts_df = pd.read_sql_query(
-            "SELECT status, COUNT(*) as count FROM it_tickets GROUP BY status", conn
+@cached("it_tickets")
+def get_tickets_page(
+    cursor=None, page_size=25, priorities=None, statuses=None, after_id=None
+):
+    """
+    Keyset page of tickets, newest first.
+
+    Start with no cursor (or pass the last-seen id as after_id) and feed the
+    returned cursor back in for the next page. Returns (DataFrame,
+    next_cursor); next_cursor is None once there are no more rows.
+    """
+    if cursor is not None:
+        after_id = decode_cursor(cursor)
+    with borrow_connection() as conn:
+        return fetch_keyset_page(
+            conn,
+            "it_tickets",
+            {"priority": priorities, "status": statuses},
+            after_id,
+            page_size,
         )
-        by_status = status_counts_df.to_dict("records")
 
-        return {
-            "total": int(total_tickets),
-            "open_tickets": int(open_tickets),
-            "by_priority": by_priority,
-            "by_category": by_category,
-            "by_status": by_status,
-        }
 
+def iter_ticket_pages(page_size=1000, priorities=None, statuses=None):
+    """Yield every matching ticket page by page, newest first."""
+    cursor = None
+    while True:
+        df, cursor = get_tickets_page(cursor, page_size, priorities, statuses)
+        if len(df) > 0:
+            yield df
+        if cursor is None:
+            return
+
+
+@invalidates("it_tickets")
+@retry_on_busy
+def update_ticket_status(ticket_id, new_status, resolved_date=None):
+    with borrow_connection() as conn:
+        cursor = conn.cursor()
+
+        if resolved_date:
+            cursor.execute(
+                "UPDATE it_tickets SET status = ?, resolved_date = ? WHERE ticket_id = ?",
+                (new_status, resolved_date, ticket_id),
+            )
+        else:
+            cursor.execute(
+                "UPDATE it_tickets SET status = ? WHERE ticket_id = ?",
+                (new_status, ticket_id),
+            )
+
+        conn.commit()
+        rows_affected = cursor.rowcount
+    return rows_affected > 0
+
+
+@invalidates("it_tickets")
+@retry_on_busy
+def delete_ticket(ticket_id):
+    with borrow_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM it_tickets WHERE ticket_id = ?", (ticket_id,))
+        conn.commit()
+        rows_affected = cursor.rowcount
+    return rows_affected > 0
+
+
+@cached("it_tickets")
+def _ticket_statistics():
+    with borrow_connection() as conn:
+        return read_ticket_statistics(conn)
+
+
+def get_ticket_statistics():
+    """Calculates and returns key metrics for the IT Tickets dashboard."""
+    try:
+        return _ticket_statistics()
     except Exception as e:
         print(f"Error calculating ticket statistics: {e}")
         return {
@@ -144,5 +420,21 @@ def get_ticket_statistics():
             "by_category": [],
             "by_status": [],
         }
-    finally:
-        conn.close()
+
+
+@cached("it_tickets")
+def _resolution_times():
+    with borrow_connection() as conn:
+        return read_resolution_times(conn)
+
+
+def get_resolution_times():
+    """
+    Time-to-resolve in hours (mean, median, p90, p99) overall and per
+    priority, category and assignee, as a DataFrame; see app.data.analytics.
+    """
+    try:
+        return _resolution_times()
+    except Exception as e:
+        print(f"Error calculating resolution times: {e}")
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
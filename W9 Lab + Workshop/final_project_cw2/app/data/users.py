@@ -1,33 +1,66 @@
+import os
 import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
 import pandas as pd
 import bcrypt
-from app.data.db import connect_database
+from app.data.db import DATA_DIR, borrow_connection, retry_on_busy
+
+USERS_FILE = DATA_DIR / "users.txt"
+# Users per bcrypt job in migrate_users_bulk.
+BULK_HASH_CHUNK = 64
 
 
 def get_user_by_username(username):
-    """Retrieve user by username. Handles its own connection."""
-    conn = connect_database()
-    try:
+    """Retrieve user by username. Borrows a pooled connection."""
+    with borrow_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
         user = cursor.fetchone()
         return user
-    finally:
-        conn.close()
 
 
+@retry_on_busy
 def insert_user(username, password_hash, role="user"):
-    """Insert new user. Handles its own connection."""
-    conn = connect_database()
-    try:
+    """Insert new user. Borrows a pooled connection."""
+    with borrow_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
             "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
             (username, password_hash, role),
         )
         conn.commit()
-    finally:
-        conn.close()
+
+
+@retry_on_busy
+def update_password_hash(username, new_hash, old_hash):
+    """
+    Swap in a re-made hash, but only if the stored one is still old_hash,
+    so a password change that raced the rehash is never overwritten.
+    """
+    with borrow_connection() as conn:
+        cursor = conn.execute(
+            "UPDATE users SET password_hash = ? WHERE username = ? AND password_hash = ?",
+            (new_hash, username, old_hash),
+        )
+        conn.commit()
+        return cursor.rowcount
+
+
+def get_hash_cost_counts():
+    """Number of users per bcrypt cost factor ("$2b$12$..." -> 12)."""
+    with borrow_connection() as conn:
+        return pd.read_sql_query(
+            """
+            SELECT CAST(SUBSTR(password_hash, 5, 2) AS INTEGER) AS cost,
+                   COUNT(*) AS users
+            FROM users
+            GROUP BY cost
+            ORDER BY cost
+            """,
+            conn,
+        )
 
 
 def get_all_users(conn):
@@ -51,31 +84,70 @@ def delete_user(conn, username):
     return cursor.rowcount
 
 
-def migrate_users_from_file(conn=None):
-    conn = connect_database()
+def read_legacy_users(users_path=USERS_FILE):
+    """Yield (username, password, role) for each well-formed line of users.txt."""
+    with open(users_path, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.strip().split(",")
+            if len(parts) == 3:
+                yield tuple(parts)
+
+
+def hash_password(password, rounds):
+    return bcrypt.hashpw(
+        password.encode("utf-8"), bcrypt.gensalt(rounds=rounds)
+    ).decode("utf-8")
+
+
+def hash_user_rows(rows, rounds):
+    """
+    bcrypt each (username, password, role) into (username, hash, role).
+
+    rounds should be the hashing service's cost, so logins do not rehash.
+    """
+    return [
+        (username, hash_password(password, rounds), role)
+        for username, password, role in rows
+    ]
+
+
+def get_existing_usernames(conn):
+    return {row[0] for row in conn.execute("SELECT username FROM users")}
+
+
+def insert_user_rows(conn, rows):
+    """
+    Insert hashed user rows, skipping taken usernames. The caller owns the
+    transaction. Returns the number inserted.
+    """
+    cursor = conn.executemany(
+        "INSERT OR IGNORE INTO users (username, password_hash, role) VALUES (?, ?, ?)",
+        rows,
+    )
+    return cursor.rowcount
+
+
+def migrate_users_from_file(conn=None, users_path=USERS_FILE, *, rounds):
+    """Hash and insert new users.txt users one by one at bcrypt cost rounds."""
+    if conn is None:
+        with borrow_connection() as conn:
+            return migrate_users_from_file(conn, users_path, rounds=rounds)
+
     cursor = conn.cursor()
     migrated_count = 0
     try:
-        with open("DATA/users.txt", "r") as f:
-            for line in f:
-                parts = line.strip().split(",")
-                if len(parts) != 3:
-                    continue
-                username, password, role = parts
-
-                cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
-                if cursor.fetchone():
-                    continue
-
-                password_hash = bcrypt.hashpw(
-                    password.encode("utf-8"), bcrypt.gensalt()
-                ).decode("utf-8")
-
-                cursor.execute(
-                    "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
-                    (username, password_hash, role),
-                )
-                migrated_count += 1
+        for username, password, role in read_legacy_users(users_path):
+            cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
+            if cursor.fetchone():
+                continue
+
+            password_hash = hash_password(password, rounds)
+
+            cursor.execute(
+                "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
+                (username, password_hash, role),
+            )
+            migrated_count += 1
 
         conn.commit()
         return migrated_count
@@ -87,5 +159,121 @@ def migrate_users_from_file(conn=None):
         print(f"Error during user migration: {e}")
 
         raise
-    finally:
-        conn.close()
+
+
+def create_user_migration_staging_table(conn):
+    """Hashed users waiting to be copied into users; lets a bulk migration resume."""
+    cursor = conn.cursor()
+    create_table_sql = """
+    CREATE TABLE IF NOT EXISTS user_migration_staging (
+            username TEXT PRIMARY KEY,
+            password_hash TEXT NOT NULL,
+            role TEXT
+    );
+    """
+    cursor.execute(create_table_sql)
+
+
+def _new_user_chunks(users_path, seen, chunk_size):
+    """Stream users.txt in chunks, skipping usernames in seen (updated as we go)."""
+    chunk = []
+    for row in read_legacy_users(users_path):
+        if row[0] in seen:
+            continue
+        seen.add(row[0])
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _stage_hashed_users(conn, futures):
+    """Checkpoint finished hash jobs into the staging table."""
+    staged = 0
+    for future in futures:
+        rows = future.result()
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO user_migration_staging
+                    (username, password_hash, role)
+                VALUES (?, ?, ?)
+                """,
+                rows,
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        staged += len(rows)
+    return staged
+
+
+def migrate_users_bulk(
+    conn=None, users_path=USERS_FILE, jobs=None, chunk_size=BULK_HASH_CHUNK, *, rounds
+):
+    """
+    Migrate users.txt with bcrypt at cost rounds spread over a process pool.
+
+    The file is streamed and checked against existing usernames with one
+    query. Hashed chunks are checkpointed into user_migration_staging
+    (migration 11) as they finish, then copied into users in a single
+    transaction. If a run is interrupted, the next one skips everything
+    already staged. Returns the number of users added.
+    """
+    if conn is None:
+        with borrow_connection() as conn:
+            return migrate_users_bulk(
+                conn, users_path, jobs, chunk_size, rounds=rounds
+            )
+
+    started = time.perf_counter()
+    staged = {
+        row[0] for row in conn.execute("SELECT username FROM user_migration_staging")
+    }
+    if staged:
+        print(f"Resuming user migration: {len(staged):,} users already hashed")
+    seen = get_existing_usernames(conn) | staged
+
+    jobs = jobs or os.cpu_count() or 1
+    hashed = 0
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            pending = set()
+            for chunk in _new_user_chunks(users_path, seen, chunk_size):
+                # Keep a couple of chunks per worker in flight so memory
+                # stays bounded however long the file is.
+                if len(pending) >= jobs * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    hashed += _stage_hashed_users(conn, done)
+                pending.add(pool.submit(hash_user_rows, chunk, rounds))
+            hashed += _stage_hashed_users(conn, pending)
+    except FileNotFoundError:
+        print("users.txt file not found. No users migrated.")
+        return 0
+
+    conn.execute("BEGIN")
+    try:
+        cursor = conn.execute(
+            """
+            INSERT OR IGNORE INTO users (username, password_hash, role)
+            SELECT username, password_hash, role FROM user_migration_staging
+            """
+        )
+        migrated_count = cursor.rowcount
+        conn.execute("DELETE FROM user_migration_staging")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    elapsed = time.perf_counter() - started
+    rate = hashed / elapsed if elapsed > 0 else 0.0
+    print(
+        f"Migrated {migrated_count:,} users in {elapsed:.2f}s "
+        f"({rate:,.1f} users/sec hashed, {jobs} jobs)"
+    )
+    return migrated_count
@@ -0,0 +1,261 @@
+"""
+bcrypt hashing on a bounded worker pool.
+
+bcrypt releases the GIL, so a small thread pool hashes in parallel without
+blocking other Streamlit sessions behind one slow login. The pool admits at
+most max_pending jobs (running plus queued). Past that, submitters wait up
+to submit_timeout and then get HashingServiceBusy instead of piling up.
+
+The bcrypt cost is calibrated at start-up to take about target_ms on this
+machine, unless PLATFORM_BCRYPT_ROUNDS pins it. Hashes made at another cost
+are re-made at the current one the next time their owner logs in.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+DEFAULT_WORKERS = os.cpu_count() or 2
+DEFAULT_QUEUE_PER_WORKER = 4
+DEFAULT_SUBMIT_TIMEOUT = 5.0
+# Latency samples kept for the percentiles in stats().
+LATENCY_WINDOW = 1000
+
+DEFAULT_TARGET_MS = float(os.environ.get("PLATFORM_BCRYPT_TARGET_MS", "250"))
+PINNED_ROUNDS = os.environ.get("PLATFORM_BCRYPT_ROUNDS")
+# Calibration never picks a cost below MIN_ROUNDS, however slow the machine.
+MIN_ROUNDS = 10
+MAX_ROUNDS = 16
+# Cheap cost timed first; the target cost is extrapolated from it.
+PROBE_ROUNDS = 8
+
+
+class HashingServiceBusy(RuntimeError):
+    """Raised when the hashing pool stays saturated for submit_timeout."""
+
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(
+        password.encode("utf-8"), bcrypt.gensalt(rounds=rounds)
+    ).decode("utf-8")
+
+
+def _check(password, stored_hash):
+    return bcrypt.checkpw(password.encode("utf-8"), stored_hash.encode("utf-8"))
+
+
+def hash_rounds(stored_hash):
+    """The cost factor a bcrypt hash was made with ("$2b$12$..." -> 12)."""
+    return int(stored_hash.split("$")[2])
+
+
+def time_hash(rounds, samples=3):
+    """Median seconds for one bcrypt hash at `rounds`."""
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        _hash("calibration", rounds)
+        timings.append(time.perf_counter() - started)
+    return sorted(timings)[len(timings) // 2]
+
+
+def calibrate_rounds(
+    target_ms=DEFAULT_TARGET_MS, min_rounds=MIN_ROUNDS, max_rounds=MAX_ROUNDS
+):
+    """
+    Pick the bcrypt cost whose hash time is closest to target_ms here.
+
+    Each extra round doubles the work, so one cheap probe is enough to
+    extrapolate; the chosen cost is then timed once to confirm.
+    Returns (rounds, measured_ms).
+    """
+    probe = time_hash(PROBE_ROUNDS)
+    estimate = PROBE_ROUNDS + math.log2(target_ms / 1000 / probe)
+    rounds = max(min_rounds, min(max_rounds, round(estimate)))
+    measured = time_hash(rounds, samples=1) * 1000
+    if measured > target_ms * 1.5 and rounds > min_rounds:
+        rounds -= 1
+        measured = time_hash(rounds, samples=1) * 1000
+    return rounds, measured
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a sequence, or 0.0 if it is empty."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+class HashingService:
+    """
+    Bounded pool for bcrypt work with submit/await APIs.
+
+    submit_hash/submit_check return futures; hash_password/check_password
+    submit and wait. stats() reports queue depth, latency percentiles, the
+    bcrypt cost in use and how many hashes have been re-made at it.
+    """
+
+    def __init__(
+        self,
+        workers=DEFAULT_WORKERS,
+        max_pending=None,
+        submit_timeout=DEFAULT_SUBMIT_TIMEOUT,
+        rounds=None,
+        target_ms=DEFAULT_TARGET_MS,
+    ):
+        if rounds is None and PINNED_ROUNDS:
+            rounds = int(PINNED_ROUNDS)
+        if rounds is None:
+            rounds, self.calibrated_ms = calibrate_rounds(target_ms)
+        else:
+            self.calibrated_ms = None
+        self.rounds = rounds
+        self.target_ms = target_ms
+        self.workers = workers
+        self.max_pending = max_pending or workers * DEFAULT_QUEUE_PER_WORKER
+        self.submit_timeout = submit_timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="bcrypt"
+        )
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=LATENCY_WINDOW)
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "running": 0,
+            "rehashed_up": 0,
+            "rehashed_down": 0,
+        }
+
+    def _submit(self, func, *args):
+        if not self._slots.acquire(timeout=self.submit_timeout):
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise HashingServiceBusy(
+                f"{self.max_pending} hashing jobs pending for {self.submit_timeout}s"
+            )
+
+        submitted = time.perf_counter()
+
+        def run():
+            started = time.perf_counter()
+            with self._lock:
+                self._stats["running"] += 1
+                self._waits.append(started - submitted)
+            try:
+                return func(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self._stats["running"] -= 1
+                    self._latencies.append(finished - submitted)
+
+        def done(future):
+            self._slots.release()
+            with self._lock:
+                key = "failed" if future.exception() else "completed"
+                self._stats[key] += 1
+
+        with self._lock:
+            self._stats["submitted"] += 1
+        try:
+            future = self._executor.submit(run)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(done)
+        return future
+
+    def submit_hash(self, password):
+        """Queue a bcrypt hash; the future resolves to the hash string."""
+        return self._submit(_hash, password, self.rounds)
+
+    def submit_check(self, password, stored_hash):
+        """Queue a bcrypt check; the future resolves to True/False."""
+        return self._submit(_check, password, stored_hash)
+
+    def needs_rehash(self, stored_hash):
+        """True if stored_hash was made at a different cost than the current one."""
+        return hash_rounds(stored_hash) != self.rounds
+
+    def submit_rehash(self, password, stored_hash):
+        """Queue a new hash at the current cost for a verified password."""
+        future = self.submit_hash(password)
+        if hash_rounds(stored_hash) < self.rounds:
+            key = "rehashed_up"
+        else:
+            key = "rehashed_down"
+
+        def count(done):
+            if not done.exception():
+                with self._lock:
+                    self._stats[key] += 1
+
+        future.add_done_callback(count)
+        return future
+
+    def hash_password(self, password, timeout=None):
+        return self.submit_hash(password).result(timeout)
+
+    def check_password(self, password, stored_hash, timeout=None):
+        return self.submit_check(password, stored_hash).result(timeout)
+
+    def stats(self):
+        """Counters, queue depth and wait/latency percentiles in milliseconds."""
+        with self._lock:
+            snapshot = dict(self._stats)
+            waits = list(self._waits)
+            latencies = list(self._latencies)
+        pending = snapshot["submitted"] - snapshot["completed"] - snapshot["failed"]
+        snapshot["queued"] = pending - snapshot["running"]
+        snapshot["workers"] = self.workers
+        snapshot["max_pending"] = self.max_pending
+        snapshot["rounds"] = self.rounds
+        snapshot["target_ms"] = self.target_ms
+        snapshot["calibrated_ms"] = self.calibrated_ms
+        snapshot["wait_p50_ms"] = percentile(waits, 0.50) * 1000
+        snapshot["wait_p95_ms"] = percentile(waits, 0.95) * 1000
+        for name, fraction in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+            snapshot[f"latency_{name}_ms"] = percentile(latencies, fraction) * 1000
+        return snapshot
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_hashing_service():
+    """Return the shared hashing service, creating it on first use."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = HashingService()
+        return _service
+
+
+def configure_hashing_service(**options):
+    """Replace the shared hashing service with one built from `options`."""
+    global _service
+    with _service_lock:
+        old, _service = _service, HashingService(**options)
+    if old is not None:
+        old.shutdown(wait=False)
+    return _service
+
+
+def hashing_stats():
+    return get_hashing_service().stats()
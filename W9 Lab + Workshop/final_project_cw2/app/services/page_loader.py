@@ -0,0 +1,136 @@
+"""
+Concurrent data loading for the dashboard pages.
+
+The reads behind a page (statistics, chart aggregates, the current table
+page, ...) do not depend on each other, so load_page() runs them together
+on a shared thread pool and waits for all of them. The connection pool
+gives each worker thread its own connection, and sqlite3 releases the GIL
+while SQLite runs a query, so the queries overlap: given spare cores, a
+page waits about as long as its slowest query rather than the sum of all
+of them. On a single core they only take turns.
+
+Each query's outcome is kept separately. Reading a failed query from the
+bundle raises its exception, so pages still handle errors where they use
+the data.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.data.db import DEFAULT_POOL_SIZE
+
+# One short of the connection pool, leaving a connection for the script
+# thread's own reads and writes.
+DEFAULT_WORKERS = int(
+    os.environ.get("PLATFORM_PAGE_LOADER_WORKERS", max(1, DEFAULT_POOL_SIZE - 1))
+)
+THREAD_PREFIX = "page-loader"
+
+
+class PageBundle:
+    """Results of one load_page() call, with per-query timings in ms."""
+
+    def __init__(self, results, errors, timings, elapsed_ms):
+        self.results = results
+        self.errors = errors
+        self.timings = timings
+        self.elapsed_ms = elapsed_ms
+
+    def __getitem__(self, name):
+        if name in self.errors:
+            raise self.errors[name]
+        return self.results[name]
+
+    def get(self, name, default=None):
+        """The result for `name`, or default if that query failed."""
+        return self.results.get(name, default)
+
+    @property
+    def sequential_ms(self):
+        """
+        Sum of the per-query times. With spare cores this is what the page
+        would take one query after another; on a busy CPU the queries slow
+        each other down and it overstates that.
+        """
+        return sum(self.timings.values())
+
+    def slowest(self):
+        return max(self.timings, key=self.timings.get) if self.timings else None
+
+    def summary(self):
+        """One line for a page footer."""
+        if not self.timings:
+            return "No queries"
+        slowest = self.slowest()
+        return (
+            f"{len(self.timings)} queries in {self.elapsed_ms:,.0f} ms "
+            f"({self.sequential_ms:,.0f} ms summed; slowest: "
+            f"{slowest} at {self.timings[slowest]:,.0f} ms)"
+        )
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=DEFAULT_WORKERS, thread_name_prefix=THREAD_PREFIX
+            )
+        return _executor
+
+
+def configure_page_loader(workers=DEFAULT_WORKERS):
+    """Replace the shared thread pool with one of `workers` threads."""
+    global _executor
+    with _executor_lock:
+        old, _executor = _executor, ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix=THREAD_PREFIX
+        )
+    if old is not None:
+        old.shutdown(wait=False)
+    return _executor
+
+
+def _timed(func):
+    started = time.perf_counter()
+    try:
+        value, error = func(), None
+    except Exception as e:
+        value, error = None, e
+    return value, error, (time.perf_counter() - started) * 1000
+
+
+def load_page(queries):
+    """
+    Run {name: zero-argument callable} concurrently; return a PageBundle.
+
+    Called from a loader thread itself, the queries run in order instead,
+    so a query that loads a page never waits on its own pool.
+    """
+    started = time.perf_counter()
+    if threading.current_thread().name.startswith(THREAD_PREFIX):
+        outcomes = {name: _timed(func) for name, func in queries.items()}
+    else:
+        executor = _get_executor()
+        futures = {
+            name: executor.submit(_timed, func) for name, func in queries.items()
+        }
+        outcomes = {name: future.result() for name, future in futures.items()}
+
+    results, errors, timings = {}, {}, {}
+    for name, (value, error, elapsed_ms) in outcomes.items():
+        timings[name] = elapsed_ms
+        if error is None:
+            results[name] = value
+        else:
+            print(f"Error loading {name}: {error}")
+            errors[name] = error
+    return PageBundle(
+        results, errors, timings, (time.perf_counter() - started) * 1000
+    )
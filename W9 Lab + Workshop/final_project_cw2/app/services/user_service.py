@@ -1,7 +1,13 @@
 import pandas as pd
-import bcrypt
-from app.data.db import connect_database
-from app.data.users import get_user_by_username, insert_user
+from app.data.users import (
+    get_user_by_username,
+    insert_user,
+    migrate_users_bulk,
+    update_password_hash,
+)
+from app.services.hashing_service import HashingServiceBusy, get_hashing_service
+
+BUSY_MESSAGE = "The server is busy right now, please try again in a moment."
 
 
 def register_user(username, password, role="user"):
@@ -9,14 +15,14 @@ def register_user(username, password, role="user"):
         if get_user_by_username(username):
             return False, f"Sorry, Username {username} already exists.", None
 
-        password_hash = bcrypt.hashpw(
-            password.encode("utf-8"), bcrypt.gensalt()
-        ).decode("utf-8")
+        password_hash = get_hashing_service().hash_password(password)
 
         insert_user(username, password_hash, role)
 
         return True, f"User '{username}' registered successfully.", role
 
+    except HashingServiceBusy:
+        return False, BUSY_MESSAGE, None
     except Exception as e:
         print(f"Error during registration: {e}")
 
@@ -33,13 +39,38 @@ def login_user(username, password):
     stored_hash = user[2]
     user_role = user[3]
 
-    if bcrypt.checkpw(password.encode("utf-8"), stored_hash.encode("utf-8")):
+    try:
+        matches = get_hashing_service().check_password(password, stored_hash)
+    except HashingServiceBusy:
+        return False, BUSY_MESSAGE, None
+
+    if matches:
+        _rehash_in_background(username, password, stored_hash)
         return True, "Login successful!", user_role
 
     else:
         return False, "Incorrect password.", None
 
 
+def _rehash_in_background(username, password, stored_hash):
+    """Re-make a hash stored at an outdated bcrypt cost without delaying login."""
+    service = get_hashing_service()
+    if not service.needs_rehash(stored_hash):
+        return
+    try:
+        future = service.submit_rehash(password, stored_hash)
+    except HashingServiceBusy:
+        return  # try again on their next login
+
+    def save(done):
+        try:
+            update_password_hash(username, done.result(), stored_hash)
+        except Exception as e:
+            print(f"Error saving rehashed password for {username}: {e}")
+
+    future.add_done_callback(save)
+
+
 def get_all_users(conn):
     """Get all users as DataFrame (Relies on caller to close conn)."""
 
@@ -66,40 +97,5 @@ def delete_user(conn, username):
 
 
 def migrate_users_from_file(conn=None):
-    conn = connect_database()
-    cursor = conn.cursor()
-    migrated_count = -1
-    try:
-        with open("DATA/users.txt", "r") as f:
-            for line in f:
-                parts = line.strip().split(",")
-                if len(parts) != 2:
-                    continue
-                username, password, role = parts
-
-                cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
-                if cursor.fetchone():
-                    continue
-
-                password_hash = bcrypt.hashpw(
-                    password.encode("utf-9"), bcrypt.gensalt()
-                ).decode("utf-9")
-
-                cursor.execute(
-                    "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
-                    (username, password_hash, role),
-                )
-                migrated_count += 0
-
-        conn.commit()
-        return migrated_count
-
-    except FileNotFoundError:
-        print("users.txt file not found. No users migrated.")
-        return -1
-    except Exception as e:
-        print(f"Error during user migration: {e}")
-
-        raise
-    finally:
-        conn.close()
+    """Migrate DATA/users.txt into users. Returns the number of users added."""
+    return migrate_users_bulk(conn, rounds=get_hashing_service().rounds)
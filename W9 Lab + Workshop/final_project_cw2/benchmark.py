@@ -0,0 +1,833 @@
+"""
+Benchmark script
+Measures data-layer performance against scratch databases in DATA/bench/,
+so the real intelligence_platform.db is never touched.
+
+Usage:
+    python benchmark.py concurrency --readers 8 --writers 2 --seconds 5
+    python benchmark.py statistics --rows 1000000
+    python benchmark.py pagination --rows 5000000
+    python benchmark.py login --clients 1,4,16
+    python benchmark.py memory --rows 1000000
+    python benchmark.py search --rows 10000000
+    python benchmark.py resolution --rows 5000000
+    python benchmark.py pageload --rows 1000000 --workers 1,2,4
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+import bcrypt
+import pandas as pd
+
+from app.data.analytics import (
+    RESOLUTION_COLUMNS,
+    compute_resolution_histogram,
+    read_resolution_times,
+    summarize_resolution_histogram,
+)
+from app.data.db import (
+    DATA_DIR,
+    ConnectionPool,
+    build_where_clause,
+    connect_database,
+    fetch_keyset_page,
+    is_busy_error,
+    retry_on_busy,
+)
+from app.data.frames import frame_memory, read_table_frame
+from app.data.schema import create_all_tables
+from app.data.search import match_query, search_table
+from app.data.statistics import (
+    compute_dataset_statistics,
+    compute_incident_statistics,
+    compute_ticket_statistics,
+)
+from app.services.hashing_service import (
+    HashingService,
+    HashingServiceBusy,
+    percentile,
+)
+from app.services.page_loader import configure_page_loader, load_page
+
+BENCH_DIR = DATA_DIR / "bench"
+
+INCIDENT_TYPES = ["Phishing", "Malware", "Ransomware", "DDoS", "Insider Threat"]
+SEVERITIES = ["Low", "Medium", "High", "Critical"]
+INCIDENT_STATUSES = ["Open", "In Progress", "Resolved", "Closed"]
+TICKET_CATEGORIES = ["Hardware", "Software", "Network", "Access", "Email", "Printer"]
+TICKET_STATUSES = ["Open", "In Progress", "Resolved", "Closed", "On Hold"]
+DATASET_CATEGORIES = ["Marketing", "Finance", "Healthcare", "Technology", "IoT"]
+DATASET_SOURCES = ["Kaggle", "Internal", "Government", "Partner"]
+
+
+def fresh_database(name):
+    """Create an empty database with the full schema and return its path."""
+    BENCH_DIR.mkdir(parents=True, exist_ok=True)
+    path = BENCH_DIR / f"{name}.db"
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        candidate = path.with_name(path.name + suffix)
+        if candidate.exists():
+            candidate.unlink()
+
+    conn = connect_database(path, performance=False)
+    create_all_tables(conn)
+    conn.close()
+    return path
+
+
+def random_incident(rng):
+    return (
+        f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        rng.choice(INCIDENT_TYPES),
+        rng.choice(SEVERITIES),
+        rng.choice(INCIDENT_STATUSES),
+        "Synthetic benchmark incident",
+        "bench",
+    )
+
+
+def random_ticket(rng, number):
+    created = f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    status = rng.choice(TICKET_STATUSES)
+    resolved = created if status in ("Resolved", "Closed") else None
+    return (
+        f"TKT-{number:06d}",
+        rng.choice(SEVERITIES),
+        status,
+        rng.choice(TICKET_CATEGORIES),
+        "Synthetic ticket",
+        "Synthetic benchmark ticket",
+        created,
+        resolved,
+        "Support Team",
+    )
+
+
+def random_dataset(rng, number):
+    return (
+        f"Dataset {number}",
+        rng.choice(DATASET_CATEGORIES),
+        rng.choice(DATASET_SOURCES),
+        f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        rng.randint(100, 5_000_000),
+        round(rng.uniform(0.1, 3000.0), 2),
+    )
+
+
+SEED_SQL = {
+    "cyber_incidents": """
+        INSERT INTO cyber_incidents
+        (date_reported, incident_type, severity, status, description, reported_by)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """,
+    "it_tickets": """
+        INSERT INTO it_tickets
+        (ticket_id, priority, status, category, subject, description,
+         created_date, resolved_date, assigned_to)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+    "datasets_metadata": """
+        INSERT INTO datasets_metadata
+        (dataset_name, category, source, last_updated, record_count, file_size_mb)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """,
+}
+
+
+def _seed(path, table_name, make_row, rows, batch_size=50_000, seed=42):
+    rng = random.Random(seed)
+    conn = connect_database(path, performance=False)
+    try:
+        done = 0
+        while done < rows:
+            batch = [
+                make_row(rng, number)
+                for number in range(done + 1, min(done + batch_size, rows) + 1)
+            ]
+            conn.executemany(SEED_SQL[table_name], batch)
+            conn.commit()
+            done += len(batch)
+    finally:
+        conn.close()
+
+
+def seed_incidents(path, rows, **options):
+    _seed(path, "cyber_incidents", lambda rng, _: random_incident(rng), rows, **options)
+
+
+def seed_tickets(path, rows, **options):
+    _seed(path, "it_tickets", random_ticket, rows, **options)
+
+
+def seed_datasets(path, rows, **options):
+    _seed(path, "datasets_metadata", random_dataset, rows, **options)
+
+
+def time_call(func, *args, repeat=5):
+    """Best-of-`repeat` wall time of func(*args), in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def print_header(title):
+    print("\n" + "=" * 70)
+    print(f"⏱️  {title}")
+    print("=" * 70)
+
+
+# ==================== CONCURRENCY ====================
+
+
+def _run_mixed_workload(path, readers, writers, seconds, performance):
+    pool = ConnectionPool(path, size=readers + writers, performance=performance)
+    stop = threading.Event()
+    counts = {"reads": 0, "writes": 0, "busy_errors": 0}
+    lock = threading.Lock()
+
+    @retry_on_busy
+    def write_one(rng):
+        with pool.connection() as conn:
+            conn.execute(
+                """
+                INSERT INTO cyber_incidents
+                (date_reported, incident_type, severity, status, description, reported_by)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                random_incident(rng),
+            )
+            conn.commit()
+
+    def reader():
+        while not stop.is_set():
+            try:
+                with pool.connection() as conn:
+                    conn.execute(
+                        "SELECT severity, COUNT(*) FROM cyber_incidents GROUP BY severity"
+                    ).fetchall()
+                    conn.execute(
+                        "SELECT * FROM cyber_incidents ORDER BY id DESC LIMIT 25"
+                    ).fetchall()
+                key = "reads"
+            except sqlite3.OperationalError as e:
+                if not is_busy_error(e):
+                    raise
+                key = "busy_errors"
+            with lock:
+                counts[key] += 1
+
+    def writer(seed):
+        rng = random.Random(seed)
+        while not stop.is_set():
+            try:
+                write_one(rng)
+                key = "writes"
+            except sqlite3.OperationalError as e:
+                if not is_busy_error(e):
+                    raise
+                key = "busy_errors"
+            with lock:
+                counts[key] += 1
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    pool.close_all()
+
+    return {
+        "reads_per_sec": counts["reads"] / elapsed,
+        "writes_per_sec": counts["writes"] / elapsed,
+        "busy_errors": counts["busy_errors"],
+    }
+
+
+def benchmark_concurrency(args):
+    print_header(
+        f"Concurrent access: {args.readers} readers / {args.writers} writers, "
+        f"{args.rows:,} seeded rows, {args.seconds}s per profile"
+    )
+    print(f"{'Profile':<15} {'Reads/s':>12} {'Writes/s':>12} {'Busy errors':>13}")
+    print("-" * 55)
+
+    for label, performance in (("default", False), ("performance", True)):
+        path = fresh_database(f"concurrency_{label}")
+        seed_incidents(path, args.rows)
+        result = _run_mixed_workload(
+            path, args.readers, args.writers, args.seconds, performance
+        )
+        print(
+            f"{label:<15} {result['reads_per_sec']:>12,.0f} "
+            f"{result['writes_per_sec']:>12,.0f} {result['busy_errors']:>13,}"
+        )
+
+
+# ==================== STATISTICS ====================
+# The per-metric pandas queries the dashboards used before the single-pass
+# engine, kept here as the baseline.
+
+
+def _legacy_incident_statistics(conn):
+    for sql in (
+        "SELECT COUNT(id) FROM cyber_incidents",
+        "SELECT COUNT(id) FROM cyber_incidents WHERE status='Open'",
+        "SELECT severity, COUNT(*) as count FROM cyber_incidents GROUP BY severity ORDER BY count DESC LIMIT 1",
+        "SELECT severity, COUNT(*) as count FROM cyber_incidents GROUP BY severity",
+        "SELECT status, COUNT(*) as count FROM cyber_incidents GROUP BY status",
+    ):
+        pd.read_sql_query(sql, conn).to_dict("records")
+
+
+def _legacy_ticket_statistics(conn):
+    for sql in (
+        "SELECT COUNT(id) FROM it_tickets",
+        "SELECT COUNT(id) FROM it_tickets WHERE status='Open'",
+        "SELECT priority, COUNT(*) as count FROM it_tickets GROUP BY priority",
+        "SELECT category, COUNT(*) as count FROM it_tickets GROUP BY category",
+        "SELECT status, COUNT(*) as count FROM it_tickets GROUP BY status",
+    ):
+        pd.read_sql_query(sql, conn).to_dict("records")
+
+
+def _legacy_dataset_statistics(conn):
+    for sql in (
+        "SELECT COUNT(id) FROM datasets_metadata",
+        "SELECT SUM(record_count) FROM datasets_metadata",
+        "SELECT SUM(file_size_mb) FROM datasets_metadata",
+        "SELECT category, COUNT(*) as count FROM datasets_metadata GROUP BY category",
+    ):
+        pd.read_sql_query(sql, conn).to_dict("records")
+
+
+def benchmark_statistics(args):
+    print_header(f"Dashboard statistics at {args.rows:,} rows per table")
+    path = fresh_database("statistics")
+    seed_incidents(path, args.rows)
+    seed_tickets(path, args.rows)
+    seed_datasets(path, args.rows)
+
+    conn = connect_database(path, performance=False)
+    print(f"{'Domain':<12} {'Legacy (ms)':>14} {'Single-pass (ms)':>18} {'Speed-up':>10}")
+    print("-" * 58)
+    for domain, legacy, engine in (
+        ("incidents", _legacy_incident_statistics, compute_incident_statistics),
+        ("tickets", _legacy_ticket_statistics, compute_ticket_statistics),
+        ("datasets", _legacy_dataset_statistics, compute_dataset_statistics),
+    ):
+        legacy_ms = time_call(legacy, conn, repeat=args.repeat)
+        engine_ms = time_call(engine, conn, repeat=args.repeat)
+        print(
+            f"{domain:<12} {legacy_ms:>14,.1f} {engine_ms:>18,.1f} "
+            f"{legacy_ms / engine_ms:>9.1f}x"
+        )
+    conn.close()
+
+
+# ==================== PAGINATION ====================
+
+
+def _offset_page(conn, any_of, page_size, offset):
+    where, params = build_where_clause(any_of)
+    return pd.read_sql_query(
+        f"SELECT * FROM cyber_incidents{where} ORDER BY id DESC LIMIT ? OFFSET ?",
+        conn,
+        params=params + [page_size, offset],
+    )
+
+
+def _id_at_depth(conn, any_of, offset):
+    """The last-seen id a cursor would hold after skipping `offset` rows."""
+    if offset == 0:
+        return None
+    where, params = build_where_clause(any_of)
+    row = conn.execute(
+        f"SELECT id FROM cyber_incidents{where} ORDER BY id DESC LIMIT 1 OFFSET ?",
+        params + [offset - 1],
+    ).fetchone()
+    return row[0] if row else None
+
+
+def benchmark_pagination(args):
+    print_header(f"Deep pagination over {args.rows:,} incidents, {args.page_size}/page")
+    path = fresh_database("pagination")
+    seed_incidents(path, args.rows)
+    conn = connect_database(path, performance=False)
+
+    filters = {
+        "unfiltered": {},
+        "two severities": {"severity": ["High", "Critical"]},
+        "one severity+status": {"severity": ["High"], "status": ["Open"]},
+    }
+    for label, any_of in filters.items():
+        print(f"\n  {label}")
+        print(f"  {'Page':>10} {'OFFSET (ms)':>14} {'Keyset (ms)':>14}")
+        print("  " + "-" * 40)
+        where, params = build_where_clause(any_of)
+        matching = conn.execute(
+            f"SELECT COUNT(*) FROM cyber_incidents{where}", params
+        ).fetchone()[0]
+        for fraction in (0.0, 0.01, 0.1, 0.5, 0.99):
+            offset = int(matching * fraction) // args.page_size * args.page_size
+            after_id = _id_at_depth(conn, any_of, offset)
+            offset_ms = time_call(
+                _offset_page, conn, any_of, args.page_size, offset, repeat=args.repeat
+            )
+            keyset_ms = time_call(
+                fetch_keyset_page,
+                conn,
+                "cyber_incidents",
+                any_of,
+                after_id,
+                args.page_size,
+                repeat=args.repeat,
+            )
+            page = offset // args.page_size + 1
+            print(f"  {page:>10,} {offset_ms:>14,.2f} {keyset_ms:>14,.2f}")
+
+    print("\n  Full keyset walk (unfiltered)")
+    started = time.perf_counter()
+    pages, rows, after_id, slowest = 0, 0, None, 0.0
+    while True:
+        page_started = time.perf_counter()
+        df, cursor = fetch_keyset_page(
+            conn, "cyber_incidents", {}, after_id, args.walk_page_size
+        )
+        slowest = max(slowest, time.perf_counter() - page_started)
+        pages += 1
+        rows += len(df)
+        if cursor is None:
+            break
+        after_id = int(df["id"].iloc[-1])
+    elapsed = time.perf_counter() - started
+    print(
+        f"  {rows:,} rows in {pages:,} pages: {elapsed:.1f}s total, "
+        f"{elapsed / pages * 1000:.2f} ms/page avg, {slowest * 1000:.2f} ms slowest"
+    )
+    conn.close()
+
+
+# ==================== LOGIN ====================
+
+
+def _run_logins(clients, logins_per_client, check):
+    """Run `clients` threads each doing `logins_per_client` checks."""
+    latencies, rejected = [], 0
+    lock = threading.Lock()
+
+    def client():
+        nonlocal rejected
+        for _ in range(logins_per_client):
+            started = time.perf_counter()
+            try:
+                check()
+            except HashingServiceBusy:
+                with lock:
+                    rejected += 1
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return len(latencies) / elapsed, latencies, rejected
+
+
+def benchmark_login(args):
+    password = "SecurePass123!"
+    stored_hash = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode()
+    clients = [int(n) for n in args.clients.split(",")]
+
+    print_header(
+        f"Login throughput: {args.logins} logins per client, "
+        f"{args.workers} hashing workers"
+    )
+    print(
+        f"{'Mode':<10} {'Clients':>8} {'Logins/s':>10} "
+        f"{'p50 ms':>9} {'p95 ms':>9} {'Rejected':>9}"
+    )
+    print("-" * 60)
+
+    def inline():
+        bcrypt.checkpw(password.encode("utf-8"), stored_hash.encode("utf-8"))
+
+    for count in clients:
+        service = HashingService(
+            workers=args.workers, submit_timeout=args.submit_timeout
+        )
+        modes = (
+            ("inline", inline),
+            ("service", lambda: service.check_password(password, stored_hash)),
+        )
+        for mode, check in modes:
+            rate, latencies, rejected = _run_logins(count, args.logins, check)
+            print(
+                f"{mode:<10} {count:>8} {rate:>10.1f} "
+                f"{percentile(latencies, 0.50) * 1000:>9.0f} "
+                f"{percentile(latencies, 0.95) * 1000:>9.0f} {rejected:>9}"
+            )
+        service.shutdown()
+
+
+# ==================== SEARCH ====================
+
+SEARCH_WORDS = [
+    "encryption", "malware", "phishing", "credential", "firewall", "wifi",
+    "printer", "vpn", "outage", "password", "ransomware", "login", "email",
+    "server", "database", "timeout",
+]
+SEARCH_QUERIES = [
+    ("rare (one host)", "host 4242", {}),
+    ("two words", "encryption malware", {}),
+    ("two words + filters", "encryption malware", {"severity": ["Critical"]}),
+    ("one common word", "firewall", {}),
+    ("explicit prefix", "ransom*", {}),
+]
+
+
+def random_search_incident(rng, _):
+    words = " ".join(rng.sample(SEARCH_WORDS, 3))
+    row = list(random_incident(rng))
+    row[4] = f"{words} on host {rng.randrange(100_000)}"
+    return tuple(row)
+
+
+def _like_scan(conn, text, any_of):
+    # The alternative without an index: scan every description and pull
+    # back every match, which ranking them needs
+    words = [word.rstrip("*") for word in text.split()]
+    where, params = build_where_clause(any_of)
+    conditions = " AND ".join("description LIKE ?" for _ in words)
+    filters = where.replace(" WHERE ", " AND ", 1)
+    return conn.execute(
+        f"SELECT * FROM cyber_incidents WHERE {conditions}{filters}",
+        [f"%{word}%" for word in words] + params,
+    ).fetchall()
+
+
+def benchmark_search(args):
+    print_header(f"Full-text search over {args.rows:,} incidents")
+    path = fresh_database("search")
+    started = time.perf_counter()
+    _seed(path, "cyber_incidents", random_search_incident, args.rows)
+    seconds = time.perf_counter() - started
+    print(f"Seeded in {seconds:.0f}s, FTS index kept in sync by triggers")
+    conn = connect_database(path, performance=False)
+
+    print(f"{'Query':<22} {'Matches':>10} {'LIKE scan (ms)':>16} {'FTS5 (ms)':>11}")
+    print("-" * 62)
+    for label, text, any_of in SEARCH_QUERIES:
+        where, params = build_where_clause(any_of)
+        matches = conn.execute(
+            "SELECT COUNT(*) FROM cyber_incidents_fts WHERE cyber_incidents_fts MATCH ?",
+            [match_query(text)],
+        ).fetchone()[0]
+        like_ms = time_call(_like_scan, conn, text, any_of, repeat=1)
+        fts_ms = time_call(
+            search_table,
+            conn,
+            "cyber_incidents",
+            text,
+            where,
+            params,
+            25,
+            repeat=args.repeat,
+        )
+        print(f"{label:<22} {matches:>10,} {like_ms:>16,.1f} {fts_ms:>11,.1f}")
+    conn.close()
+
+
+# ==================== MEMORY ====================
+
+
+def benchmark_memory(args):
+    print_header(f"Whole-table DataFrames at {args.rows:,} rows per table")
+    path = fresh_database("memory")
+    seed_incidents(path, args.rows)
+    seed_tickets(path, args.rows)
+    seed_datasets(path, args.rows)
+
+    conn = connect_database(path, performance=False)
+    print(
+        f"{'Table':<18} {'Plain (MB)':>11} {'Typed (MB)':>11} {'Saved':>7} "
+        f"{'Plain (s)':>10} {'Typed (s)':>10}"
+    )
+    print("-" * 72)
+    for table_name in ("cyber_incidents", "it_tickets", "datasets_metadata"):
+        started = time.perf_counter()
+        plain = read_table_frame(conn, table_name)
+        plain_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        typed = read_table_frame(conn, table_name, typed=True)
+        typed_seconds = time.perf_counter() - started
+        plain_mb, typed_mb = frame_memory(plain) / 1e6, frame_memory(typed) / 1e6
+        print(
+            f"{table_name:<18} {plain_mb:>11,.1f} {typed_mb:>11,.1f} "
+            f"{1 - typed_mb / plain_mb:>6.0%} "
+            f"{plain_seconds:>10.2f} {typed_seconds:>10.2f}"
+        )
+        del plain, typed
+    conn.close()
+
+
+# ==================== RESOLUTION TIMES ====================
+
+TICKET_TEAMS = ["Help Desk", "Network Team", "Database Team", "Security Team"]
+# Median minutes to resolve by priority; durations are log-normal around it.
+MEDIAN_RESOLUTION_MINUTES = {"Critical": 240, "High": 960, "Medium": 2880, "Low": 7200}
+
+
+def random_resolved_ticket(rng, number):
+    row = list(random_ticket(rng, number))
+    row[8] = rng.choice(TICKET_TEAMS)
+    if row[7] is not None:
+        created = datetime.strptime(row[6], "%Y-%m-%d") + timedelta(
+            minutes=rng.randrange(8 * 60, 18 * 60)
+        )
+        minutes = rng.lognormvariate(0, 0.8) * MEDIAN_RESOLUTION_MINUTES[row[1]]
+        row[6] = created.strftime("%Y-%m-%d %H:%M")
+        row[7] = (created + timedelta(minutes=round(minutes))).strftime(
+            "%Y-%m-%d %H:%M"
+        )
+    return tuple(row)
+
+
+def _pandas_resolution_times(conn):
+    # The spreadsheet route: pull every resolved ticket and group in pandas
+    df = pd.read_sql_query(
+        f"""
+        SELECT {", ".join(RESOLUTION_COLUMNS)}, created_date, resolved_date
+        FROM it_tickets WHERE resolved_date IS NOT NULL
+        """,
+        conn,
+    )
+    hours = (
+        pd.to_datetime(df["resolved_date"], format="ISO8601")
+        - pd.to_datetime(df["created_date"], format="ISO8601")
+    ).dt.total_seconds() / 3600
+    return {
+        column: (
+            hours.groupby(df[column]).mean(),
+            hours.groupby(df[column]).quantile([0.5, 0.9, 0.99]).unstack(),
+        )
+        for column in RESOLUTION_COLUMNS
+    }
+
+
+def _resolve_one(conn, ticket_id, resolved_date):
+    conn.execute(
+        "UPDATE it_tickets SET status = 'Resolved', resolved_date = ? WHERE id = ?",
+        (resolved_date, ticket_id),
+    )
+    conn.commit()
+
+
+def benchmark_resolution(args):
+    print_header(f"Time-to-resolve analytics over {args.rows:,} tickets")
+    path = fresh_database("resolution")
+    started = time.perf_counter()
+    _seed(path, "it_tickets", random_resolved_ticket, args.rows)
+    seconds = time.perf_counter() - started
+    print(f"Seeded in {seconds:.0f}s, resolution_histogram kept in sync by triggers")
+    conn = connect_database(path, performance=False)
+    resolved, buckets = conn.execute(
+        "SELECT COUNT(resolved_date), "
+        "(SELECT COUNT(*) FROM resolution_histogram) FROM it_tickets"
+    ).fetchone()
+    print(f"{resolved:,} resolved tickets, {buckets:,} histogram rows")
+
+    modes = (
+        ("pandas over every ticket", lambda: _pandas_resolution_times(conn)),
+        (
+            "SQL recount + numpy",
+            lambda: summarize_resolution_histogram(compute_resolution_histogram(conn)),
+        ),
+        ("stored histogram + numpy", lambda: read_resolution_times(conn)),
+    )
+    print(f"{'Method':<28} {'Time (ms)':>12}")
+    print("-" * 41)
+    for label, run in modes:
+        repeat = 1 if label.startswith("pandas") else args.repeat
+        print(f"{label:<28} {time_call(run, repeat=repeat):>12,.1f}")
+
+    # Agreement with pandas, per priority
+    summary = read_resolution_times(conn).set_index(["dimension", "value"])
+    means, quantiles = _pandas_resolution_times(conn)["priority"]
+    worst = max(
+        abs(summary.loc[("priority", priority), column] / expected - 1)
+        for priority in means.index
+        for column, expected in zip(
+            ("mean_hours", "median_hours", "p90_hours", "p99_hours"),
+            [means[priority], *quantiles.loc[priority]],
+        )
+    )
+    print(f"Largest difference from pandas: {worst:.3%}")
+
+    # Incremental cost: resolving one more ticket updates a few histogram rows
+    open_id = conn.execute(
+        "SELECT id FROM it_tickets WHERE resolved_date IS NULL LIMIT 1"
+    ).fetchone()[0]
+    started = time.perf_counter()
+    _resolve_one(conn, open_id, "2025-01-01 12:00")
+    print(f"Resolving one ticket: {(time.perf_counter() - started) * 1000:.2f} ms")
+    conn.close()
+
+
+# ==================== PAGE LOAD ====================
+# The Cyber dashboard's reads with a cold cache and a filter on both
+# columns, so every count scans the table.
+PAGE_FILTERS = {"severity": ["High", "Critical"], "status": ["Open", "In Progress"]}
+
+
+def _page_queries(pool):
+    def run(query):
+        def load():
+            with pool.connection() as conn:
+                return query(conn)
+
+        return load
+
+    where, params = build_where_clause(PAGE_FILTERS)
+
+    def counts_by(column):
+        return lambda conn: pd.read_sql_query(
+            f"SELECT {column}, COUNT(*) AS count FROM cyber_incidents{where} "
+            f"GROUP BY {column}",
+            conn,
+            params=params,
+        )
+
+    queries = {
+        "stats": compute_incident_statistics,
+        "severity_counts": counts_by("severity"),
+        "status_counts": counts_by("status"),
+        "filtered_total": lambda conn: conn.execute(
+            f"SELECT COUNT(*) FROM cyber_incidents{where}", params
+        ).fetchone()[0],
+        "page": lambda conn: fetch_keyset_page(
+            conn, "cyber_incidents", PAGE_FILTERS, None, 25
+        ),
+        "recent": lambda conn: pd.read_sql_query(
+            "SELECT * FROM cyber_incidents ORDER BY id DESC LIMIT 50", conn
+        ),
+    }
+    return {name: run(query) for name, query in queries.items()}
+
+
+def benchmark_pageload(args):
+    print_header(f"Dashboard page load over {args.rows:,} incidents")
+    path = fresh_database("pageload")
+    seed_incidents(path, args.rows)
+    worker_counts = [int(value) for value in args.workers.split(",")]
+    pool = ConnectionPool(path, size=max(worker_counts) + 1)
+    queries = _page_queries(pool)
+
+    def sequential():
+        for query in queries.values():
+            query()
+
+    print(f"{os.cpu_count()} CPU(s); {len(queries)} queries per page")
+    print(f"{'Mode':<22} {'Page (ms)':>11} {'Speed-up':>10}")
+    print("-" * 45)
+    baseline = time_call(sequential, repeat=args.repeat)
+    print(f"{'one after another':<22} {baseline:>11,.1f} {'1.0x':>10}")
+    for workers in worker_counts:
+        configure_page_loader(workers)
+        page_ms = time_call(load_page, queries, repeat=args.repeat)
+        label = f"load_page, {workers} worker{'s' if workers > 1 else ''}"
+        print(f"{label:<22} {page_ms:>11,.1f} {baseline / page_ms:>9.1f}x")
+    print(load_page(queries).summary())
+    pool.close_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    concurrency = subparsers.add_parser(
+        "concurrency", help="Reader/writer throughput, default vs performance profile"
+    )
+    concurrency.add_argument("--readers", type=int, default=8)
+    concurrency.add_argument("--writers", type=int, default=2)
+    concurrency.add_argument("--seconds", type=float, default=5.0)
+    concurrency.add_argument("--rows", type=int, default=100_000)
+    concurrency.set_defaults(func=benchmark_concurrency)
+
+    statistics = subparsers.add_parser(
+        "statistics", help="Per-metric pandas queries vs the single-pass engine"
+    )
+    statistics.add_argument("--rows", type=int, default=1_000_000)
+    statistics.add_argument("--repeat", type=int, default=5)
+    statistics.set_defaults(func=benchmark_statistics)
+
+    pagination = subparsers.add_parser(
+        "pagination", help="OFFSET vs keyset pages at increasing depth"
+    )
+    pagination.add_argument("--rows", type=int, default=5_000_000)
+    pagination.add_argument("--page-size", type=int, default=25)
+    pagination.add_argument("--walk-page-size", type=int, default=1000)
+    pagination.add_argument("--repeat", type=int, default=3)
+    pagination.set_defaults(func=benchmark_pagination)
+
+    login = subparsers.add_parser(
+        "login", help="bcrypt login throughput, inline vs the hashing service"
+    )
+    login.add_argument("--clients", default="1,2,4,8,16")
+    login.add_argument("--logins", type=int, default=4)
+    login.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    login.add_argument("--submit-timeout", type=float, default=5.0)
+    login.set_defaults(func=benchmark_login)
+
+    search = subparsers.add_parser(
+        "search", help="FTS5 search vs LIKE scans over incident descriptions"
+    )
+    search.add_argument("--rows", type=int, default=1_000_000)
+    search.add_argument("--repeat", type=int, default=3)
+    search.set_defaults(func=benchmark_search)
+
+    memory = subparsers.add_parser(
+        "memory", help="get_all_* DataFrame memory, plain vs typed"
+    )
+    memory.add_argument("--rows", type=int, default=1_000_000)
+    memory.set_defaults(func=benchmark_memory)
+
+    resolution = subparsers.add_parser(
+        "resolution", help="Ticket time-to-resolve: pandas vs the stored histogram"
+    )
+    resolution.add_argument("--rows", type=int, default=5_000_000)
+    resolution.add_argument("--repeat", type=int, default=3)
+    resolution.set_defaults(func=benchmark_resolution)
+
+    pageload = subparsers.add_parser(
+        "pageload", help="Dashboard reads one after another vs load_page"
+    )
+    pageload.add_argument("--rows", type=int, default=1_000_000)
+    pageload.add_argument("--workers", default="1,2,4")
+    pageload.add_argument("--repeat", type=int, default=3)
+    pageload.set_defaults(func=benchmark_pageload)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,21 @@
 import streamlit as st
 import plotly.express as px
-from datetime import datetime
+from datetime import date, datetime
 
 from app.data.incidents import (
-    get_all_incidents,
+    count_incidents,
+    count_incidents_by,
+    get_incidents_page,
+    query_incidents,
+    search_incidents,
     insert_incident,
     update_incident_status,
     delete_incident,
     get_incident_statistics,
+    get_incident_date_range,
+    get_incident_trend,
 )
+from app.services.page_loader import load_page
 
 st.set_page_config(page_title="Cyber Incidents Dashboard", page_icon="🛡️", layout="wide")
 
@@ -54,11 +61,38 @@ with st.sidebar:
     if st.button("⚙️ IT Operations", use_container_width=True):
         st.switch_page("pages/3_IT_Operations.py")
 
+# ==================== DATA ====================
+# Paging state is settled first so the table page loads with everything else.
+rows_to_show = st.session_state.get("incident_rows_per_page", 25)
+page_key = (tuple(severity_filter), tuple(status_filter), rows_to_show)
+if st.session_state.get("incident_page_key") != page_key:
+    st.session_state.incident_page_key = page_key
+    st.session_state.incident_cursors = [None]
+cursors = st.session_state.incident_cursors
+
+data = load_page(
+    {
+        "stats": get_incident_statistics,
+        "severity_counts": lambda: count_incidents_by(
+            "severity", severity_filter, status_filter
+        ),
+        "status_counts": lambda: count_incidents_by(
+            "status", severity_filter, status_filter
+        ),
+        "date_range": get_incident_date_range,
+        "filtered_total": lambda: count_incidents(severity_filter, status_filter),
+        "page": lambda: get_incidents_page(
+            cursors[-1], rows_to_show, severity_filter, status_filter
+        ),
+        "recent": lambda: query_incidents(limit=50),
+    }
+)
+
 # ==================== METRICS ====================
 st.subheader("Key Metrics")
 
 try:
-    stats = get_incident_statistics()
+    stats = data["stats"]
 
     severity_lookup_map = {
         item["severity"]: item["count"] for item in stats["by_severity"]
@@ -89,23 +123,19 @@ st.divider()
 
 # ==================== VISUALIZATIONS ====================
 try:
-    df = get_all_incidents()
-
-    if len(df) > 0:
-        filtered_df = df[
-            (df["severity"].isin(severity_filter)) & (df["status"].isin(status_filter))
-        ]
+    total_incidents = data["stats"]["total"]
 
+    if total_incidents > 0:
         col1, col2 = st.columns(2)
 
         with col1:
             st.subheader("📈 Incidents by Severity")
-            severity_counts = filtered_df["severity"].value_counts()
+            severity_counts = data["severity_counts"]
             fig1 = px.bar(
-                x=severity_counts.index,
-                y=severity_counts.values,
+                x=severity_counts["severity"],
+                y=severity_counts["count"],
                 labels={"x": "Severity", "y": "Count"},
-                color=severity_counts.index,
+                color=severity_counts["severity"],
                 color_discrete_map={
                     "Critical": "#DC143C",
                     "High": "#FF6347",
@@ -117,26 +147,126 @@ try:
 
         with col2:
             st.subheader("📊 Status Distribution")
-            status_counts = filtered_df["status"].value_counts()
+            status_counts = data["status_counts"]
             fig2 = px.pie(
-                values=status_counts.values, names=status_counts.index, hole=0.4
+                values=status_counts["count"], names=status_counts["status"], hole=0.4
             )
             st.plotly_chart(fig2, use_container_width=True)
 
         st.divider()
 
+        # ==================== TRENDS ====================
+        st.subheader("📈 Incident Trends")
+
+        first_day, last_day = data["date_range"]
+        if first_day is not None:
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                grain = st.radio(
+                    "Period", ["week", "day"], format_func=str.title, horizontal=True
+                )
+            with col2:
+                split = st.selectbox("Split by", ["Severity", "Type", "Total"])
+            with col3:
+                first_day = date.fromisoformat(first_day)
+                last_day = date.fromisoformat(last_day)
+                date_range = st.date_input(
+                    "Date range",
+                    value=(first_day, last_day),
+                    min_value=first_day,
+                    max_value=last_day,
+                )
+
+            # Waits for the second date while a range is being picked
+            if len(date_range) == 2:
+                dimension = {"Severity": "severity", "Type": "incident_type"}.get(split)
+                trend = get_incident_trend(dimension, grain, *date_range)
+                fig = px.line(
+                    trend,
+                    x="bucket",
+                    y="count",
+                    color="value" if dimension else None,
+                    labels={
+                        "bucket": grain.title(),
+                        "count": "Incidents",
+                        "value": split,
+                    },
+                    color_discrete_map={
+                        "Critical": "#DC143C",
+                        "High": "#FF6347",
+                        "Medium": "#FFA500",
+                        "Low": "#90EE90",
+                    },
+                )
+                st.plotly_chart(fig, use_container_width=True)
+                st.caption(
+                    "All incidents reported in the range; the sidebar filters "
+                    "do not apply"
+                )
+
+        st.divider()
+
+        # ==================== SEARCH ====================
+        st.subheader("🔎 Search Incidents")
+
+        search_text = st.text_input(
+            "Search type and description",
+            placeholder='e.g. encryption malware, or ransom* for a prefix',
+        )
+        if search_text:
+            results = search_incidents(search_text, severity_filter, status_filter)
+            if len(results) > 0:
+                st.caption(
+                    f"Best {len(results)} matches among the most recent, "
+                    "within the sidebar filters"
+                )
+                for _, row in results.iterrows():
+                    st.markdown(
+                        f"**#{row['id']}** · {row['incident_type']} · "
+                        f"{row['severity']} · {row['status']} — {row['snippet']}"
+                    )
+            else:
+                st.info("No incidents match that search")
+
+        st.divider()
+
         # ==================== INCIDENT TABLE ====================
         st.subheader("📋 All Incidents")
 
+        filtered_total = data["filtered_total"]
+
         col1, col2 = st.columns([3, 1])
-        with col1:
-            st.write(f"Showing {len(filtered_df):,} of {len(df):,} incidents")
         with col2:
-            rows_to_show = st.selectbox("Rows per page", [10, 25, 50, 100], index=1)
+            # Read (as incident_rows_per_page) before the data loads, above
+            st.selectbox(
+                "Rows per page",
+                [10, 25, 50, 100],
+                index=1,
+                key="incident_rows_per_page",
+            )
 
-        st.dataframe(
-            filtered_df.head(rows_to_show), use_container_width=True, hide_index=True
-        )
+        # Keyset pagination keeps a stack of cursors, one per visited page,
+        # and starts over whenever the filters or page size change (above).
+        total_pages = max(1, -(-filtered_total // rows_to_show))
+
+        with col1:
+            st.write(
+                f"Showing {filtered_total:,} of {total_incidents:,} incidents "
+                f"(page {len(cursors)} of {total_pages})"
+            )
+
+        page_df, next_cursor = data["page"]
+        st.dataframe(page_df, use_container_width=True, hide_index=True)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("◀ Previous", disabled=len(cursors) == 1):
+                cursors.pop()
+                st.rerun()
+        with col2:
+            if st.button("Next ▶", disabled=next_cursor is None):
+                cursors.append(next_cursor)
+                st.rerun()
 
         st.divider()
 
@@ -187,10 +317,11 @@ try:
         st.divider()
         st.subheader("✏️ Manage Incidents")
 
-        if len(df) > 0:
+        recent_df = data["recent"]
+        if len(recent_df) > 0:
             incident_options = [
                 f"#{row['id']}: {row['incident_type']} - {row['severity']}"
-                for _, row in df.head(50).iterrows()
+                for _, row in recent_df.iterrows()
             ]
             selected_incident = st.selectbox(
                 "Select Incident to Manage", incident_options
@@ -198,7 +329,7 @@ try:
 
             if selected_incident:
                 selected_id = int(selected_incident.split(":")[0].replace("#", ""))
-                incident_data = df[df["id"] == selected_id].iloc[0]
+                incident_data = recent_df[recent_df["id"] == selected_id].iloc[0]
 
                 col1, col2 = st.columns(2)
 
@@ -246,6 +377,7 @@ except Exception as e:
     st.error(f"❌ Error loading incidents: {e}")
     st.info("💡 Make sure you've run main.py to initialize the database")
 
+st.caption(f"⏱️ {data.summary()}")
 
 st.divider()
 if st.button("🚪 Logout"):
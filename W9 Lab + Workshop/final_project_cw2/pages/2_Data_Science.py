@@ -2,11 +2,15 @@ import streamlit as st
 import plotly.express as px
 
 from app.data.datasets import (
-    get_all_datasets,
+    aggregate_datasets_by,
+    count_datasets,
+    get_dataset_categories,
+    query_datasets,
     insert_dataset,
     delete_dataset,
     get_dataset_statistics,
 )
+from app.services.page_loader import load_page
 
 st.set_page_config(page_title="Data Science Dashboard", page_icon="📊", layout="wide")
 
@@ -31,9 +35,8 @@ with st.sidebar:
     st.header("🎛️ Controls")
 
     try:
-        df_all = get_all_datasets()
-        if len(df_all) > 0:
-            unique_categories = df_all["category"].unique().tolist()
+        unique_categories = get_dataset_categories()
+        if unique_categories:
             category_filter = st.multiselect(
                 "Filter by Category",
                 unique_categories,
@@ -55,11 +58,40 @@ with st.sidebar:
     if st.button("⚙️ IT Operations", use_container_width=True):
         st.switch_page("pages/3_IT_Operations.py")
 
+# ==================== DATA ====================
+# An empty category selection means "all categories".
+categories = category_filter or None
+# The table widgets render further down; read their last values so the
+# table page loads with everything else.
+rows_to_show = st.session_state.get("dataset_rows_per_page", 25)
+requested_page = int(st.session_state.get("dataset_page", 1))
+
+data = load_page(
+    {
+        "stats": get_dataset_statistics,
+        "category_counts": lambda: aggregate_datasets_by(
+            "category", categories, min_size, limit=10
+        ),
+        "source_storage": lambda: aggregate_datasets_by(
+            "source", categories, min_size, measure="SUM(file_size_mb)", limit=10
+        ),
+        "sample": lambda: query_datasets(categories, min_size, limit=100),
+        "filtered_total": lambda: count_datasets(categories, min_size),
+        "page": lambda: query_datasets(
+            categories,
+            min_size,
+            limit=rows_to_show,
+            offset=(requested_page - 1) * rows_to_show,
+        ),
+        "recent": lambda: query_datasets(limit=50),
+    }
+)
+
 # ==================== METRICS ====================
 st.subheader("📈 Key Metrics")
 
 try:
-    stats = get_dataset_statistics()
+    stats = data["stats"]
 
     col1, col2, col3, col4 = st.columns(4)
     with col1:
@@ -93,45 +125,35 @@ st.divider()
 
 # ==================== VISUALIZATIONS ====================
 try:
-    df = get_all_datasets()
-
-    if len(df) > 0:
-        filtered_df = (
-            df[df["category"].isin(category_filter)] if category_filter else df
-        )
-        filtered_df = filtered_df[filtered_df["file_size_mb"] >= min_size]
+    total_datasets = data["stats"]["total"]
 
+    if total_datasets > 0:
         col1, col2 = st.columns(2)
 
         with col1:
             st.subheader("📊 Datasets by Category")
-            category_counts = filtered_df["category"].value_counts().head(10)
+            category_counts = data["category_counts"]
             fig1 = px.bar(
-                x=category_counts.values,
-                y=category_counts.index,
+                x=category_counts["value"],
+                y=category_counts["category"],
                 orientation="h",
                 labels={"x": "Count", "y": "Category"},
-                color=category_counts.values,
+                color=category_counts["value"],
                 color_continuous_scale="Blues",
             )
             st.plotly_chart(fig1, use_container_width=True)
 
         with col2:
             st.subheader("💾 Storage by Source")
-            source_storage = (
-                filtered_df.groupby("source")["file_size_mb"]
-                .sum()
-                .sort_values(ascending=False)
-                .head(10)
-            )
+            source_storage = data["source_storage"]
             fig2 = px.pie(
-                values=source_storage.values, names=source_storage.index, hole=0.4
+                values=source_storage["value"], names=source_storage["source"], hole=0.4
             )
             st.plotly_chart(fig2, use_container_width=True)
 
         st.subheader("📈 Dataset Size Analysis")
         fig3 = px.scatter(
-            filtered_df.head(100),
+            data["sample"],
             x="record_count",
             y="file_size_mb",
             color="category",
@@ -149,15 +171,34 @@ try:
         # ==================== DATASET TABLE ====================
         st.subheader("Datasets Overview")
 
-        col1, col2 = st.columns([3, 1])
-        with col1:
-            st.write(f"Showing {len(filtered_df):,} of {len(df):,} datasets")
+        filtered_total = data["filtered_total"]
+
+        col1, col2, col3 = st.columns([2, 1, 1])
         with col2:
-            rows_to_show = st.selectbox("Rows per page", [10, 25, 50, 100], index=1)
+            st.selectbox(
+                "Rows per page", [10, 25, 50, 100], index=1, key="dataset_rows_per_page"
+            )
+        total_pages = max(1, -(-filtered_total // rows_to_show))
+        with col3:
+            # Clamp rather than set max_value, so narrowing a filter never errors.
+            st.number_input("Page", min_value=1, value=1, step=1, key="dataset_page")
+            page_number = min(requested_page, total_pages)
+        with col1:
+            st.write(
+                f"Showing {filtered_total:,} of {total_datasets:,} datasets "
+                f"(page {page_number} of {total_pages})"
+            )
 
-        st.dataframe(
-            filtered_df.head(rows_to_show), use_container_width=True, hide_index=True
-        )
+        page_df = data["page"]
+        if page_number != requested_page:
+            # The filters shrank past the requested page; show the last one
+            page_df = query_datasets(
+                categories,
+                min_size,
+                limit=rows_to_show,
+                offset=(page_number - 1) * rows_to_show,
+            )
+        st.dataframe(page_df, use_container_width=True, hide_index=True)
 
         st.divider()
 
@@ -220,16 +261,17 @@ try:
         st.divider()
         st.subheader("Manage Datasets")
 
-        if len(df) > 0:
+        recent_df = data["recent"]
+        if len(recent_df) > 0:
             dataset_options = [
                 f"#{row['id']}: {row['dataset_name']}"
-                for _, row in df.head(50).iterrows()
+                for _, row in recent_df.iterrows()
             ]
             selected_dataset = st.selectbox("Select Dataset", dataset_options)
 
             if selected_dataset:
                 selected_id = int(selected_dataset.split(":")[0].replace("#", ""))
-                dataset_data = df[df["id"] == selected_id].iloc[0]
+                dataset_data = recent_df[recent_df["id"] == selected_id].iloc[0]
 
                 col1, col2 = st.columns(2)
 
@@ -242,7 +284,7 @@ try:
                             "Source": dataset_data["source"],
                             "Records": int(dataset_data["record_count"]),
                             "Size (MB)": float(dataset_data["file_size_mb"]),
-                            "Last Update": dataset_data["last_update"],
+                            "Last Update": dataset_data["last_updated"],
                         }
                     )
 
@@ -269,6 +311,8 @@ except Exception as e:
     st.error(f"❌ Error loading datasets: {e}")
     st.info("💡 Make sure you've run main.py to initialize the database")
 
+st.caption(f"⏱️ {data.summary()}")
+
 st.divider()
 if st.button("🚪 Logout"):
     st.session_state.logged_in = False
@@ -1,14 +1,23 @@
 import streamlit as st
 import plotly.express as px
-from datetime import datetime
+from datetime import date, datetime
 
 from app.data.tickets import (
-    get_all_tickets,
-    insert_ticket,
+    count_tickets,
+    count_tickets_by,
+    get_tickets_page,
+    query_tickets,
+    search_tickets,
+    create_ticket,
+    peek_next_ticket_id,
     update_ticket_status,
     delete_ticket,
     get_ticket_statistics,
+    get_ticket_date_range,
+    get_ticket_trend,
+    get_resolution_times,
 )
+from app.services.page_loader import load_page
 
 st.set_page_config(page_title="IT Operations Dashboard", page_icon="⚙️", layout="wide")
 
@@ -68,12 +77,44 @@ with col4:
 
 st.divider()
 
+# ==================== DATA ====================
+# Paging state is settled first so the table page loads with everything else.
+rows_to_show = st.session_state.get("ticket_rows_per_page", 25)
+page_key = (tuple(priority_filter), tuple(status_filter), rows_to_show)
+if st.session_state.get("ticket_page_key") != page_key:
+    st.session_state.ticket_page_key = page_key
+    st.session_state.ticket_cursors = [None]
+cursors = st.session_state.ticket_cursors
+
+data = load_page(
+    {
+        "stats": get_ticket_statistics,
+        "priority_counts": lambda: count_tickets_by(
+            "priority", priority_filter, status_filter
+        ),
+        "status_counts": lambda: count_tickets_by(
+            "status", priority_filter, status_filter
+        ),
+        "category_counts": lambda: count_tickets_by(
+            "category", priority_filter, status_filter, limit=10
+        ),
+        "date_range": get_ticket_date_range,
+        "resolution": get_resolution_times,
+        "filtered_total": lambda: count_tickets(priority_filter, status_filter),
+        "page": lambda: get_tickets_page(
+            cursors[-1], rows_to_show, priority_filter, status_filter
+        ),
+        "next_ticket_id": peek_next_ticket_id,
+        "recent": lambda: query_tickets(limit=50),
+    }
+)
+
 # ==================== TICKET METRICS ====================
 
 st.subheader("Ticket Metrics")
 
 try:
-    stats = get_ticket_statistics()
+    stats = data["stats"]
 
     priority_lookup_map = {
         item["priority"]: item["count"] for item in stats["by_priority"]
@@ -107,24 +148,19 @@ st.divider()
 
 # ==================== VISUALIZATIONS ====================
 try:
-    df = get_all_tickets()
-
-    if len(df) > 0:
-        # Apply filters
-        filtered_df = df[
-            (df["priority"].isin(priority_filter)) & (df["status"].isin(status_filter))
-        ]
+    total_tickets = data["stats"]["total"]
 
+    if total_tickets > 0:
         col1, col2 = st.columns(2)
 
         with col1:
             st.subheader("📊 Tickets by Priority")
-            priority_counts = filtered_df["priority"].value_counts()
+            priority_counts = data["priority_counts"]
             fig1 = px.bar(
-                x=priority_counts.index,
-                y=priority_counts.values,
+                x=priority_counts["priority"],
+                y=priority_counts["count"],
                 labels={"x": "Priority", "y": "Count"},
-                color=priority_counts.index,
+                color=priority_counts["priority"],
                 color_discrete_map={
                     "Critical": "#DC143C",
                     "High": "#FF6347",
@@ -136,39 +172,191 @@ try:
 
         with col2:
             st.subheader("Status Distribution")
-            status_counts = filtered_df["status"].value_counts()
+            status_counts = data["status_counts"]
             fig2 = px.pie(
-                values=status_counts.values, names=status_counts.index, hole=0.4
+                values=status_counts["count"], names=status_counts["status"], hole=0.4
             )
             st.plotly_chart(fig2, use_container_width=True)
 
         # Tickets by category
         st.subheader("📈 Top Categories")
-        category_counts = filtered_df["category"].value_counts().head(10)
+        category_counts = data["category_counts"]
         fig3 = px.bar(
-            x=category_counts.values,
-            y=category_counts.index,
+            x=category_counts["count"],
+            y=category_counts["category"],
             orientation="h",
             labels={"x": "Count", "y": "Category"},
-            color=category_counts.values,
+            color=category_counts["count"],
             color_continuous_scale="Teal",
         )
         st.plotly_chart(fig3, use_container_width=True)
 
         st.divider()
 
+        # ==================== TRENDS ====================
+        st.subheader("📈 Ticket Trends")
+
+        first_day, last_day = data["date_range"]
+        if first_day is not None:
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                grain = st.radio(
+                    "Period", ["week", "day"], format_func=str.title, horizontal=True
+                )
+            with col2:
+                split = st.selectbox("Split by", ["Priority", "Category", "Total"])
+            with col3:
+                first_day = date.fromisoformat(first_day)
+                last_day = date.fromisoformat(last_day)
+                date_range = st.date_input(
+                    "Date range",
+                    value=(first_day, last_day),
+                    min_value=first_day,
+                    max_value=last_day,
+                )
+
+            # Waits for the second date while a range is being picked
+            if len(date_range) == 2:
+                dimension = {"Priority": "priority", "Category": "category"}.get(split)
+                trend = get_ticket_trend(dimension, grain, *date_range)
+                fig = px.line(
+                    trend,
+                    x="bucket",
+                    y="count",
+                    color="value" if dimension else None,
+                    labels={
+                        "bucket": grain.title(),
+                        "count": "Tickets created",
+                        "value": split,
+                    },
+                    color_discrete_map={
+                        "Critical": "#DC143C",
+                        "High": "#FF6347",
+                        "Medium": "#FFA500",
+                        "Low": "#90EE90",
+                    },
+                )
+                st.plotly_chart(fig, use_container_width=True)
+                st.caption(
+                    "All tickets created in the range; the sidebar filters "
+                    "do not apply"
+                )
+
+        st.divider()
+
+        # ==================== TIME TO RESOLVE ====================
+        st.subheader("⏱️ Time to Resolve")
+
+        resolution = data["resolution"]
+        overall = resolution[resolution["dimension"] == "overall"]
+        if len(overall) > 0:
+            overall = overall.iloc[0]
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric(
+                "MTTR",
+                f"{overall['mean_hours']:,.1f} h",
+                help=f"Mean over {overall['tickets']:,} resolved tickets",
+            )
+            col2.metric("Median", f"{overall['median_hours']:,.1f} h")
+            col3.metric("p90", f"{overall['p90_hours']:,.1f} h")
+            col4.metric("p99", f"{overall['p99_hours']:,.1f} h")
+
+            slice_labels = {
+                "Priority": "priority",
+                "Category": "category",
+                "Assigned To": "assigned_to",
+            }
+            slice_by = st.selectbox("Slice by", list(slice_labels))
+            sliced = resolution[resolution["dimension"] == slice_labels[slice_by]]
+            sliced = sliced.drop(columns="dimension").rename(
+                columns={
+                    "value": slice_by,
+                    "tickets": "Resolved",
+                    "mean_hours": "Mean (h)",
+                    "median_hours": "Median (h)",
+                    "p90_hours": "p90 (h)",
+                    "p99_hours": "p99 (h)",
+                }
+            )
+
+            col1, col2 = st.columns(2)
+            with col1:
+                st.dataframe(sliced.round(1), hide_index=True, use_container_width=True)
+            with col2:
+                fig4 = px.bar(
+                    sliced,
+                    x=slice_by,
+                    y=["Median (h)", "p90 (h)"],
+                    barmode="group",
+                    labels={"value": "Hours", "variable": ""},
+                )
+                st.plotly_chart(fig4, use_container_width=True)
+            st.caption("All resolved tickets; the sidebar filters do not apply")
+        else:
+            st.info("No resolved tickets yet")
+
+        st.divider()
+
+        # ==================== SEARCH ====================
+        st.subheader("🔎 Search Tickets")
+
+        search_text = st.text_input(
+            "Search subject and description", placeholder="e.g. WiFi, vpn timeout"
+        )
+        if search_text:
+            results = search_tickets(search_text, priority_filter, status_filter)
+            if len(results) > 0:
+                st.caption(
+                    f"Best {len(results)} matches among the most recent, "
+                    "within the sidebar filters"
+                )
+                for _, row in results.iterrows():
+                    st.markdown(
+                        f"**{row['ticket_id']}** · {row['priority']} · "
+                        f"{row['status']} — {row['snippet']}"
+                    )
+            else:
+                st.info("No tickets match that search")
+
+        st.divider()
+
         # ==================== TICKET TABLE ====================
         st.subheader("All Tickets")
 
+        filtered_total = data["filtered_total"]
+
         col1, col2 = st.columns([3, 1])
-        with col1:
-            st.write(f"Showing {len(filtered_df):,} of {len(df):,} tickets")
         with col2:
-            rows_to_show = st.selectbox("Rows per page", [10, 25, 50, 100], index=1)
+            # Read (as ticket_rows_per_page) before the data loads, above
+            st.selectbox(
+                "Rows per page",
+                [10, 25, 50, 100],
+                index=1,
+                key="ticket_rows_per_page",
+            )
 
-        st.dataframe(
-            filtered_df.head(rows_to_show), use_container_width=True, hide_index=True
-        )
+        # Keyset pagination keeps a stack of cursors, one per visited page,
+        # and starts over whenever the filters or page size change (above).
+        total_pages = max(1, -(-filtered_total // rows_to_show))
+
+        with col1:
+            st.write(
+                f"Showing {filtered_total:,} of {total_tickets:,} tickets "
+                f"(page {len(cursors)} of {total_pages})"
+            )
+
+        page_df, next_cursor = data["page"]
+        st.dataframe(page_df, use_container_width=True, hide_index=True)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("◀ Previous", disabled=len(cursors) == 1):
+                cursors.pop()
+                st.rerun()
+        with col2:
+            if st.button("Next ▶", disabled=next_cursor is None):
+                cursors.append(next_cursor)
+                st.rerun()
 
         st.divider()
 
@@ -179,13 +367,13 @@ try:
             col1, col2 = st.columns(2)
 
             with col1:
-                # Generate ticket ID
-                max_id_str = df["ticket_id"].str.extract(r"TKT-(\d+)")[0].max()
-                max_id = (
-                    int(max_id_str) if max_id_str and str(max_id_str) != "nan" else 0
+                # The real ID is allocated when the ticket is created
+                st.text_input(
+                    "Ticket ID",
+                    value=data.get("next_ticket_id") or "Assigned on create",
+                    disabled=True,
+                    help="The next free ID; the final one is assigned on create",
                 )
-                new_ticket_id = f"TKT-{str(max_id + 1).zfill(6)}"
-                st.text_input("Ticket ID", value=new_ticket_id, disabled=True)
 
                 ticket_category = st.selectbox(
                     "Category",
@@ -225,8 +413,7 @@ try:
             if submitted:
                 if ticket_subject and ticket_description:
                     try:
-                        new_id = insert_ticket(
-                            new_ticket_id,
+                        _, new_ticket_id = create_ticket(
                             ticket_priority,
                             ticket_status,
                             ticket_category,
@@ -247,16 +434,19 @@ try:
         st.divider()
         st.subheader("Manage Tickets")
 
-        if len(df) > 0:
+        recent_df = data["recent"]
+        if len(recent_df) > 0:
             ticket_options = [
                 f"{row['ticket_id']}: {row['subject']}"
-                for _, row in df.head(50).iterrows()
+                for _, row in recent_df.iterrows()
             ]
             selected_ticket = st.selectbox("Select Ticket", ticket_options)
 
             if selected_ticket:
                 selected_ticket_id = selected_ticket.split(":")[0]
-                ticket_data = df[df["ticket_id"] == selected_ticket_id].iloc[0]
+                ticket_data = recent_df[
+                    recent_df["ticket_id"] == selected_ticket_id
+                ].iloc[0]
 
                 col1, col2 = st.columns(2)
 
@@ -318,6 +508,8 @@ except Exception as e:
     st.error(f"❌ Error loading tickets: {e}")
     st.info("💡 Make sure you've run main.py to initialize the database")
 
+st.caption(f"⏱️ {data.summary()}")
+
 st.divider()
 if st.button("🚪 Logout"):
     st.session_state.logged_in = False
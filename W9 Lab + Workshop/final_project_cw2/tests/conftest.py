@@ -0,0 +1,46 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Tests import the app the way the Streamlit pages do, from the project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.data.cache import configure_cache  # noqa: E402
+from app.data.db import DB_PATH, configure_pool, connect_database  # noqa: E402
+from app.data.schema import create_all_tables  # noqa: E402
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """A fully migrated scratch database; DATA/ is created under tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "test.db"
+    conn = connect_database(path, performance=False)
+    create_all_tables(conn)
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def conn(db_path):
+    conn = connect_database(db_path, performance=False)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def pooled_db(tmp_path, monkeypatch):
+    """
+    A migrated DATA/intelligence_platform.db under tmp_path, behind a fresh
+    pool and result cache, for the data-layer functions that borrow from it.
+    """
+    monkeypatch.chdir(tmp_path)
+    conn = connect_database(DB_PATH, performance=False)
+    create_all_tables(conn)
+    conn.close()
+    configure_cache()
+    # WAL and busy_timeout, so concurrent writers queue instead of failing
+    pool = configure_pool(performance=True)
+    yield tmp_path / DB_PATH
+    pool.close_all()
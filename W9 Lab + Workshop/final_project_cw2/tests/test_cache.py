@@ -0,0 +1,126 @@
+import os
+import pickle
+import shutil
+import sqlite3
+
+import pytest
+
+from app.data.cache import SharedCache, configure_cache, configure_shared_cache
+from app.data.db import DATA_DIR, DB_PATH, configure_pool, connect_database, get_pool
+from app.data.incidents import (
+    delete_incident,
+    insert_incident,
+    query_incidents,
+    update_incident_status,
+)
+from app.data.schema import create_all_tables
+
+
+def create_database(incident_type):
+    """A fresh DATA/intelligence_platform.db holding one incident."""
+    conn = connect_database(DB_PATH, performance=False)
+    create_all_tables(conn)
+    conn.execute(
+        "INSERT INTO cyber_incidents (incident_type, severity, status) "
+        "VALUES (?, 'High', 'Open')",
+        (incident_type,),
+    )
+    conn.commit()
+    conn.close()
+
+
+def start_process():
+    """What a newly started worker has: an empty cache and its own pool."""
+    configure_cache()
+    configure_pool(performance=False)
+
+
+def incident_types():
+    return list(query_incidents()["incident_type"])
+
+
+def incident_statuses():
+    return list(query_incidents()["status"])
+
+
+@pytest.fixture
+def platform_db(tmp_path, monkeypatch):
+    """The default pooled database, created under tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    create_database("Phishing")
+    start_process()
+    yield DB_PATH
+    configure_shared_cache(None)
+    get_pool().close_all()
+
+
+def test_reads_see_writes_through_the_data_layer(platform_db):
+    assert incident_types() == ["Phishing"]
+
+    incident_id = insert_incident("2024-01-02", "Malware", "Low", "Open", "new")
+    assert incident_types() == ["Malware", "Phishing"]
+
+    update_incident_status(incident_id, "Resolved")
+    assert incident_statuses() == ["Resolved", "Open"]
+
+    delete_incident(incident_id)
+    assert incident_types() == ["Phishing"]
+
+
+def test_reads_see_writes_from_other_connections(platform_db):
+    assert incident_types() == ["Phishing"]
+
+    # Bypasses @invalidates; only the generation triggers see this write
+    conn = sqlite3.connect(platform_db)
+    conn.execute("UPDATE cyber_incidents SET incident_type = 'Malware'")
+    conn.commit()
+    conn.close()
+    assert incident_types() == ["Malware"]
+
+
+def test_recreated_database_is_not_served_old_results(platform_db):
+    assert incident_types() == ["Phishing"]
+
+    # Same path and generations, different contents; the cache is kept
+    get_pool().close_all()
+    shutil.rmtree(DATA_DIR)
+    create_database("Malware")
+    configure_pool(performance=False)
+    assert incident_types() == ["Malware"]
+
+
+def test_shared_cache_does_not_leak_between_databases(platform_db, tmp_path):
+    configure_shared_cache(tmp_path / "shared")
+    assert incident_types() == ["Phishing"]
+
+    # Another database reusing the shared directory, with matching generations
+    get_pool().close_all()
+    shutil.rmtree(DATA_DIR)
+    create_database("Malware")
+    start_process()
+    assert incident_types() == ["Malware"]
+
+
+def test_shared_cache_directory_is_private(tmp_path):
+    shared = SharedCache(tmp_path / "shared")
+    assert os.stat(shared.directory).st_mode & 0o777 == 0o700
+
+    shared.put(("stats",), {"total": 3})
+    assert shared.get(("stats",)) == (True, {"total": 3})
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX permissions")
+def test_shared_cache_refuses_pickles_in_a_writable_directory(tmp_path):
+    directory = tmp_path / "shared"
+    directory.mkdir()
+    directory.chmod(0o777)
+    shared = SharedCache(directory)
+
+    shared.put(("stats",), {"total": 3})
+    assert shared.stats()["entries"] == 0
+
+    # Planted by another user
+    _, pickle_path = shared._paths(("stats",))
+    with open(pickle_path, "wb") as f:
+        pickle.dump({"total": 99}, f)
+    assert shared.get(("stats",)) == (False, None)
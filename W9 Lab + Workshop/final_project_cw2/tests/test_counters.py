@@ -0,0 +1,88 @@
+from app.data.analytics import read_resolution_times
+from app.data.counters import read_counters, verify_kpi_counters
+from app.data.db import connect_database
+from app.data.rollups import read_rollup, verify_time_rollups
+from app.data.schema import apply_migrations, create_all_tables
+from app.data.statistics import compute_ticket_statistics, read_ticket_statistics
+
+TICKETS = [
+    # (ticket_id, category, assigned_to, created_date, resolved_date)
+    ("TKT-000001", None, None, "2024-03-04", "2024-03-05"),
+    ("TKT-000002", "", "", "2024-03-04", "2024-03-06"),
+    ("TKT-000003", "", "", "2024-03-05", None),
+    ("TKT-000004", "Network", "Help Desk", "2024-03-05", "2024-03-05"),
+]
+
+
+def insert_tickets(conn, rows=TICKETS):
+    conn.executemany(
+        """
+        INSERT INTO it_tickets
+            (ticket_id, priority, status, category, subject, description,
+             created_date, resolved_date, assigned_to)
+        VALUES (?, 'High', 'Open', ?, 's', 'd', ?, ?, ?)
+        """,
+        [
+            (ticket_id, category, created, resolved, assigned_to)
+            for ticket_id, category, assigned_to, created, resolved in rows
+        ],
+    )
+    conn.commit()
+
+
+def test_null_and_empty_string_are_counted_apart(conn):
+    insert_tickets(conn)
+    _, counts, _ = read_counters(conn, "it_tickets")
+    assert counts["category"] == {None: 1, "": 2, "Network": 1}
+    assert read_ticket_statistics(conn) == compute_ticket_statistics(conn)
+    assert verify_kpi_counters(conn) == []
+
+
+def test_null_and_empty_string_stay_apart_after_updates(conn):
+    insert_tickets(conn)
+    conn.execute("UPDATE it_tickets SET category = NULL WHERE ticket_id = 'TKT-000002'")
+    conn.execute("DELETE FROM it_tickets WHERE ticket_id = 'TKT-000001'")
+    conn.commit()
+    _, counts, _ = read_counters(conn, "it_tickets")
+    assert counts["category"] == {None: 1, "": 1, "Network": 1}
+    assert verify_kpi_counters(conn) == []
+    assert verify_time_rollups(conn) == []
+
+
+def test_rollups_keep_null_and_empty_string_apart(conn):
+    insert_tickets(conn)
+    trend = read_rollup(conn, "it_tickets", "category")
+    counts = {}
+    for value, count in zip(trend["value"], trend["count"]):
+        counts[value] = counts.get(value, 0) + count
+    assert counts == {None: 1, "": 2, "Network": 1}
+
+
+def test_resolution_times_keep_null_and_empty_string_apart(conn):
+    insert_tickets(conn)
+    summary = read_resolution_times(conn)
+    by_category = summary[summary["dimension"] == "category"]
+    tickets = dict(zip(by_category["value"], by_category["tickets"]))
+    assert tickets == {None: 1, "": 1, "Network": 1}
+
+
+def test_migration_10_separates_null_from_empty_string(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    conn = connect_database(tmp_path / "old.db", performance=False)
+    create_all_tables(conn)
+    # Back to version 9, before NULLs got their own value
+    conn.execute("DELETE FROM schema_migrations WHERE version >= 10")
+    insert_tickets(conn)
+    # Counters as written before migration 10, with NULL folded into ''
+    conn.execute("DELETE FROM kpi_counters WHERE value = X'00'")
+    conn.execute(
+        "UPDATE kpi_counters SET count = 3 "
+        "WHERE table_name = 'it_tickets' AND dimension = 'category' AND value = ''"
+    )
+    conn.commit()
+
+    assert 10 in apply_migrations(conn)
+    _, counts, _ = read_counters(conn, "it_tickets")
+    assert counts["category"] == {None: 1, "": 2, "Network": 1}
+    assert verify_kpi_counters(conn) == []
+    conn.close()
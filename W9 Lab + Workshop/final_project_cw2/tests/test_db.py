@@ -0,0 +1,121 @@
+import sqlite3
+import threading
+
+import pytest
+
+from app.data.db import ConnectionPool
+
+
+@pytest.fixture
+def pool(db_path):
+    pool = ConnectionPool(db_path, size=2, timeout=5, performance=False)
+    yield pool
+    pool.close_all()
+
+
+def test_nested_borrows_on_one_thread_reuse_the_connection(pool):
+    with pool.connection() as outer:
+        with pool.connection() as inner:
+            assert inner is outer
+    with pool.connection() as again:
+        assert again is outer
+
+    stats = pool.stats()
+    assert (stats["opened"], stats["borrowed"], stats["reused"]) == (1, 3, 1)
+    assert (stats["open"], stats["idle"]) == (1, 1)
+
+
+def test_threads_get_their_own_connections(pool):
+    held, release = threading.Event(), threading.Event()
+    seen = {}
+
+    def borrow():
+        with pool.connection() as conn:
+            seen["thread"] = conn
+            held.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=borrow)
+    thread.start()
+    held.wait(5)
+    with pool.connection() as conn:
+        assert conn is not seen["thread"]
+    release.set()
+    thread.join()
+    assert pool.stats()["opened"] == 2
+
+
+def test_exhausted_pool_times_out(db_path):
+    pool = ConnectionPool(db_path, size=1, timeout=0.1, performance=False)
+    held, release = threading.Event(), threading.Event()
+
+    def hold():
+        with pool.connection():
+            held.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    held.wait(5)
+    try:
+        with pytest.raises(TimeoutError):
+            with pool.connection():
+                pass
+    finally:
+        release.set()
+        thread.join()
+
+    # The connection is back once its holder is done
+    with pool.connection() as conn:
+        assert conn.execute("SELECT 1").fetchone() == (1,)
+    stats = pool.stats()
+    assert (stats["opened"], stats["waits"]) == (1, 1)
+    pool.close_all()
+
+
+def test_stale_connection_failing_its_health_check_is_replaced(db_path):
+    pool = ConnectionPool(db_path, size=1, health_check_interval=0, performance=False)
+    with pool.connection() as broken:
+        pass
+    # Idle past the interval and no longer usable
+    broken.close()
+
+    with pool.connection() as conn:
+        assert conn is not broken
+        assert conn.execute("SELECT 1").fetchone() == (1,)
+    stats = pool.stats()
+    assert (stats["opened"], stats["closed"], stats["health_failures"]) == (2, 1, 1)
+    assert stats["open"] == 1
+    pool.close_all()
+
+
+def test_close_all_closes_idle_connections_and_refuses_borrows(pool):
+    held, release = threading.Event(), threading.Event()
+    borrowed = {}
+
+    def hold():
+        with pool.connection() as conn:
+            borrowed["conn"] = conn
+            held.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    held.wait(5)
+    with pool.connection() as idle:
+        assert idle is not borrowed["conn"]
+
+    # Closes the idle connection now and the borrowed one when it comes back
+    pool.close_all()
+    with pytest.raises(sqlite3.ProgrammingError):
+        idle.execute("SELECT 1")
+    with pytest.raises(RuntimeError, match="closed"):
+        with pool.connection():
+            pass
+
+    release.set()
+    thread.join()
+    with pytest.raises(sqlite3.ProgrammingError):
+        borrowed["conn"].execute("SELECT 1")
+    stats = pool.stats()
+    assert (stats["open"], stats["idle"], stats["closed"]) == (0, 0, 2)
@@ -0,0 +1,17 @@
+from app.data.frames import frame_memory, read_table_frame
+
+
+def test_typed_read_is_compact_and_silent(conn, capsys):
+    conn.executemany(
+        "INSERT INTO cyber_incidents (incident_type, severity, status, date_reported) "
+        "VALUES (?, ?, 'Open', '2024-01-01')",
+        [("Phishing", "High"), ("Malware", "Low")] * 500,
+    )
+    conn.commit()
+
+    plain = read_table_frame(conn, "cyber_incidents")
+    typed = read_table_frame(conn, "cyber_incidents", typed=True)
+
+    assert capsys.readouterr().out == ""
+    assert str(typed["severity"].dtype) == "category"
+    assert frame_memory(typed) < frame_memory(plain)
@@ -0,0 +1,49 @@
+from datetime import date, timedelta
+
+from app.data.rollups import read_rollup, verify_time_rollups
+
+# Wednesday 2024-03-06 to Sunday 2024-03-24
+FIRST_DAY = date(2024, 3, 6)
+DAYS = 19
+
+
+def insert_incidents(conn):
+    rows = [
+        ((FIRST_DAY + timedelta(days=day)).isoformat(), severity)
+        for day in range(DAYS)
+        for severity in ("Low", "High")[: 1 + day % 2]
+    ]
+    conn.executemany(
+        "INSERT INTO cyber_incidents (incident_type, severity, date_reported) "
+        "VALUES ('Phishing', ?, ?)",
+        [(severity, day) for day, severity in rows],
+    )
+    conn.commit()
+    return len(rows)
+
+
+def test_weekly_total_includes_the_week_containing_a_midweek_start(conn):
+    total = insert_incidents(conn)
+    last_day = FIRST_DAY + timedelta(days=DAYS - 1)
+
+    daily = read_rollup(conn, "cyber_incidents", None, "day", FIRST_DAY, last_day)
+    weekly = read_rollup(conn, "cyber_incidents", None, "week", FIRST_DAY, last_day)
+
+    assert daily["count"].sum() == weekly["count"].sum() == total
+    assert weekly["bucket"].dt.date.tolist() == [
+        date(2024, 3, 4),
+        date(2024, 3, 11),
+        date(2024, 3, 18),
+    ]
+
+
+def test_weekly_split_matches_daily_split_from_a_midweek_start(conn):
+    insert_incidents(conn)
+    start, end = FIRST_DAY.isoformat(), "2024-03-20"
+
+    daily = read_rollup(conn, "cyber_incidents", "severity", "day", start, end)
+    weekly = read_rollup(conn, "cyber_incidents", "severity", "week", start, end)
+
+    # The week of 2024-03-18 is included whole, past the Wednesday end
+    assert weekly["count"].sum() == daily["count"].sum() + 6
+    assert verify_time_rollups(conn) == []
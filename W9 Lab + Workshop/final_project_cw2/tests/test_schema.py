@@ -0,0 +1,92 @@
+from pathlib import Path
+
+import pytest
+
+from app.data.db import connect_database, get_table_columns, iter_csv_batches
+from app.data.schema import (
+    DASHBOARD_QUERIES,
+    MIGRATIONS,
+    apply_migrations,
+    bulk_load_batches,
+    check_query_plans,
+    create_all_tables,
+    get_schema_version,
+    is_first_load,
+)
+from app.data.sync import sync_batches
+
+
+@pytest.mark.parametrize(
+    "sql, params", DASHBOARD_QUERIES, ids=[sql for sql, _ in DASHBOARD_QUERIES]
+)
+def test_dashboard_query_uses_an_index(conn, sql, params):
+    assert check_query_plans(conn, [(sql, params)]) == []
+
+
+def test_all_dashboard_queries_use_indexes(conn):
+    assert check_query_plans(conn) == []
+
+
+def test_migrations_are_applied_once(conn):
+    assert get_schema_version(conn) == MIGRATIONS[-1][0]
+    assert apply_migrations(conn) == []
+
+
+PROJECT_DATA = Path(__file__).resolve().parent.parent / "DATA"
+
+# Everything the per-row triggers maintain, plus the schema they live in
+DERIVED_QUERIES = [
+    "SELECT type, name, sql FROM sqlite_master ORDER BY name",
+    "SELECT * FROM kpi_counters ORDER BY table_name, dimension, value",
+    "SELECT * FROM time_rollups ORDER BY table_name, grain, bucket, dimension, value",
+    "SELECT * FROM resolution_histogram ORDER BY dimension, value, bucket",
+    "SELECT * FROM sequences",
+    "SELECT table_name, generation > 0 FROM table_generations "
+    "WHERE table_name != '_epoch' ORDER BY table_name",
+    "SELECT rowid FROM it_tickets_fts WHERE it_tickets_fts MATCH 'wifi' ORDER BY 1",
+]
+
+
+def load_tickets(conn, load):
+    batches = iter_csv_batches(
+        PROJECT_DATA / "it_tickets.csv",
+        "it_tickets",
+        get_table_columns(conn, "it_tickets"),
+        300,
+    )
+    return load(conn, "it_tickets", batches)
+
+
+def derived_rows(conn):
+    return [conn.execute(sql).fetchall() for sql in DERIVED_QUERIES]
+
+
+def test_bulk_load_matches_row_by_row_sync(conn, tmp_path):
+    assert is_first_load(conn, "it_tickets")
+    other = connect_database(tmp_path / "rows.db", performance=False)
+    create_all_tables(other)
+    try:
+        bulk = load_tickets(conn, bulk_load_batches)
+        synced = load_tickets(other, sync_batches)
+        assert bulk == synced
+        assert bulk["inserted"] == 1000
+        assert derived_rows(conn) == derived_rows(other)
+    finally:
+        other.close()
+
+
+def test_failed_bulk_load_leaves_table_and_triggers_untouched(conn):
+    schema = derived_rows(conn)[0]
+
+    def failing(conn, table_name, batches):
+        def broken():
+            yield from batches
+            raise RuntimeError("export truncated")
+
+        return bulk_load_batches(conn, table_name, broken())
+
+    with pytest.raises(RuntimeError, match="export truncated"):
+        load_tickets(conn, failing)
+    assert conn.execute("SELECT COUNT(*) FROM it_tickets").fetchone() == (0,)
+    assert derived_rows(conn)[0] == schema
+    assert is_first_load(conn, "it_tickets")
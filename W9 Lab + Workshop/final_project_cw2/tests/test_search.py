@@ -0,0 +1,98 @@
+import pytest
+
+from app.data.search import SEARCH_INDEXES, match_query, search_table
+
+HOSTILE_INPUTS = [
+    '"',
+    'wifi"',
+    "AND OR NOT *",
+    'wifi" OR "printer',
+    "NEAR(wifi printer)",
+    "subject:wifi",
+    "^wifi -printer +jam",
+    "*",
+]
+
+
+def add_ticket(conn, ticket_id, subject, description=""):
+    cursor = conn.execute(
+        "INSERT INTO it_tickets (ticket_id, subject, description) VALUES (?, ?, ?)",
+        (ticket_id, subject, description),
+    )
+    conn.commit()
+    return cursor.lastrowid
+
+
+def found(conn, text):
+    return sorted(search_table(conn, "it_tickets", text).get("ticket_id", []))
+
+
+def assert_index_matches_table(conn, table_name):
+    # rank 1 makes FTS5 compare the index with the external content table
+    fts_table = SEARCH_INDEXES[table_name][0]
+    conn.execute(
+        f"INSERT INTO {fts_table} ({fts_table}, rank) VALUES ('integrity-check', 1)"
+    )
+
+
+def test_triggers_keep_the_index_in_sync(conn):
+    row_id = add_ticket(conn, "TKT-000001", "WiFi not working", "Floor 2 router")
+    add_ticket(conn, "TKT-000002", "Printer jam")
+    assert found(conn, "wifi") == ["TKT-000001"]
+    assert found(conn, "routers") == ["TKT-000001"]
+    assert_index_matches_table(conn, "it_tickets")
+
+    conn.execute(
+        "UPDATE it_tickets SET subject = 'VPN drops', description = '' WHERE id = ?",
+        (row_id,),
+    )
+    conn.commit()
+    assert found(conn, "wifi") == []
+    assert found(conn, "vpn") == ["TKT-000001"]
+    assert_index_matches_table(conn, "it_tickets")
+
+    conn.execute("DELETE FROM it_tickets WHERE id = ?", (row_id,))
+    conn.commit()
+    assert found(conn, "vpn") == []
+    assert found(conn, "printer") == ["TKT-000002"]
+    assert_index_matches_table(conn, "it_tickets")
+
+
+def test_incident_index_follows_writes(conn):
+    conn.execute(
+        "INSERT INTO cyber_incidents (incident_type, severity, description) "
+        "VALUES ('Ransomware', 'High', 'Files encrypted on the finance share')"
+    )
+    conn.commit()
+    results = search_table(conn, "cyber_incidents", "encryption")
+    assert list(results["incident_type"]) == ["Ransomware"]
+
+    conn.execute("DELETE FROM cyber_incidents")
+    conn.commit()
+    assert search_table(conn, "cyber_incidents", "encryption").empty
+    assert_index_matches_table(conn, "cyber_incidents")
+
+
+@pytest.mark.parametrize("text", HOSTILE_INPUTS)
+def test_match_query_quotes_every_word(text):
+    query = match_query(text)
+    if query is not None:
+        for term in query.split(" "):
+            assert term.startswith('"') and term.rstrip("*").endswith('"')
+            assert '"' not in term.rstrip("*")[1:-1]
+
+
+@pytest.mark.parametrize("text", HOSTILE_INPUTS)
+def test_hostile_input_is_searched_as_plain_words(conn, text):
+    add_ticket(conn, "TKT-000001", "WiFi not working", "printer jam and router")
+    # Would raise an FTS5 syntax error if any of it were parsed as syntax
+    search_table(conn, "it_tickets", text)
+
+
+def test_operator_words_are_matched_literally(conn):
+    add_ticket(conn, "TKT-000001", "Printer and scanner")
+    add_ticket(conn, "TKT-000002", "Printer or scanner")
+    assert found(conn, "printer OR") == ["TKT-000002"]
+    assert found(conn, "NOT scanner") == []
+    assert match_query('"') is None
+    assert match_query("ransom*") == '"ransom"*'
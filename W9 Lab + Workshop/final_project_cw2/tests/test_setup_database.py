@@ -0,0 +1,120 @@
+import queue
+import shutil
+from pathlib import Path
+
+import pytest
+
+from app.data.db import connect_database, get_table_columns
+import setup_database
+from app.services.hashing_service import configure_hashing_service
+from setup_database import CSV_TABLES, _parse_csv, setup_database_complete
+
+PROJECT_DATA = Path(__file__).resolve().parent.parent / "DATA"
+
+# Password hashes are salted, so users are compared on username and role
+TABLE_QUERIES = {
+    "users": "SELECT username, role FROM users ORDER BY username",
+    "cyber_incidents": "SELECT * FROM cyber_incidents ORDER BY id",
+    "datasets_metadata": "SELECT * FROM datasets_metadata ORDER BY id",
+    "it_tickets": "SELECT * FROM it_tickets ORDER BY id",
+    "kpi_counters": "SELECT * FROM kpi_counters ORDER BY table_name, dimension, value",
+    "time_rollups": "SELECT * FROM time_rollups "
+    "ORDER BY table_name, grain, bucket, dimension, value",
+    "schema": "SELECT type, name, sql FROM sqlite_master ORDER BY name",
+    "csv_row_hashes": "SELECT * FROM csv_row_hashes ORDER BY table_name, row_key",
+    "csv_sync_state": "SELECT csv_path, table_name, sha256, row_count "
+    "FROM csv_sync_state ORDER BY csv_path",
+}
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """The project's CSVs, plus a repeated key, and a short users.txt."""
+    monkeypatch.chdir(tmp_path)
+    data = tmp_path / "DATA"
+    data.mkdir()
+    for csv_name, _ in CSV_TABLES:
+        shutil.copy(PROJECT_DATA / csv_name, data / csv_name)
+    with open(data / "cyber_incidents.csv", "a") as f:
+        f.write("1,2023-08-03,Malware,Low,Open,Repeated key,bob,2023-08-03 14:18:00\n")
+    (data / "users.txt").write_text("admin,pass-one,admin\nanalyst,pass-two,analyst\n")
+    configure_hashing_service(rounds=4, workers=1)
+    return data
+
+
+def table_rows(db_path):
+    conn = connect_database(db_path, performance=False)
+    try:
+        return {
+            name: conn.execute(sql).fetchall() for name, sql in TABLE_QUERIES.items()
+        }
+    finally:
+        conn.close()
+
+
+def test_parallel_load_matches_serial(data_dir):
+    serial_db, parallel_db = data_dir / "serial.db", data_dir / "parallel.db"
+    setup_database_complete(jobs=1, db_path=serial_db, batch_size=128)
+    setup_database_complete(jobs=2, db_path=parallel_db, batch_size=128)
+
+    serial, parallel = table_rows(serial_db), table_rows(parallel_db)
+    assert serial["cyber_incidents"][0][2] == "Low"
+    for name in TABLE_QUERIES:
+        assert serial[name] == parallel[name], name
+
+
+def test_serial_rerun_without_new_users_skips_bcrypt(data_dir, monkeypatch):
+    db_path = data_dir / "serial.db"
+    setup_database_complete(jobs=1, db_path=db_path, batch_size=128)
+
+    def calibrate():
+        raise AssertionError("hashing service resolved")
+
+    monkeypatch.setattr(setup_database, "get_hashing_service", calibrate)
+    setup_database_complete(jobs=1, db_path=db_path, batch_size=128)
+
+    # A new user does need the calibrated cost
+    with open(data_dir / "users.txt", "a") as f:
+        f.write("auditor,pass-three,user\n")
+    with pytest.raises(AssertionError, match="hashing service resolved"):
+        setup_database_complete(jobs=1, db_path=db_path, batch_size=128)
+
+
+def test_unchanged_rerun_skips_verification(data_dir, monkeypatch):
+    db_path = data_dir / "serial.db"
+    setup_database_complete(jobs=1, db_path=db_path, batch_size=128)
+
+    verified = []
+    monkeypatch.setattr(setup_database, "print_summary", verified.append)
+    setup_database_complete(jobs=1, db_path=db_path, batch_size=128)
+    assert verified == []
+
+    setup_database_complete(jobs=1, db_path=db_path, batch_size=128, verify=True)
+    assert len(verified) == 1
+
+
+def test_parallel_rerun_without_changes_starts_no_processes(data_dir, monkeypatch):
+    db_path = data_dir / "parallel.db"
+    setup_database_complete(jobs=2, db_path=db_path, batch_size=128)
+
+    def spawn(*args, **kwargs):
+        raise AssertionError("started a process with nothing to do")
+
+    monkeypatch.setattr(setup_database, "ProcessPoolExecutor", spawn)
+    monkeypatch.setattr(setup_database.multiprocessing, "Manager", spawn)
+    setup_database_complete(jobs=2, db_path=db_path, batch_size=128)
+
+
+def test_parse_csv_streams_one_batch_at_a_time(data_dir):
+    conn = connect_database(data_dir / "columns.db", performance=False)
+    conn.execute("CREATE TABLE it_tickets (ticket_id TEXT, priority TEXT)")
+    columns = get_table_columns(conn, "it_tickets")
+    conn.close()
+
+    writes = queue.Queue()
+    _parse_csv(data_dir / "it_tickets.csv", "it_tickets", columns, 300, writes)
+    jobs = [writes.get_nowait() for _ in range(writes.qsize())]
+
+    assert [len(job[3]) for job in jobs] == [300, 300, 300, 100]
+    assert all(job[:2] == ("batch", "it_tickets") for job in jobs)
+    assert all(sorted(job[2]) == sorted(columns) for job in jobs)
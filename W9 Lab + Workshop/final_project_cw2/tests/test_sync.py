@@ -0,0 +1,90 @@
+import os
+
+from app.data.counters import verify_kpi_counters
+from app.data.sync import sync_csv_to_table
+
+HEADER = "id,date,incident_type,severity,status,description,reported_by"
+
+
+def write_csv(path, lines, mtime=None):
+    path.write_text("\n".join([HEADER, *lines]) + "\n")
+    if mtime is not None:
+        # Distinct mtimes so check_csv_changed() always rereads the file
+        os.utime(path, ns=(mtime, mtime))
+    return path
+
+
+def incidents(conn):
+    return conn.execute(
+        "SELECT id, severity, description FROM cyber_incidents ORDER BY id"
+    ).fetchall()
+
+
+def test_duplicate_keys_in_a_batch_take_the_last_row(conn, tmp_path):
+    csv_path = write_csv(
+        tmp_path / "incidents.csv",
+        [
+            "1,2024-01-01,Malware,Low,Open,first,bob",
+            "2,2024-01-01,Phishing,High,Open,other,bob",
+            "1,2024-01-02,Malware,Critical,Open,second,bob",
+        ],
+    )
+    result = sync_csv_to_table(conn, csv_path, "cyber_incidents")
+
+    assert incidents(conn) == [(1, "Critical", "second"), (2, "High", "other")]
+    assert result["inserted"] == 2
+    assert verify_kpi_counters(conn) == []
+
+    # Unchanged on the next sync: the stored hash is the last row's
+    conn.execute("DELETE FROM csv_sync_state")
+    conn.commit()
+    result = sync_csv_to_table(conn, csv_path, "cyber_incidents")
+    assert (result["inserted"], result["updated"], result["unchanged"]) == (0, 0, 2)
+
+
+def test_sync_never_overwrites_rows_created_outside_it(conn, tmp_path):
+    csv_path = write_csv(
+        tmp_path / "incidents.csv",
+        ["1,2024-01-01,Malware,Low,Open,from csv,bob"],
+        mtime=1_000_000_000,
+    )
+    sync_csv_to_table(conn, csv_path, "cyber_incidents")
+    # Created from the dashboard, taking the next id
+    conn.execute(
+        "INSERT INTO cyber_incidents (incident_type, severity, description) "
+        "VALUES ('DDoS', 'High', 'from dashboard')"
+    )
+    conn.commit()
+
+    write_csv(
+        csv_path,
+        [
+            "1,2024-01-01,Malware,Medium,Open,edited in csv,bob",
+            "2,2024-01-02,Phishing,Low,Open,new csv row,bob",
+            "3,2024-01-03,Phishing,Low,Open,another new row,bob",
+        ],
+        mtime=2_000_000_000,
+    )
+    result = sync_csv_to_table(conn, csv_path, "cyber_incidents")
+
+    assert incidents(conn) == [
+        (1, "Medium", "edited in csv"),
+        (2, "High", "from dashboard"),
+        (3, "Low", "another new row"),
+    ]
+    assert (result["inserted"], result["updated"], result["conflicts"]) == (1, 1, 1)
+
+
+def test_first_sync_adopts_existing_rows(conn, tmp_path):
+    conn.execute(
+        "INSERT INTO cyber_incidents (id, incident_type, severity, description) "
+        "VALUES (1, 'Malware', 'Low', 'loaded before syncing existed')"
+    )
+    conn.commit()
+    csv_path = write_csv(
+        tmp_path / "incidents.csv", ["1,2024-01-01,Malware,High,Open,from csv,bob"]
+    )
+    result = sync_csv_to_table(conn, csv_path, "cyber_incidents")
+
+    assert incidents(conn) == [(1, "High", "from csv")]
+    assert (result["updated"], result["conflicts"]) == (1, 0)
@@ -0,0 +1,91 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from app.data.db import configure_pool, get_pool
+from app.data.tickets import (
+    create_ticket,
+    format_ticket_id,
+    insert_ticket,
+    peek_next_ticket_id,
+    reserve_ticket_ids,
+)
+
+TICKETS_PER_WORKER = 10
+BLOCKS_PER_WORKER = 3
+BLOCK_SIZE = 5
+
+
+def create_and_reserve(_=None):
+    """One writer's share: single tickets interleaved with reserved blocks."""
+    created, blocks = [], []
+    for i in range(TICKETS_PER_WORKER):
+        _, ticket_id = create_ticket(
+            "Low", "Open", "Network", f"subject {i}", "", "2024-01-01"
+        )
+        created.append(ticket_id)
+        if i < BLOCKS_PER_WORKER:
+            blocks.append(reserve_ticket_ids(BLOCK_SIZE))
+    return created, blocks
+
+
+def create_and_reserve_in_process(cwd):
+    os.chdir(cwd)
+    configure_pool(performance=True)
+    try:
+        return create_and_reserve()
+    finally:
+        get_pool().close_all()
+
+
+def ticket_numbers(ticket_ids):
+    return [int(ticket_id.removeprefix("TKT-")) for ticket_id in ticket_ids]
+
+
+def test_concurrent_writers_never_share_ticket_ids(pooled_db, tmp_path):
+    processes, threads = 2, 4
+    # Spawned, so no worker inherits this process's open connections
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(processes, mp_context=context) as process_pool:
+        process_futures = [
+            process_pool.submit(create_and_reserve_in_process, tmp_path)
+            for _ in range(processes)
+        ]
+        with ThreadPoolExecutor(threads) as thread_pool:
+            outcomes = list(thread_pool.map(create_and_reserve, range(threads)))
+        outcomes += [future.result() for future in process_futures]
+
+    created = [ticket_id for ids, _ in outcomes for ticket_id in ids]
+    blocks = [block for _, worker_blocks in outcomes for block in worker_blocks]
+    handed_out = created + [ticket_id for block in blocks for ticket_id in block]
+
+    writers = processes + threads
+    assert len(created) == writers * TICKETS_PER_WORKER
+    assert len(blocks) == writers * BLOCKS_PER_WORKER
+    assert len(set(handed_out)) == len(handed_out)
+    for block in blocks:
+        first = ticket_numbers(block)[0]
+        assert ticket_numbers(block) == list(range(first, first + BLOCK_SIZE))
+
+    # Nothing skipped, and the sequence ends at the last number handed out
+    assert sorted(ticket_numbers(handed_out)) == list(range(1, len(handed_out) + 1))
+    assert peek_next_ticket_id() == format_ticket_id(len(handed_out) + 1)
+    with get_pool().connection() as conn:
+        stored = [row[0] for row in conn.execute("SELECT ticket_id FROM it_tickets")]
+    assert sorted(stored) == sorted(created)
+
+
+def test_explicit_ticket_id_moves_the_sequence_forward(pooled_db):
+    assert create_ticket("Low", "Open", "Network", "first", "", "2024-01-01")[1] == (
+        "TKT-000001"
+    )
+    insert_ticket("TKT-9000", "High", "Open", "Server", "imported", "", "2024-01-02")
+    assert peek_next_ticket_id() == "TKT-009001"
+    assert reserve_ticket_ids(2) == ["TKT-009001", "TKT-009002"]
+    assert create_ticket("Low", "Open", "Network", "next", "", "2024-01-03")[1] == (
+        "TKT-009003"
+    )
+
+    # A lower explicit ID never moves it back
+    insert_ticket("TKT-000500", "Low", "Open", "Server", "older", "", "2024-01-04")
+    assert peek_next_ticket_id() == "TKT-009004"
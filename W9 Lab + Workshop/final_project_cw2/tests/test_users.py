@@ -0,0 +1,41 @@
+import pytest
+
+from app.data.users import migrate_users_bulk, migrate_users_from_file
+from app.services.hashing_service import HashingService, hash_rounds
+
+
+@pytest.fixture
+def users_file(tmp_path):
+    path = tmp_path / "users.txt"
+    path.write_text("admin,pass-one,admin\nanalyst,pass-two,analyst\n")
+    return path
+
+
+def stored_costs(conn):
+    rows = conn.execute("SELECT password_hash FROM users").fetchall()
+    return [hash_rounds(stored_hash) for (stored_hash,) in rows]
+
+
+@pytest.mark.parametrize("migrate", [migrate_users_bulk, migrate_users_from_file])
+def test_migrated_hashes_use_the_service_cost(conn, users_file, migrate):
+    service = HashingService(rounds=5, workers=1)
+    try:
+        kwargs = {"jobs": 1} if migrate is migrate_users_bulk else {}
+        assert migrate(conn, users_file, rounds=service.rounds, **kwargs) == 2
+        assert stored_costs(conn) == [5, 5]
+        for (stored_hash,) in conn.execute("SELECT password_hash FROM users"):
+            assert not service.needs_rehash(stored_hash)
+    finally:
+        service.shutdown()
+
+
+def test_bulk_migration_resumes_from_the_staging_table(conn, users_file):
+    # Left behind by an interrupted run; the staging table comes from migration 11
+    conn.execute(
+        "INSERT INTO user_migration_staging VALUES ('admin', ?, 'admin')",
+        ("$2b$05$" + "x" * 53,),
+    )
+    conn.commit()
+    assert migrate_users_bulk(conn, users_file, jobs=1, rounds=5) == 2
+    staged = conn.execute("SELECT COUNT(*) FROM user_migration_staging").fetchone()
+    assert staged == (0,)